@@ -0,0 +1,207 @@
+"""Persistent cache of LLM answers for repeated questions.
+
+Entries are keyed by model, prompt template and a hash of the retrieved chunk
+IDs. Because chunk IDs are content hashes, a query that now retrieves
+different chunks (new or revised documents) misses on its own; ingestion also
+calls ``invalidate_chunks`` for the chunks of every file it changes.
+
+In ``"exact"`` mode only identical prompts hit. In ``"semantic"`` mode a query
+whose embedding is within ``ANSWER_CACHE_SIMILARITY`` (cosine) of a cached
+query also hits, provided it retrieved the same chunks under the same model,
+template and conversation context.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import metrics
+from config import (
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_MODE,
+    ANSWER_CACHE_PATH,
+    ANSWER_CACHE_SIMILARITY,
+    ANSWER_CACHE_TTL,
+    ANURA_MODEL,
+)
+
+
+def _sha(*parts):
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """SQLite-backed answer store with TTL, LRU size cap and chunk-based invalidation"""
+
+    def __init__(self, path=ANSWER_CACHE_PATH, mode=ANSWER_CACHE_MODE, ttl=ANSWER_CACHE_TTL,
+                 max_entries=ANSWER_CACHE_MAX_ENTRIES, similarity=ANSWER_CACHE_SIMILARITY,
+                 model=ANURA_MODEL, embed=None):
+        self.mode = mode
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self._embed = embed
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " key TEXT PRIMARY KEY, group_key TEXT NOT NULL, query_embedding BLOB,"
+            " answer TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS answers_group ON answers(group_key);"
+            "CREATE INDEX IF NOT EXISTS answers_last_used ON answers(last_used);"
+            "CREATE TABLE IF NOT EXISTS answer_chunks (chunk_id TEXT NOT NULL, key TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS answer_chunks_chunk ON answer_chunks(chunk_id);"
+        )
+        self._conn.commit()
+
+    @property
+    def enabled(self):
+        return self.mode in ("exact", "semantic")
+
+    def _keys(self, template, prompt, chunk_ids, context):
+        chunk_hash = _sha(*sorted(chunk_ids))
+        group_key = _sha(self.model, template, chunk_hash, context)
+        return _sha(group_key, prompt), group_key
+
+    def _query_embedding(self, query):
+        if self._embed is None:
+            from embeddings import get_embedding_function
+            self._embed = get_embedding_function()
+        vector = np.asarray(self._embed([query])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, template, query, prompt, chunk_ids, context=""):
+        """Return a cached answer for this request, or None"""
+        if not self.enabled or not chunk_ids:
+            return None
+        key, group_key = self._keys(template, prompt, chunk_ids, context)
+        now = time.time()
+        fresh_after = now - self.ttl
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer FROM answers WHERE key = ? AND created > ?", (key, fresh_after)
+            ).fetchone()
+            hit_key = key if row else None
+
+        if row is None and self.mode == "semantic":
+            query_vector = self._query_embedding(query)
+            with self._lock:
+                candidates = self._conn.execute(
+                    "SELECT key, query_embedding, answer FROM answers "
+                    "WHERE group_key = ? AND created > ? AND query_embedding IS NOT NULL",
+                    (group_key, fresh_after)
+                ).fetchall()
+            if candidates:
+                matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob, _ in candidates])
+                scores = matrix @ query_vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity:
+                    hit_key, row = candidates[best][0], (candidates[best][2],)
+
+        metrics.inc("answer_cache_lookups", mode=self.mode, result="miss" if row is None else "hit")
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, hit_key))
+            self._conn.commit()
+        return row[0]
+
+    def store(self, template, query, prompt, chunk_ids, answer, context=""):
+        """Cache an answer produced for this request"""
+        if not self.enabled or not chunk_ids or not answer:
+            return
+        key, group_key = self._keys(template, prompt, chunk_ids, context)
+        query_embedding = self._query_embedding(query).tobytes() if self.mode == "semantic" else None
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("DELETE FROM answer_chunks WHERE key = ?", (key,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, group_key, query_embedding, answer, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, group_key, query_embedding, answer, now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO answer_chunks (chunk_id, key) VALUES (?, ?)",
+                [(chunk_id, key) for chunk_id in set(chunk_ids)]
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        expired = [key for (key,) in self._conn.execute(
+            "SELECT key FROM answers WHERE created <= ?", (now - self.ttl,)
+        )]
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+        overflow = count - len(expired) - self.max_entries
+        if overflow > 0:
+            expired += [key for (key,) in self._conn.execute(
+                "SELECT key FROM answers WHERE created > ? ORDER BY last_used ASC LIMIT ?",
+                (now - self.ttl, overflow)
+            )]
+        self._delete(expired)
+
+    def _delete(self, keys):
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(f"DELETE FROM answers WHERE key IN ({placeholders})", batch)
+            self._conn.execute(f"DELETE FROM answer_chunks WHERE key IN ({placeholders})", batch)
+
+    def invalidate_chunks(self, chunk_ids):
+        """Drop every answer that was built from any of these chunks; returns how many"""
+        chunk_ids = list(set(chunk_ids))
+        if not chunk_ids:
+            return 0
+        with self._lock:
+            keys = set()
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                keys.update(key for (key,) in self._conn.execute(
+                    f"SELECT DISTINCT key FROM answer_chunks WHERE chunk_id IN ({placeholders})", batch
+                ))
+            self._delete(list(keys))
+            self._conn.commit()
+        return len(keys)
+
+    def clear(self):
+        """Remove every cached answer"""
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.execute("DELETE FROM answer_chunks")
+            self._conn.commit()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "entries": count}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """Return the process-wide answer cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache()
+        return _cache
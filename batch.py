@@ -0,0 +1,176 @@
+"""Headless bulk retrieval over a JSONL file of queries.
+
+Each input line is a JSON object whose text is taken from ``query``,
+``question`` or ``title`` + ``body`` (so the backlog's ``requests.jsonl``
+works as is), and whose ID is ``id``, ``request_id`` or the line number.
+Queries are embedded and searched in batches (one embedding call and one
+``collection.query`` per batch), and answers from the LLM are optionally
+generated by a bounded thread pool. Results stream out as JSONL in input
+order.
+
+    python -m batch questions.jsonl --k 5 --output results.jsonl
+    python -m batch questions.jsonl --llm --api-key "$ANURA_API_KEY" --concurrency 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import context
+import retrieval
+import store
+from config import HYBRID_SEARCH
+from llm import call_anura_api
+from prompts import build_rag_prompt
+
+DEFAULT_BATCH_SIZE = 64
+
+
+def query_text(record):
+    """The query text of an input record"""
+    for field in ("query", "question"):
+        if record.get(field):
+            return str(record[field])
+    return "\n".join(str(record[field]) for field in ("title", "body") if record.get(field))
+
+
+def read_jsonl(lines):
+    """Yield ``(record_id, text, record)`` for each non-empty line"""
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, "", {"error": f"Invalid JSON on line {line_number}: {e}"}
+            continue
+        if not isinstance(record, dict):
+            record = {"query": record}
+        yield record.get("id", record.get("request_id", line_number)), query_text(record), record
+
+
+def _hits(results):
+    hits = []
+    for chunk_id, doc, metadata, distance in zip(results["ids"], results["documents"],
+                                                 results["metadatas"], results["distances"]):
+        metadata = metadata or {}
+        hits.append({
+            "id": chunk_id,
+            "source_file": metadata.get("source_file"),
+            "paragraph_index": metadata.get("paragraph_index"),
+            "page": metadata.get("page"),
+            "distance": distance,
+            "text": doc,
+        })
+    return hits
+
+
+def answer(query, results, anura_api_key, metric="l2"):
+    """LLM answer for one query from its retrieved chunks (``metric`` is the collection's distance metric)"""
+    passages, _ = context.pack_context(results["documents"], results["metadatas"], results["distances"])
+    return call_anura_api(build_rag_prompt(query, "", passages, metric), anura_api_key)
+
+
+def run_batch(records, n_results=5, anura_api_key=None, concurrency=4, batch_size=DEFAULT_BATCH_SIZE,
+              hybrid=HYBRID_SEARCH, collection=None, sources=None, tenant=None):
+    """Retrieve (and optionally answer) ``(record_id, text, record)`` items; yields output dicts in input order.
+
+    ``sources`` limits every query to chunks of those source files, and
+    ``tenant`` picks whose documents are searched when no collection is given.
+    """
+    if collection is None:
+        collection = store.get_tenant_collection(tenant)
+    batch_size = max(1, batch_size)
+    metric = retrieval.distance_metric(collection) if collection is not None else "l2"
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency)) if anura_api_key else None
+    pending = deque()  # (output, future or None), oldest first
+
+    def drain(limit):
+        while len(pending) > limit:
+            output, future = pending.popleft()
+            if future is not None:
+                output["answer"] = future.result()
+            yield output
+
+    def flush(batch):
+        valid = [item for item in batch if item[1] and not item[2].get("error")]
+        rows = {}
+        if valid and collection is not None:
+            started = time.perf_counter()
+            found = retrieval.retrieve_many([text for _, text, _ in valid], n_results, collection, hybrid,
+                                            sources=sources)
+            seconds_per_query = (time.perf_counter() - started) / len(valid)
+            rows = {id(item): results for item, results in zip(valid, found)}
+        for item in batch:
+            record_id, text, record = item
+            output = {"id": record_id, "query": text}
+            future = None
+            if record.get("error"):
+                output["error"] = record["error"]
+            elif not text:
+                output["error"] = "Empty query"
+            elif collection is None:
+                output["error"] = "No documents found. Please upload and process some PDF files first."
+            else:
+                results = rows[id(item)]
+                output["results"] = _hits(results)
+                output["retrieval_ms"] = seconds_per_query * 1000
+                if pool is not None and output["results"]:
+                    future = pool.submit(answer, text, results, anura_api_key, metric)
+            pending.append((output, future))
+
+    try:
+        batch = []
+        for item in records:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+                # Stream finished answers while keeping the LLM pool busy with the next batch
+                yield from drain(batch_size)
+        if batch:
+            flush(batch)
+        yield from drain(0)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="JSONL file of queries, or - for stdin")
+    parser.add_argument("--output", "-o", help="JSONL output file (default: stdout)")
+    parser.add_argument("--k", type=int, default=5, help="chunks retrieved per query")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--llm", action="store_true", help="also generate an answer per query")
+    parser.add_argument("--api-key", default=os.environ.get("ANURA_API_KEY"),
+                        help="Anura API key (default: $ANURA_API_KEY)")
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM calls in flight")
+    parser.add_argument("--no-hybrid", action="store_true", help="vector search only")
+    parser.add_argument("--source", action="append", help="only search this source file (repeatable)")
+    parser.add_argument("--tenant", help="search this tenant's documents (default: the shared corpus)")
+    args = parser.parse_args(argv)
+
+    if args.llm and not args.api_key:
+        parser.error("--llm needs --api-key or ANURA_API_KEY")
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    sink = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for output in run_batch(read_jsonl(source), args.k, args.api_key if args.llm else None,
+                                args.concurrency, args.batch_size, not args.no_hybrid and HYBRID_SEARCH,
+                                sources=args.source, tenant=args.tenant):
+            sink.write(json.dumps(output, ensure_ascii=False) + "\n")
+            sink.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
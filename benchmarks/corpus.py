@@ -0,0 +1,124 @@
+"""Synthetic PDF corpora for the benchmarks.
+
+Each document gets a topic vocabulary drawn from a shared Zipf-like word list
+plus a handful of marker terms that appear only in that document, so the
+generated queries have a known answer (``source_file``). Output is
+deterministic for a given seed.
+
+    python -m benchmarks.corpus /tmp/corpus --docs 1000 --pages 5
+"""
+import argparse
+import json
+import os
+import random
+import textwrap
+
+COMMON_WORDS = (
+    "the of and to in a is that for it as with was on be by this are from at an which or have has "
+    "not but were been their they more also can these other its between into than such only both"
+).split()
+
+TOPIC_WORDS = (
+    "gene protein cell receptor kinase pathway signal neural network model data analysis method "
+    "result theorem equation proof lattice spectrum quantum field particle energy entropy climate "
+    "ocean carbon soil species population evolution selection algorithm graph matrix tensor gradient "
+    "optimization inference bayesian estimator variance sample cohort trial dose response tumor "
+    "immune antibody virus vaccine catalyst polymer crystal alloy semiconductor laser photon sensor"
+).split()
+
+
+def write_pdf(path, pages, line_chars=90):
+    """Write a minimal text-only PDF with one Helvetica text block per page"""
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: ("<< /Type /Pages /Kids [%s] /Count %d >>"
+            % (" ".join(f"{page_id} 0 R" for page_id in page_ids), len(pages))).encode(),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for page_id, text in zip(page_ids, pages):
+        lines = textwrap.wrap(text, line_chars)
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines)
+        stream = "BT /F1 9 Tf 20 780 Td 11 TL " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        stream = stream.encode("latin-1", "replace")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>").encode()
+        objects[page_id + 1] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n" % number + objects[number] + b"\nendobj\n"
+    xref = len(out)
+    size = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    out += b"".join(b"%010d 00000 n \n" % offsets[number] for number in range(1, size))
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _page_text(rng, topic, markers, words):
+    """Sentences mixing common words, the document's topic words and its markers"""
+    sentences = []
+    count = 0
+    while count < words:
+        length = rng.randint(8, 20)
+        sentence = []
+        for _ in range(length):
+            roll = rng.random()
+            if roll < 0.45:
+                sentence.append(rng.choice(COMMON_WORDS))
+            elif roll < 0.97:
+                # Zipf-like: the first topic words are much more frequent
+                sentence.append(topic[min(len(topic) - 1, int(rng.paretovariate(1.2)) - 1)])
+            else:
+                sentence.append(rng.choice(markers))
+        sentences.append(" ".join(sentence).capitalize() + ".")
+        count += length
+    return " ".join(sentences)
+
+
+def generate_corpus(directory, docs, pages=3, words_per_page=400, seed=0, markers_per_doc=4):
+    """Write ``docs`` PDFs into a directory.
+
+    Returns ``(paths, queries)`` where each query is
+    ``{"query": ..., "source_file": ...}`` built from a document's marker terms.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    queries = []
+    for d in range(docs):
+        topic = rng.sample(TOPIC_WORDS, 12)
+        markers = [f"m{d:05d}x{k}" for k in range(markers_per_doc)]
+        file_name = f"synthetic_{d:05d}.pdf"
+        path = os.path.join(directory, file_name)
+        write_pdf(path, [_page_text(rng, topic, markers, words_per_page) for _ in range(pages)])
+        paths.append(path)
+        queries.append({"query": f"{topic[0]} {topic[1]} {markers[0]} {markers[1]}", "source_file": file_name})
+    return paths, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--words", type=int, default=400, help="words per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", help="also write the labelled queries to this JSONL file")
+    args = parser.parse_args()
+
+    paths, queries = generate_corpus(args.directory, args.docs, args.pages, args.words, args.seed)
+    if args.queries:
+        with open(args.queries, "w", encoding="utf-8") as f:
+            for query in queries:
+                f.write(json.dumps(query) + "\n")
+    print(json.dumps({"directory": args.directory, "documents": len(paths),
+                      "bytes": sum(os.path.getsize(path) for path in paths)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Recall and latency of hierarchical (documents, then chunks) versus flat retrieval in one run.
+
+Queries come from a JSONL file with ``{"query": ..., "source_file": ...}`` or
+``{"query": ..., "relevant_ids": [...]}`` per line (``python -m
+benchmarks.corpus --queries`` writes the former), or are sampled from the
+store with ``--sample N``. Query embeddings are computed once up front, so the
+timings compare the searches only. Besides recall@k and latency, the report
+gives the share of queries whose relevant document survived the first stage
+and the average number of chunks each mode searches over.
+
+    python -m benchmarks.hierarchical --queries queries.jsonl --top-docs 5 20 50 --k 5 10
+"""
+import argparse
+import json
+import time
+
+import documents
+import retrieval
+import store
+from benchmarks.hybrid_recall import is_relevant, load_queries, sample_queries
+from benchmarks.pipeline import percentiles
+from config import HYBRID_SEARCH
+from embeddings import get_embedding_function
+from manifest import get_manifest
+from tenants import tenant_of
+
+
+def run_mode(queries, k, collection, hybrid, top_docs=None):
+    """Recall@k and per-query latency for flat search (``top_docs`` None) or hierarchical search"""
+    found = 0
+    seconds = []
+    for query in queries:
+        started = time.perf_counter()
+        results = retrieval.retrieve_many([query["query"]], k, collection, hybrid, hierarchical=top_docs is not None,
+                                          top_docs=top_docs or 0)[0]
+        seconds.append(time.perf_counter() - started)
+        if any(is_relevant(query, chunk_id, metadata)
+               for chunk_id, metadata in zip(results["ids"], results["metadatas"])):
+            found += 1
+    return {"recall": found / len(queries) if queries else 0.0, "latency_ms": percentiles(seconds)}
+
+
+def first_stage(queries, top_docs, collection):
+    """Share of queries whose relevant document is selected, and the chunks searched per query"""
+    manifest = get_manifest(tenant_of(collection)).entries()
+    owner = {chunk_id: file_name for file_name, entry in manifest.items() for chunk_id in entry["chunk_ids"]}
+    embeddings = get_embedding_function()([query["query"] for query in queries])
+    selected = documents.select_documents(embeddings, top_docs, collection)
+    kept = 0
+    chunks = 0
+    for query, files in zip(queries, selected):
+        relevant = {query["source_file"]} if "source_file" in query else \
+            {owner.get(chunk_id) for chunk_id in query.get("relevant_ids", ())}
+        kept += bool(relevant.intersection(files))
+        chunks += sum(len(manifest.get(file_name, {}).get("chunk_ids", ())) for file_name in files)
+    return {"document_recall": kept / len(queries) if queries else 0.0,
+            "chunks_searched": chunks / len(queries) if queries else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--queries", help="JSONL file of labelled queries")
+    source.add_argument("--sample", type=int, help="number of chunks to sample as exact-term queries")
+    parser.add_argument("--terms", type=int, default=3, help="rare terms per sampled query")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--top-docs", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--no-hybrid", action="store_true", help="vector search only")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    collection = store.get_tenant_collection()
+    if collection is None:
+        raise SystemExit("No collection found; ingest some PDFs first.")
+    hybrid = HYBRID_SEARCH and not args.no_hybrid
+
+    queries = load_queries(args.queries) if args.queries else sample_queries(
+        collection, args.sample, args.terms, args.seed)
+    # Warm the embedding cache and the document collection so every mode sees the same costs
+    get_embedding_function()([query["query"] for query in queries])
+    document_count = documents.count(collection)
+
+    report = {
+        "queries": len(queries),
+        "chunks": collection.count(),
+        "documents": document_count,
+        "hybrid": hybrid,
+        "first_stage": {str(top_docs): first_stage(queries, top_docs, collection) for top_docs in args.top_docs},
+        "results": {},
+    }
+    for k in args.k:
+        modes = {"flat": run_mode(queries, k, collection, hybrid)}
+        for top_docs in args.top_docs:
+            modes[f"top_docs={top_docs}"] = run_mode(queries, k, collection, hybrid, top_docs)
+        report["results"][str(k)] = modes
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
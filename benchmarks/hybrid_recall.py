@@ -0,0 +1,103 @@
+"""Recall of vector-only versus hybrid (BM25 + vector) retrieval at several n_results.
+
+Queries come from a JSONL file with ``{"query": ..., "relevant_ids": [...]}``
+or ``{"query": ..., "source_file": ...}`` per line, or are sampled from the
+store with ``--sample N``: each sampled chunk contributes a query made of its
+rarest terms, and that chunk is the one relevant result.
+
+    python -m benchmarks.hybrid_recall --sample 200 --k 3 5 10
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import retrieval
+import store
+from lexical import get_lexical_index, tokenize
+
+
+def sample_queries(collection, count, terms_per_query, seed):
+    """Build exact-term queries from randomly chosen chunks"""
+    index = get_lexical_index(collection)
+    ids = collection.get(include=[])["ids"]
+    random.Random(seed).shuffle(ids)
+    chosen = collection.get(ids=ids[:count], include=["documents"])
+    queries = []
+    for chunk_id, doc in zip(chosen["ids"], chosen["documents"]):
+        terms = sorted(set(tokenize(doc)), key=lambda term: len(index.postings.get(term, ())))
+        if terms:
+            queries.append({"query": " ".join(terms[:terms_per_query]), "relevant_ids": [chunk_id]})
+    return queries
+
+
+def load_queries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def is_relevant(query, chunk_id, metadata):
+    if "relevant_ids" in query:
+        return chunk_id in query["relevant_ids"]
+    return (metadata or {}).get("source_file") == query.get("source_file")
+
+
+def recall_at(queries, k, hybrid, collection):
+    """Fraction of queries with at least one relevant chunk in the top k"""
+    found = 0
+    for query in queries:
+        results = retrieval.retrieve(query["query"], k, collection, hybrid=hybrid)
+        if any(is_relevant(query, chunk_id, metadata)
+               for chunk_id, metadata in zip(results["ids"], results["metadatas"])):
+            found += 1
+    return found / len(queries) if queries else 0.0
+
+
+def lexical_latency_ms(queries, collection, k):
+    index = get_lexical_index(collection)
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query["query"], k)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p99": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--queries", help="JSONL file of labelled queries")
+    source.add_argument("--sample", type=int, help="number of chunks to sample as exact-term queries")
+    parser.add_argument("--terms", type=int, default=3, help="rare terms per sampled query")
+    parser.add_argument("--k", type=int, nargs="+", default=[3, 5, 10, 20])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    collection = store.get_tenant_collection()
+    if collection is None:
+        raise SystemExit("No collection found; ingest some PDFs first.")
+
+    queries = load_queries(args.queries) if args.queries else sample_queries(
+        collection, args.sample, args.terms, args.seed)
+    report = {
+        "queries": len(queries),
+        "chunks": collection.count(),
+        "recall": {
+            str(k): {
+                "vector": recall_at(queries, k, False, collection),
+                "hybrid": recall_at(queries, k, True, collection),
+            }
+            for k in args.k
+        },
+        "lexical_latency_ms": lexical_latency_ms(queries, collection, max(args.k)),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
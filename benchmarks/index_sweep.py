@@ -0,0 +1,124 @@
+"""Recall versus latency of the HNSW index over a grid of index settings, on this store's embeddings.
+
+The chunk embeddings of the default tenant are copied into scratch
+collections, one per combination of distance metric, M and construction ef,
+and each is queried at every search ef. Recall@k is measured against exact
+(brute-force) nearest neighbours under the same metric, so it isolates the
+approximation error of the index from retrieval quality. Queries come from
+``--queries`` / ``--sample`` as in the other benchmarks; their embeddings are
+computed once up front. The report also gives build time and the disk space
+each copy takes (index and SQLite), to pick HNSW_* settings for the corpus.
+
+    python -m benchmarks.index_sweep --sample 200 --m 8 16 32 --search-ef 10 50 100 200 --k 10
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import retrieval
+import store
+from benchmarks.hybrid_recall import load_queries, sample_queries
+from benchmarks.pipeline import git_commit, percentiles
+from compact import directory_size
+from embeddings import get_embedding_function
+
+
+def load_embeddings(collection, batch_size=1000):
+    """IDs and embedding matrix of every chunk in the collection"""
+    ids, embeddings = [], []
+    total = collection.count()
+    for offset in range(0, total, batch_size):
+        page = collection.get(include=["embeddings"], limit=batch_size, offset=offset)
+        ids.extend(page["ids"])
+        embeddings.extend(page["embeddings"])
+    return ids, np.asarray(embeddings, dtype=np.float32)
+
+
+def exact_neighbours(space, ids, matrix, query_embeddings, k):
+    """Brute-force top-k IDs of each query under the metric"""
+    neighbours = []
+    for query_embedding in query_embeddings:
+        distances = np.asarray(retrieval.compute_distances(space, query_embedding, matrix))
+        neighbours.append({ids[i] for i in np.argsort(distances, kind="stable")[:k]})
+    return neighbours
+
+
+def build_index(client, space, m, construction_ef, ids, matrix, batch_size=1000):
+    """Scratch collection holding the embeddings; returns it and the seconds it took to build"""
+    name = f"sweep-{space}-{m}-{construction_ef}"
+    started = time.perf_counter()
+    collection = client.create_collection(name, configuration=store.index_configuration(space, m, construction_ef))
+    for start in range(0, len(ids), batch_size):
+        collection.add(ids=ids[start:start + batch_size], embeddings=matrix[start:start + batch_size])
+    collection.count()
+    return collection, time.perf_counter() - started
+
+
+def run_search(collection, search_ef, query_embeddings, exact, k):
+    """Recall@k against the exact neighbours and per-query latency at one search ef"""
+    collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+    # One untimed query so the index is loaded before timing
+    collection.query(query_embeddings=query_embeddings[:1], n_results=k, include=[])
+    recall = 0.0
+    seconds = []
+    for query_embedding, expected in zip(query_embeddings, exact):
+        started = time.perf_counter()
+        found = collection.query(query_embeddings=[query_embedding], n_results=k, include=[])["ids"][0]
+        seconds.append(time.perf_counter() - started)
+        recall += len(expected.intersection(found)) / max(1, len(expected))
+    return {"recall": recall / len(exact) if exact else 0.0, "latency_ms": percentiles(seconds)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--queries", help="JSONL file of queries")
+    source.add_argument("--sample", type=int, help="number of chunks to sample as exact-term queries")
+    parser.add_argument("--terms", type=int, default=3, help="rare terms per sampled query")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--space", nargs="+", default=["l2"], choices=store.SPACES)
+    parser.add_argument("--m", type=int, nargs="+", default=[16])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 25, 50, 100, 200])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    collection = store.get_tenant_collection()
+    if collection is None:
+        raise SystemExit("No collection found; ingest some PDFs first.")
+    queries = load_queries(args.queries) if args.queries else sample_queries(
+        collection, args.sample, args.terms, args.seed)
+    query_embeddings = [np.asarray(vector, dtype=np.float32)
+                        for vector in get_embedding_function()([query["query"] for query in queries])]
+    ids, matrix = load_embeddings(collection)
+
+    import chromadb
+
+    scratch = tempfile.mkdtemp(prefix="index-sweep-")
+    report = {"commit": git_commit(), "chunks": len(ids), "queries": len(queries), "k": args.k, "results": []}
+    try:
+        client = chromadb.PersistentClient(path=scratch)
+        for space in args.space:
+            exact = exact_neighbours(space, ids, matrix, query_embeddings, args.k)
+            for m in args.m:
+                for construction_ef in args.construction_ef:
+                    before = directory_size(scratch)
+                    index, build_seconds = build_index(client, space, m, construction_ef, ids, matrix)
+                    size = directory_size(scratch) - before
+                    for search_ef in args.search_ef:
+                        result = run_search(index, search_ef, query_embeddings, exact, args.k)
+                        report["results"].append({"space": space, "m": m, "construction_ef": construction_ef,
+                                                  "search_ef": search_ef, "build_seconds": build_seconds,
+                                                  "disk_bytes": size, **result})
+                    client.delete_collection(index.name)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
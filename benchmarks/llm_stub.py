@@ -0,0 +1,145 @@
+"""Local OpenAI-compatible chat completions server for offline benchmarks.
+
+Stands in for the Anura endpoint with a configurable delay before the first
+token, a delay per streamed token, and an optional error rate (HTTP 503, so
+the client's retry path is exercised too). Point ``ANURA_BASE_URL`` at it:
+
+    python -m benchmarks.llm_stub --port 8100 --latency 0.3 --token-latency 0.01
+    ANURA_BASE_URL=http://127.0.0.1:8100/v1 python app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = (
+    "Based on the provided documents, the main findings concern the relationship between the "
+    "reported methods and their results. The sources agree on the central points and differ on "
+    "details of the analysis, which suggests further work on the remaining open questions."
+)
+
+
+class StubSettings:
+    """Latency and failure behaviour shared by the handler threads"""
+
+    def __init__(self, latency=0.2, token_latency=0.0, tokens=48, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.tokens = tokens
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def should_fail(self):
+        with self._lock:
+            self.requests += 1
+            return self._random.random() < self.error_rate
+
+    def words(self):
+        words = ANSWER.split()
+        return [words[i % len(words)] for i in range(self.tokens)]
+
+
+def _handler(settings):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            if settings.should_fail():
+                self._send_json(503, {"error": {"message": "stub overloaded", "type": "server_error"}})
+                return
+
+            model = request.get("model", "stub")
+            prompt_tokens = sum(len(str(message.get("content", "")).split())
+                                for message in request.get("messages", []))
+            words = settings.words()
+            time.sleep(settings.latency)
+
+            if not request.get("stream"):
+                time.sleep(settings.token_latency * len(words))
+                self._send_json(200, {
+                    "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": " ".join(words)}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                              "total_tokens": prompt_tokens + len(words)},
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for i, word in enumerate(words):
+                if i:
+                    time.sleep(settings.token_latency)
+                chunk = {
+                    "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word},
+                                 "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return StubHandler
+
+
+def start_stub(port=0, host="127.0.0.1", **settings):
+    """Start the stub in a daemon thread; returns ``(server, base_url)`` (``server.settings`` holds the counters)"""
+    stub_settings = StubSettings(**settings)
+    server = ThreadingHTTPServer((host, port), _handler(stub_settings))
+    server.settings = stub_settings
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between streamed tokens")
+    parser.add_argument("--tokens", type=int, default=48, help="tokens per answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), _handler(StubSettings(
+        args.latency, args.token_latency, args.tokens, args.error_rate)))
+    print(f"LLM stub listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
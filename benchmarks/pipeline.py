@@ -0,0 +1,194 @@
+"""End-to-end benchmark of ingestion and the query paths against a local LLM stub.
+
+Generates a synthetic corpus, ingests it through ``process_pdf`` into a
+scratch store, then drives ``search_documents`` (retrieval only, and with the
+LLM) and ``advanced_rag_search_chat`` from concurrent threads. The LLM is the
+stub from ``benchmarks.llm_stub``, so runs are offline and repeatable. The
+report is JSON (ingest throughput, latency percentiles, QPS, per-stage
+timings, commit) for comparison across commits.
+
+    python -m benchmarks.pipeline --docs 200 --queries 100 --concurrency 8 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.llm_stub import start_stub
+
+
+def percentiles(values):
+    """p50/p95/p99/mean/max of a list of seconds, in milliseconds"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def at(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {"p50": at(0.5), "p95": at(0.95), "p99": at(0.99),
+            "mean": sum(ordered) / len(ordered) * 1000, "max": ordered[-1] * 1000}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_ingest(ui, paths):
+    """Ingest the corpus once from scratch and once more unchanged"""
+    runs = {}
+    for label in ("cold", "unchanged"):
+        started = time.perf_counter()
+        status = ""
+        for status in ui.process_pdf(paths):
+            pass
+        seconds = time.perf_counter() - started
+        runs[label] = {"seconds": seconds, "docs_per_second": len(paths) / seconds if seconds else 0.0,
+                       "failed": status.count("❌")}
+    return runs
+
+
+def run_load(fn, queries, concurrency, is_error):
+    """Call fn(query) for every query from ``concurrency`` threads; returns latency stats and QPS"""
+    def timed_call(query):
+        started = time.perf_counter()
+        try:
+            error = is_error(fn(query))
+        except Exception:
+            error = True
+        return time.perf_counter() - started, error
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed_call, queries))
+    wall = time.perf_counter() - started
+    return {
+        "requests": len(outcomes),
+        "errors": sum(error for _, error in outcomes),
+        "concurrency": concurrency,
+        "qps": len(outcomes) / wall if wall else 0.0,
+        "latency_ms": percentiles([seconds for seconds, _ in outcomes]),
+    }
+
+
+def bench_queries(ui, queries, concurrency, num_results, api_key):
+    def drain(generator):
+        result = ""
+        for result in generator:
+            pass
+        return result
+
+    def search_only(query):
+        return drain(ui.search_documents(query["query"], num_results, ""))
+
+    def search_with_llm(query):
+        return drain(ui.search_documents(query["query"], num_results, api_key))
+
+    def rag_chat(query):
+        history, _ = ui.advanced_rag_search_chat(query["query"], [], num_results, api_key)
+        return history[-1][1] if history else "Error: empty history"
+
+    def hit(query, output):
+        return query["source_file"] in output
+
+    def search_error(output):
+        return output.startswith("Error") or "Error calling Anura API" in output
+
+    def rag_error(output):
+        return output.startswith("Error") or "Error in advanced" in output
+
+    report = {
+        "search": run_load(search_only, queries, concurrency, search_error),
+        "search_llm": run_load(search_with_llm, queries, concurrency, search_error),
+        "rag_chat": run_load(rag_chat, queries, concurrency, rag_error),
+    }
+    found = sum(hit(query, search_only(query)) for query in queries)
+    report["search"]["source_hit_rate"] = found / len(queries) if queries else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100, help="synthetic documents (10 to 10000)")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--words", type=int, default=400, help="words per page")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--num-results", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub seconds before the first token")
+    parser.add_argument("--llm-token-latency", type=float, default=0.005, help="stub seconds per token")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--answer-cache", default="off", help="ANSWER_CACHE_MODE during the run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="keep the corpus and store here instead of a temporary directory")
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="rag-bench-")
+    stub, base_url = start_stub(latency=args.llm_latency, token_latency=args.llm_token_latency,
+                                error_rate=args.llm_error_rate, seed=args.seed)
+
+    # Settings are read at import time, so point them at the scratch store and the stub first
+    os.environ.update({
+        "CHROMA_DB_PATH": os.path.join(workdir, "chroma_db"),
+        "ANURA_BASE_URL": base_url,
+        "ANSWER_CACHE_MODE": args.answer_cache,
+        "METRICS_PORT": "0",
+    })
+    try:
+        import ui
+        import metrics
+
+        started = time.perf_counter()
+        paths, queries = generate_corpus(os.path.join(workdir, "corpus"), args.docs, args.pages,
+                                         args.words, args.seed)
+        corpus_seconds = time.perf_counter() - started
+
+        ingest_report = bench_ingest(ui, paths)
+        ingest_report["pages_per_second"] = args.docs * args.pages / ingest_report["cold"]["seconds"]
+        ingest_report["chunks"] = ui.store.get_tenant_collection().count()
+        metrics.reset()
+
+        queries = [queries[i % len(queries)] for i in range(args.queries)]
+        query_report = bench_queries(ui, queries, args.concurrency, args.num_results, "benchmark")
+
+        report = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "config": vars(args),
+            "corpus": {"documents": len(paths), "pages": args.docs * args.pages,
+                       "bytes": sum(os.path.getsize(path) for path in paths),
+                       "generate_seconds": corpus_seconds},
+            "ingest": ingest_report,
+            "queries": query_report,
+            "llm_stub_requests": stub.settings.requests,
+            "stages_ms": {stage: {key: value * 1000 if key != "count" else value for key, value in stats.items()}
+                          for stage, stats in metrics.snapshot()["latency"].items()},
+        }
+    finally:
+        stub.shutdown()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Cold-start time to first query, with and without background warm-up.
+
+Each run starts a fresh interpreter that imports the app and starts its
+services as the launch script does, waits for ``warmup`` when it is on (as a
+readiness-gated load balancer would), then times one ``search_documents``
+call. With warm-up off the first query pays for the lazy imports and model
+load itself. Runs use the store at CHROMA_DB_PATH and never launch the web
+server.
+
+    python -m benchmarks.startup --runs 5 --query "protein folding"
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.pipeline import git_commit
+
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import warmup, ui
+imported = time.perf_counter()
+ui.start_services()
+warmup.wait(float(sys.argv[2]))
+ready = time.perf_counter()
+for _ in ui.search_documents(sys.argv[1], 5, ""):
+    pass
+answered = time.perf_counter()
+print(json.dumps({"import_seconds": imported - started, "ready_seconds": ready - started,
+                  "first_query_seconds": answered - ready, "time_to_first_answer": answered - started,
+                  "warmup": warmup.status()}))
+"""
+
+
+def probe(query, warm, timeout):
+    """One cold start in a child process; returns its timings plus the process wall time"""
+    env = dict(os.environ, WARMUP="1" if warm else "0", METRICS_PORT="0")
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", PROBE, query, str(timeout)], env=env,
+                               capture_output=True, text=True, timeout=timeout + 60)
+    wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "probe failed")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = wall
+    return result
+
+
+def summarize(runs):
+    fields = ("import_seconds", "ready_seconds", "first_query_seconds", "time_to_first_answer", "process_seconds")
+    return {field: {"min": min(run[field] for run in runs),
+                    "median": sorted(run[field] for run in runs)[len(runs) // 2],
+                    "max": max(run[field] for run in runs)}
+            for field in fields}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--query", default="research findings")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for warm-up")
+    parser.add_argument("--mode", choices=("both", "warm", "lazy"), default="both")
+    args = parser.parse_args()
+
+    modes = {"warm": True, "lazy": False}
+    if args.mode != "both":
+        modes = {args.mode: modes[args.mode]}
+    report = {"commit": git_commit(), "runs": args.runs, "modes": {}}
+    for name, warm in modes.items():
+        runs = [probe(args.query, warm, args.timeout) for _ in range(args.runs)]
+        report["modes"][name] = {"summary": summarize(runs), "stages": runs[-1]["warmup"]["stages"]}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Offline rebuild of the vector store under the configured index settings, and embedding cache compaction.
+
+Chroma fixes a collection's distance metric, HNSW M and construction ef when
+the collection is created, and its index keeps the slots of deleted vectors.
+This command copies every collection (all tenants, shards and document
+collections) into a fresh one built with ``store.index_configuration()``,
+swaps it in under the original name, then removes the index directories
+Chroma leaves behind for deleted collections, merges its full-text index and
+vacuums the SQLite files. With ``--precision float16`` the embedding cache is
+rewritten at half precision (Chroma itself always stores float32 vectors).
+Stop the app and the job workers first; nothing may write to the store while
+this runs. An interrupted run is finished or rolled back by the next one.
+
+    HNSW_SPACE=cosine HNSW_M=32 python -m compact
+    python -m compact --precision float16 --skip-index
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+
+import store
+from config import CHROMA_DB_PATH
+from embeddings import PRECISIONS, get_embedding_cache, get_embedding_function
+
+REBUILD_SUFFIX = ".rebuild"
+SEGMENT_DIR = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def directory_size(path=CHROMA_DB_PATH):
+    """Bytes used by the files under ``path``"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for file_name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file_name))
+            except OSError:
+                pass
+    return total
+
+
+def recover(client):
+    """Finish or discard the swap of a rebuild that was interrupted"""
+    names = {collection.name for collection in client.list_collections()}
+    for name in sorted(names):
+        if not name.endswith(REBUILD_SUFFIX):
+            continue
+        original = name[:-len(REBUILD_SUFFIX)]
+        if original in names:
+            # The copy never replaced the original; start over
+            client.delete_collection(name)
+        else:
+            client.get_collection(name).modify(name=original)
+
+
+def rebuild_collection(client, name, batch_size=1000):
+    """Copy a collection into one built with the current index settings and swap it in; returns its size"""
+    embedding_function = get_embedding_function()
+    source = client.get_collection(name, embedding_function=embedding_function)
+    # Legacy "hnsw:*" metadata would override the new configuration
+    metadata = {key: value for key, value in (source.metadata or {}).items() if not key.startswith("hnsw:")}
+    target = client.create_collection(name + REBUILD_SUFFIX, configuration=store.index_configuration(),
+                                      metadata=metadata or None, embedding_function=embedding_function)
+    total = source.count()
+    for offset in range(0, total, batch_size):
+        page = source.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+        if page["ids"]:
+            target.add(ids=page["ids"], embeddings=page["embeddings"], documents=page["documents"],
+                       metadatas=page["metadatas"])
+    if target.count() != total:
+        client.delete_collection(target.name)
+        raise RuntimeError(f"Copy of {name} has {target.count()} of {total} records; original kept")
+    client.delete_collection(name)
+    target.modify(name=name)
+    return total
+
+
+def remove_orphaned_segments(path=CHROMA_DB_PATH):
+    """Delete vector index directories that no collection uses any more; returns how many"""
+    conn = sqlite3.connect(os.path.join(path, "chroma.sqlite3"))
+    try:
+        in_use = {row[0] for row in conn.execute("SELECT id FROM segments")}
+    finally:
+        conn.close()
+    orphaned = [name for name in os.listdir(path)
+                if SEGMENT_DIR.match(name) and name not in in_use and os.path.isdir(os.path.join(path, name))]
+    for name in orphaned:
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    return len(orphaned)
+
+
+def vacuum(path):
+    """Merge Chroma's full-text index (deletes leave tombstones in it) and reclaim free pages"""
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        try:
+            try:
+                conn.execute("INSERT INTO embedding_fulltext_search(embedding_fulltext_search) VALUES('optimize')")
+                conn.commit()
+            except sqlite3.OperationalError:
+                pass  # Not a Chroma store with a full-text index
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+
+def compact(precision=None, rebuild_index=True, batch_size=1000):
+    """Rebuild every collection and/or convert the embedding cache; returns a report"""
+    report = {"bytes_before": directory_size(), "index": store.index_configuration()["hnsw"], "collections": {}}
+    if rebuild_index:
+        with store.write_lock():
+            client = store.get_client()
+            recover(client)
+            for collection in sorted(client.list_collections(), key=lambda collection: collection.name):
+                report["collections"][collection.name] = rebuild_collection(client, collection.name, batch_size)
+            store.reset()
+            report["orphaned_segments_removed"] = remove_orphaned_segments()
+            vacuum(os.path.join(CHROMA_DB_PATH, "chroma.sqlite3"))
+    if precision:
+        report["embedding_cache"] = {"precision": precision, "converted": get_embedding_cache().convert(precision)}
+    report["bytes_after"] = directory_size()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--precision", choices=PRECISIONS, help="rewrite the embedding cache at this precision")
+    parser.add_argument("--skip-index", action="store_true", help="leave the collections as they are")
+    parser.add_argument("--batch-size", type=int, default=1000, help="records copied per request")
+    args = parser.parse_args()
+    if args.skip_index and not args.precision:
+        parser.error("nothing to do: --skip-index without --precision")
+    print(json.dumps(compact(args.precision, not args.skip_index, max(1, args.batch_size)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Runtime settings for the research assistant, overridable through environment variables"""
+import os
+
+# Vector store location and the collection holding PDF paragraphs
+CHROMA_DB_PATH = os.environ.get("CHROMA_DB_PATH", "./chroma_db")
+COLLECTION_NAME = os.environ.get("CHROMA_COLLECTION", "pdf_documents")
+
+# Text splitting
+CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", "200"))
+
+# PDF text extraction: backend ("auto", "pymupdf", "pypdfium2", "pypdf" or "pypdf2"), seconds per page, and seconds
+# per file after which its worker process is killed (the page limit cannot interrupt a backend stuck in C code)
+PDF_EXTRACTOR = os.environ.get("PDF_EXTRACTOR", "auto").lower()
+PDF_PAGE_TIMEOUT = float(os.environ.get("PDF_PAGE_TIMEOUT", "30"))
+PDF_FILE_TIMEOUT = float(os.environ.get("PDF_FILE_TIMEOUT", "600"))
+
+# Ingestion pipeline: worker processes for extraction/splitting, chunks per collection.add
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", str(os.cpu_count() or 1)))
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "256"))
+
+# Record of indexed files (content hash and chunk IDs) used for incremental ingestion
+MANIFEST_PATH = os.environ.get("INGEST_MANIFEST_PATH", os.path.join(CHROMA_DB_PATH, "ingest_manifest.json"))
+
+# Embedding cache in front of the collection's embedding function
+EMBEDDING_MODEL_ID = os.environ.get("EMBEDDING_MODEL_ID", "chroma-default/all-MiniLM-L6-v2")
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", os.path.join(CHROMA_DB_PATH, "embedding_cache.sqlite3"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "64"))
+# Precision of newly cached vectors: "float32" or "float16" (half the size, ~3 significant digits)
+EMBEDDING_CACHE_PRECISION = os.environ.get("EMBEDDING_CACHE_PRECISION", "float32").lower()
+
+# Stream LLM tokens into the UI as they arrive
+LLM_STREAMING = os.environ.get("LLM_STREAMING", "1").lower() not in ("0", "false", "no")
+
+# LLM endpoint (any OpenAI-compatible server) and client behaviour
+ANURA_BASE_URL = os.environ.get("ANURA_BASE_URL", "https://anura-testnet.lilypad.tech/api/v1")
+ANURA_MODEL = os.environ.get("ANURA_MODEL", "llama3.1:8b")
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "120"))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "10"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", "8"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_CLIENT_POOL_SIZE = int(os.environ.get("LLM_CLIENT_POOL_SIZE", "64"))
+
+# LLM answer cache: "exact", "semantic" (also reuse answers for near-identical queries) or "off"
+ANSWER_CACHE_MODE = os.environ.get("ANSWER_CACHE_MODE", "exact").lower()
+ANSWER_CACHE_PATH = os.environ.get("ANSWER_CACHE_PATH", os.path.join(CHROMA_DB_PATH, "answer_cache.sqlite3"))
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "10000"))
+ANSWER_CACHE_SIMILARITY = float(os.environ.get("ANSWER_CACHE_SIMILARITY", "0.95"))
+
+# Hybrid retrieval: BM25 index over the same chunks, fused with vector results by reciprocal rank
+HYBRID_SEARCH = os.environ.get("HYBRID_SEARCH", "1").lower() not in ("0", "false", "no")
+BM25_INDEX_PATH = os.environ.get("BM25_INDEX_PATH", os.path.join(CHROMA_DB_PATH, "bm25_index.json"))
+BM25_K1 = float(os.environ.get("BM25_K1", "1.5"))
+BM25_B = float(os.environ.get("BM25_B", "0.75"))
+RRF_K = int(os.environ.get("RRF_K", "60"))
+HYBRID_CANDIDATE_FACTOR = int(os.environ.get("HYBRID_CANDIDATE_FACTOR", "2"))
+
+# Hierarchical retrieval: a second collection holds one centroid embedding per document; queries pick the
+# top documents there first and then search only their chunks (flat search below HIERARCHICAL_MIN_DOCS)
+DOCUMENT_COLLECTION_NAME = os.environ.get("CHROMA_DOCUMENT_COLLECTION", f"{COLLECTION_NAME}_documents")
+HIERARCHICAL_SEARCH = os.environ.get("HIERARCHICAL_SEARCH", "0").lower() not in ("0", "false", "no")
+HIERARCHICAL_TOP_DOCS = int(os.environ.get("HIERARCHICAL_TOP_DOCS", "20"))
+HIERARCHICAL_MIN_DOCS = int(os.environ.get("HIERARCHICAL_MIN_DOCS", "200"))
+
+# Tenants and shards: TENANT_MODE "shared" (one corpus), "user" (Gradio login) or "session" (browser session);
+# a tenant's chunks roll over to a new collection after SHARD_MAX_CHUNKS (0 = one collection), queries fan out
+# over SHARD_QUERY_WORKERS threads, and at most COLLECTION_HANDLE_LIMIT Python collection handles are cached (LRU,
+# 0 = no cap). The limit bounds handles only: Chroma caches vector indexes itself, sized from the open-file limit
+TENANT_MODE = os.environ.get("TENANT_MODE", "shared").lower()
+SHARD_MAX_CHUNKS = int(os.environ.get("SHARD_MAX_CHUNKS", "0"))
+SHARD_QUERY_WORKERS = int(os.environ.get("SHARD_QUERY_WORKERS", "8"))
+COLLECTION_HANDLE_LIMIT = int(os.environ.get("COLLECTION_HANDLE_LIMIT", "0"))
+
+# Vector index: distance metric ("l2", "cosine" or "ip") and HNSW graph degree (M) / build-time ef, fixed when a
+# collection is created (python -m compact rebuilds existing ones); search ef is also applied to existing collections
+HNSW_SPACE = os.environ.get("HNSW_SPACE", "l2").lower()
+HNSW_M = int(os.environ.get("HNSW_M", "16"))
+HNSW_CONSTRUCTION_EF = int(os.environ.get("HNSW_CONSTRUCTION_EF", "100"))
+HNSW_SEARCH_EF = int(os.environ.get("HNSW_SEARCH_EF", "100"))
+
+# Post-retrieval diversification for RAG chat: MMR trade-off (1 = pure relevance) and optional reranker
+MMR_LAMBDA = float(os.environ.get("MMR_LAMBDA", "0.7"))
+RERANKER = os.environ.get("RERANKER", "none").lower()  # "none", "lexical" or "cross-encoder"
+CROSS_ENCODER_MODEL = os.environ.get("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+# RAG prompt context: token budget for retrieved passages (estimated locally)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "3000"))
+
+# RAG chat memory: token cap for conversation context, sessions kept, and follow-up query rewriting
+MEMORY_TOKEN_CAP = int(os.environ.get("MEMORY_TOKEN_CAP", "600"))
+MEMORY_SUMMARY_WORDS = int(os.environ.get("MEMORY_SUMMARY_WORDS", "150"))
+MEMORY_MAX_SESSIONS = int(os.environ.get("MEMORY_MAX_SESSIONS", "1000"))
+QUERY_REWRITE = os.environ.get("QUERY_REWRITE", "heuristic").lower()  # "heuristic", "llm" or "off"
+
+# Background ingestion jobs: queue database, spool for uploaded files, worker threads
+JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", os.path.join(CHROMA_DB_PATH, "ingest_jobs.sqlite3"))
+JOBS_SPOOL_DIR = os.environ.get("JOBS_SPOOL_DIR", os.path.join(CHROMA_DB_PATH, "job_spool"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+
+# Metrics: Prometheus endpoint port (0 disables it), latency window per stage, per-request timings in chat
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9464"))
+METRICS_WINDOW = int(os.environ.get("METRICS_WINDOW", "2048"))
+SHOW_TIMINGS = os.environ.get("SHOW_TIMINGS", "false").lower() in ("1", "true", "yes")
+
+# Startup: load the store, embedding model and LLM client in the background at launch (/ready reports when done)
+WARMUP = os.environ.get("WARMUP", "1").lower() not in ("0", "false", "no")
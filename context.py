@@ -0,0 +1,123 @@
+"""Token-budgeted assembly of retrieved chunks into prompt context.
+
+Hits are grouped by ``source_file``; chunks with consecutive
+``paragraph_index`` values are merged into one passage with the splitter's
+overlap removed. Passages are then packed best-first into the token budget.
+"""
+import re
+
+from config import CHUNK_OVERLAP, CONTEXT_TOKEN_BUDGET
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """Approximate token count: one per word or punctuation mark, plus one per 8 characters of long words"""
+    return sum(1 + len(piece) // 8 for piece in _PIECE_RE.findall(text))
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Longest prefix of a text, cut at a word boundary, that fits in max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Leave room for the ellipsis marking the cut
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens - 1:
+            low = middle
+        else:
+            high = middle - 1
+    cut = text.rfind(" ", 0, low)
+    return text[:cut if cut > 0 else low].rstrip() + " …"
+
+
+def merge_overlap(previous, following, max_overlap=CHUNK_OVERLAP + 50):
+    """Join two consecutive chunks, dropping the text the second repeats from the first"""
+    for size in range(min(len(previous), len(following), max_overlap), 0, -1):
+        if previous.endswith(following[:size]):
+            return previous + following[size:], size
+    return previous + "\n" + following, 0
+
+
+def build_passages(documents, metadatas, distances):
+    """Merge adjacent chunks of the same file into passages; returns (passages, overlap_chars_removed)"""
+    by_file = {}
+    for doc, metadata, distance in zip(documents, metadatas, distances):
+        metadata = metadata or {}
+        source_file = metadata.get("source_file", "Unknown")
+        pages = (metadata.get("page"), metadata.get("page_end", metadata.get("page")))
+        by_file.setdefault(source_file, []).append((metadata.get("paragraph_index"), doc, distance, pages))
+
+    passages = []
+    removed = 0
+    for source_file, hits in by_file.items():
+        indexed = sorted((hit for hit in hits if isinstance(hit[0], int)), key=lambda hit: hit[0])
+        unindexed = [hit for hit in hits if not isinstance(hit[0], int)]
+
+        current = None
+        for paragraph_index, doc, distance, pages in indexed:
+            if current is not None and paragraph_index == current["last_paragraph"]:
+                continue  # the same chunk retrieved twice
+            if current is not None and paragraph_index == current["last_paragraph"] + 1:
+                current["text"], overlap = merge_overlap(current["text"], doc)
+                current["last_paragraph"] = paragraph_index
+                current["distance"] = min(current["distance"], distance)
+                current["chunks"] += 1
+                if pages[1] is not None:
+                    current["pages"] = (current["pages"][0] or pages[0], pages[1])
+                removed += overlap
+                continue
+            if current is not None:
+                passages.append(current)
+            current = {"source_file": source_file, "first_paragraph": paragraph_index,
+                       "last_paragraph": paragraph_index, "text": doc, "distance": distance, "chunks": 1,
+                       "pages": pages}
+        if current is not None:
+            passages.append(current)
+
+        for paragraph_index, doc, distance, pages in unindexed:
+            passages.append({"source_file": source_file, "first_paragraph": paragraph_index,
+                             "last_paragraph": paragraph_index, "text": doc, "distance": distance, "chunks": 1,
+                             "pages": pages})
+    return passages, removed
+
+
+def pack_context(documents, metadatas, distances, token_budget=CONTEXT_TOKEN_BUDGET):
+    """Select passages best-first (smallest distance) until the token budget is spent.
+
+    Returns ``(passages, stats)``; each passage carries ``tokens`` and its
+    ``pages`` as ``(first, last)``, which are ``None`` for chunks stored
+    without page numbers. ``stats`` reports the raw chunk tokens, the tokens
+    packed, and the tokens saved by overlap removal and by the budget.
+    """
+    raw_tokens = sum(estimate_tokens(doc) for doc in documents)
+    passages, overlap_chars = build_passages(documents, metadatas, distances)
+    for passage in passages:
+        passage["tokens"] = estimate_tokens(passage["text"])
+    merged_tokens = sum(passage["tokens"] for passage in passages)
+
+    packed = []
+    used = 0
+    for passage in sorted(passages, key=lambda passage: passage["distance"]):
+        if used + passage["tokens"] <= token_budget:
+            packed.append(passage)
+            used += passage["tokens"]
+        elif not packed:
+            # Never send an empty context: trim the best passage to fit
+            passage = dict(passage, text=truncate_to_tokens(passage["text"], token_budget))
+            passage["tokens"] = estimate_tokens(passage["text"])
+            packed.append(passage)
+            used += passage["tokens"]
+
+    stats = {
+        "chunks": len(documents),
+        "passages": len(packed),
+        "raw_tokens": raw_tokens,
+        "packed_tokens": used,
+        "overlap_tokens_saved": max(0, raw_tokens - merged_tokens),
+        "budget_tokens_dropped": max(0, merged_tokens - used),
+        "overlap_chars_removed": overlap_chars,
+        "token_budget": token_budget,
+    }
+    return packed, stats
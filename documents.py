@@ -0,0 +1,123 @@
+"""Document-level embeddings for two-stage (hierarchical) retrieval.
+
+A second collection holds one entry per source file: the normalised mean of
+its chunk embeddings, with the file's opening text as the document. A query
+first picks the nearest documents there and then searches only their chunks,
+so the chunk search touches a few documents instead of the whole corpus.
+Ingestion keeps the entries in step; a store that predates the collection is
+backfilled from the chunk embeddings on first use. Each tenant has its own
+document collection; functions find the tenant from the chunk collection.
+"""
+import threading
+
+import numpy as np
+
+import metrics
+import store
+import tenants
+from config import DOCUMENT_COLLECTION_NAME
+from manifest import get_manifest
+
+EXCERPT_CHARS = 1000
+
+_backfill_lock = threading.Lock()
+_backfilled = set()
+
+
+def collection_name(tenant=tenants.DEFAULT_TENANT):
+    """Name of a tenant's document collection"""
+    return tenants.collection_name(DOCUMENT_COLLECTION_NAME, tenant)
+
+
+def centroid(embeddings):
+    """Unit-length mean of the unit-normalised embeddings"""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    mean = (matrix / np.where(norms == 0, 1.0, norms)).mean(axis=0)
+    norm = np.linalg.norm(mean)
+    return (mean / norm if norm else mean).tolist()
+
+
+def update_document(chunk_collection, file_name, chunk_ids, pages=None, batch_size=1000):
+    """Write (or replace) the document entry of one file from its stored chunk embeddings"""
+    documents = store.get_collection(collection_name(tenants.tenant_of(chunk_collection)), create=True)
+    chunk_ids = list(chunk_ids)
+    if not chunk_ids:
+        documents.delete(ids=[file_name])
+        return
+
+    embeddings = []
+    first_chunk = ""
+    for start in range(0, len(chunk_ids), batch_size):
+        fetched = chunk_collection.get(ids=chunk_ids[start:start + batch_size], include=["embeddings", "documents"])
+        embeddings.extend(fetched["embeddings"])
+        if start == 0:
+            # get() does not preserve the order of the requested IDs
+            texts = dict(zip(fetched["ids"], fetched["documents"]))
+            first_chunk = texts.get(chunk_ids[0]) or ""
+    if not embeddings:
+        return
+
+    metadata = {"source_file": file_name, "chunks": len(chunk_ids)}
+    if pages:
+        metadata["pages"] = pages
+    documents.upsert(
+        ids=[file_name],
+        embeddings=[centroid(embeddings)],
+        documents=[first_chunk[:EXCERPT_CHARS]],
+        metadatas=[metadata]
+    )
+
+
+def remove_documents(chunk_collection, file_names):
+    """Drop the document entries of the given files"""
+    documents = store.get_collection(collection_name(tenants.tenant_of(chunk_collection)))
+    if documents is not None and file_names:
+        documents.delete(ids=list(file_names))
+
+
+def rebuild(chunk_collection):
+    """Recompute the entry of every file in the manifest"""
+    tenant = tenants.tenant_of(chunk_collection)
+    store.delete_collection(collection_name(tenant))
+    for file_name, entry in get_manifest(tenant).entries().items():
+        update_document(chunk_collection, file_name, entry.get("chunk_ids", ()), entry.get("pages"))
+    store.refresh_collection(collection_name(tenant))
+
+
+def get_document_collection(chunk_collection=None):
+    """Return the document collection, backfilling it once if files were indexed before it existed"""
+    tenant = tenants.tenant_of(chunk_collection)
+    documents = store.get_collection(collection_name(tenant))
+    if tenant in _backfilled or chunk_collection is None:
+        return documents
+    with _backfill_lock:
+        if tenant not in _backfilled:
+            indexed = len(get_manifest(tenant).entries())
+            if indexed and (documents is None or documents.count() < indexed):
+                with store.write_lock():
+                    rebuild(chunk_collection)
+                documents = store.get_collection(collection_name(tenant))
+            _backfilled.add(tenant)
+    return documents
+
+
+def count(chunk_collection=None):
+    """Number of documents with an entry"""
+    documents = get_document_collection(chunk_collection)
+    return documents.count() if documents is not None else 0
+
+
+def select_documents(query_embeddings, top_docs, chunk_collection=None, timings=None):
+    """Source files of the ``top_docs`` nearest documents for each query embedding, in one query"""
+    documents = get_document_collection(chunk_collection)
+    available = documents.count() if documents is not None else 0
+    if not available:
+        return [[] for _ in query_embeddings]
+    with metrics.timed("document_query", timings):
+        results = documents.query(
+            query_embeddings=list(query_embeddings),
+            n_results=min(top_docs, available),
+            include=[]
+        )
+    return [list(ids) for ids in results["ids"]]
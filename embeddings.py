@@ -0,0 +1,219 @@
+"""Embedding function with a persistent, size-capped cache keyed by text content.
+
+Chunks repeated across papers (licenses, headers) and repeated queries are
+embedded once; afterwards their vectors come from a SQLite file next to the
+vector store. Keys hash the whitespace-normalised text together with the
+model identity, so switching models never serves stale vectors. Vectors are
+stored as float32 or, with EMBEDDING_CACHE_PRECISION=float16, at half the size;
+``python -m compact`` converts the ones already cached.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+from chromadb.utils import embedding_functions
+
+import metrics
+from config import (EMBED_BATCH_SIZE, EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_PRECISION,
+                    EMBEDDING_MODEL_ID)
+
+PRECISIONS = ("float32", "float16")
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different copies share a cache entry"""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """SQLite-backed map of text hash to vector with LRU eviction"""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+                 model_id=EMBEDDING_MODEL_ID, precision=EMBEDDING_CACHE_PRECISION):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding cache precision {precision!r}; expected float32 or float16")
+        self.path = path
+        self.precision = precision
+        self.max_entries = max_entries
+        self.model_id = model_id
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+        # Caches created before the precision column hold float32 vectors
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")]
+        if "precision" not in columns:
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN precision TEXT NOT NULL DEFAULT 'float32'")
+        self._conn.commit()
+
+    def key(self, text):
+        """Cache key for a text under this cache's model"""
+        return hashlib.sha256(f"{self.model_id}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Return ``{key: vector}`` for the keys that are cached, marking them recently used"""
+        found = {}
+        if not keys:
+            return found
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector, precision FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob, precision in rows:
+                    found[key] = np.frombuffer(blob, dtype=precision).astype(np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items):
+        """Store ``(key, vector)`` pairs and evict the least recently used beyond the cap"""
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, np.asarray(vector, dtype=self.precision).tobytes(), self.precision, now)
+                for key, vector in items]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, precision, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._conn.commit()
+
+    def convert(self, precision, batch_size=1000):
+        """Rewrite every cached vector at ``precision`` and reclaim the freed space; returns the rows converted"""
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding cache precision {precision!r}; expected float32 or float16")
+        converted = 0
+        with self._lock:
+            while True:
+                rows = self._conn.execute(
+                    "SELECT key, vector, precision FROM embeddings WHERE precision != ? LIMIT ?", (precision, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                self._conn.executemany(
+                    "UPDATE embeddings SET vector = ?, precision = ? WHERE key = ?",
+                    [(np.frombuffer(blob, dtype=old).astype(precision).tobytes(), precision, key)
+                     for key, blob, old in rows]
+                )
+                self._conn.commit()
+                converted += len(rows)
+            self._conn.execute("VACUUM")
+        self.precision = precision
+        return converted
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": count, "max_entries": self.max_entries}
+
+
+class CachedEmbeddingFunction(EmbeddingFunction):
+    """Chroma embedding function that consults the cache and embeds misses in batches.
+
+    It reports itself under the wrapped function's name and config, so the
+    collection's persisted embedding configuration is unchanged.
+    """
+
+    def __init__(self, inner=None, cache=None, batch_size=EMBED_BATCH_SIZE):
+        self._inner = inner or embedding_functions.DefaultEmbeddingFunction()
+        self._cache = cache or get_embedding_cache()
+        self.batch_size = max(1, batch_size)
+
+    def __call__(self, input):
+        texts = list(input)
+        keys = [self._cache.key(text) for text in texts]
+        cached = self._cache.get_many(keys)
+
+        # Embed each distinct missing text once, batch_size texts per model call
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        missing_keys = list(missing)
+        metrics.inc("embedding_cache_lookups", len(texts) - len(missing_keys), result="hit")
+        metrics.inc("embedding_cache_lookups", len(missing_keys), result="miss")
+        for start in range(0, len(missing_keys), self.batch_size):
+            batch_keys = missing_keys[start:start + self.batch_size]
+            with metrics.timed("embed_model"):
+                vectors = self._inner([missing[key] for key in batch_keys])
+            fresh = [(key, np.asarray(vector, dtype=np.float32)) for key, vector in zip(batch_keys, vectors)]
+            self._cache.put_many(fresh)
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def warm_up(self):
+        """Load the model by embedding a short text past the cache"""
+        with metrics.timed("embed_model"):
+            self._inner(["warm up"])
+
+    @staticmethod
+    def name():
+        return "default"
+
+    def get_config(self):
+        get_config = getattr(self._inner, "get_config", None)
+        return get_config() if get_config else {}
+
+    @staticmethod
+    def build_from_config(config):
+        return CachedEmbeddingFunction()
+
+
+_cache = None
+_embedding_function = None
+_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Return the process-wide embedding cache"""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
+
+
+def get_embedding_function():
+    """Return the process-wide cached embedding function"""
+    global _embedding_function
+    if _embedding_function is None:
+        cache = get_embedding_cache()
+        with _lock:
+            if _embedding_function is None:
+                _embedding_function = CachedEmbeddingFunction(cache=cache)
+    return _embedding_function
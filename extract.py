@@ -0,0 +1,415 @@
+"""PDF text extraction and paragraph splitting.
+
+Runs inside ingestion worker processes, so it deliberately avoids importing the
+vector store or the web UI.
+
+Pages are read one at a time from the fastest installed backend (PyMuPDF,
+pypdfium2, pypdf, then PyPDF2) and fed to the splitter as they arrive, so only
+about a page and a chunk of text are held while splitting; the chunks are
+still exactly those of splitting the whole text. Each page has a time limit; a
+page that exceeds it is skipped rather than stalling the batch. A backend
+stuck in native code ignores that limit; ingest.py then kills the worker after
+PDF_FILE_TIMEOUT.
+"""
+import bisect
+import hashlib
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+from config import CHUNK_OVERLAP, CHUNK_SIZE, PDF_EXTRACTOR, PDF_PAGE_TIMEOUT
+
+_text_splitter = None
+
+
+class PageTimeout(Exception):
+    """Raised when extracting one page takes longer than the page timeout"""
+
+
+def get_text_splitter():
+    """Return this process's paragraph splitter"""
+    global _text_splitter
+    if _text_splitter is None:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        _text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            separators=["\n\n", "\n", ". ", "! ", "? ", " "]
+        )
+    return _text_splitter
+
+
+def hash_file(pdf_file_path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(pdf_file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_chunks(paragraphs):
+    """Return a content hash per paragraph; repeats within a file get an occurrence suffix"""
+    seen = {}
+    chunk_hashes = []
+    for paragraph in paragraphs:
+        chunk_hash = hashlib.sha1(paragraph.encode("utf-8")).hexdigest()[:16]
+        occurrence = seen.get(chunk_hash, 0)
+        seen[chunk_hash] = occurrence + 1
+        chunk_hashes.append(chunk_hash if occurrence == 0 else f"{chunk_hash}-{occurrence}")
+    return chunk_hashes
+
+
+# Backends: each opens a PDF and yields (page_count, page_text) where page_text(i) extracts page i
+
+@contextmanager
+def _open_pymupdf(path):
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf
+    document = pymupdf.open(path)
+    try:
+        yield document.page_count, lambda i: document.load_page(i).get_text()
+    finally:
+        document.close()
+
+
+@contextmanager
+def _open_pypdfium2(path):
+    import pypdfium2
+
+    document = pypdfium2.PdfDocument(path)
+
+    def page_text(i):
+        page = document[i]
+        text_page = page.get_textpage()
+        try:
+            return text_page.get_text_range()
+        finally:
+            text_page.close()
+            page.close()
+
+    try:
+        yield len(document), page_text
+    finally:
+        document.close()
+
+
+@contextmanager
+def _open_pypdf(path):
+    import pypdf
+
+    with open(path, 'rb') as pdf_file:
+        reader = pypdf.PdfReader(pdf_file)
+        yield len(reader.pages), lambda i: reader.pages[i].extract_text()
+
+
+@contextmanager
+def _open_pypdf2(path):
+    import PyPDF2
+
+    with open(path, 'rb') as pdf_file:
+        reader = PyPDF2.PdfReader(pdf_file)
+        yield len(reader.pages), lambda i: reader.pages[i].extract_text()
+
+
+BACKENDS = {
+    "pymupdf": (("pymupdf", "fitz"), _open_pymupdf),
+    "pypdfium2": (("pypdfium2",), _open_pypdfium2),
+    "pypdf": (("pypdf",), _open_pypdf),
+    "pypdf2": (("PyPDF2",), _open_pypdf2),
+}
+
+
+def _installed(modules):
+    for module in modules:
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            pass
+    return False
+
+
+def get_backend(name=PDF_EXTRACTOR):
+    """Name of the extraction backend to use: the configured one, or the fastest installed for "auto\""""
+    if name != "auto":
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown PDF extractor {name!r}; expected one of {', '.join(BACKENDS)}")
+        return name
+    for candidate, (modules, _) in BACKENDS.items():
+        if _installed(modules):
+            return candidate
+    raise ImportError("No PDF extraction backend installed (pymupdf, pypdfium2, pypdf or PyPDF2)")
+
+
+@contextmanager
+def _page_deadline(seconds):
+    """Raise PageTimeout in the enclosed block after ``seconds`` (main thread on Unix only).
+
+    The signal is handled between Python bytecodes, so a backend stuck inside
+    its C library is not interrupted; ingest.py kills the worker once the whole
+    file exceeds PDF_FILE_TIMEOUT.
+    """
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise PageTimeout(f"page took longer than {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def iter_pages(pdf_file_path, backend=None, page_timeout=PDF_PAGE_TIMEOUT, skipped=None):
+    """Yield ``(page_number, text)`` one page at a time (1-based page numbers).
+
+    Pages that time out or fail to extract are left out; their numbers are
+    appended to ``skipped`` when a list is given.
+    """
+    _, open_document = BACKENDS[backend or get_backend()]
+    with open_document(pdf_file_path) as (page_count, page_text):
+        for i in range(page_count):
+            try:
+                with _page_deadline(page_timeout):
+                    text = page_text(i) or ""
+            except Exception:
+                if skipped is not None:
+                    skipped.append(i + 1)
+                continue
+            yield i + 1, text
+
+
+def _separators(splitter):
+    """The splitter's separators, if ``_StreamingSplit`` reproduces its splitting"""
+    separators = getattr(splitter, "_separators", None)
+    if (not separators or "" in separators or getattr(splitter, "_is_separator_regex", True)
+            or getattr(splitter, "_keep_separator", None) not in (True, "start")
+            or getattr(splitter, "_length_function", None) is not len):
+        raise ValueError("split_pages needs a RecursiveCharacterTextSplitter with literal separators kept at the "
+                         "start of each piece, as get_text_splitter() makes")
+    return separators
+
+
+class _StreamingSplit:
+    """One separator level of the recursive splitter, fed text as it arrives.
+
+    The splitter splits a text on the first of its separators that occurs in
+    it, merges pieces shorter than the chunk size into chunks and splits longer
+    pieces again with the separators that follow. Splitting on a level's first
+    separator before it has been seen gives the same chunks: a text without it
+    is a single piece, merged as is when short and otherwise split with the
+    remaining separators, as the splitter would have done. So a level holds the
+    current piece only while it is short, plus the chunk being merged; a long
+    piece is passed to the next level as it arrives. ``emit(chunk, offset)``
+    receives the chunks in order with their offsets in the whole text.
+    """
+
+    def __init__(self, splitter, separators, emit, offset=0):
+        self.splitter = splitter
+        self.separator = separators[0]
+        self.rest = separators[1:]
+        self.emit = emit
+        self.pending = ""  # the current piece, or the part of a long piece not yet passed on
+        self.offset = offset  # of pending in the whole text
+        self.search_from = 0  # where in pending the next separator may start
+        self.child = None  # splits the current piece once it is known to be long
+        self.merging = []  # (offset, piece) of the chunk being merged
+        self.total = 0
+
+    def feed(self, text):
+        pending = self.pending + text
+        start = 0
+        while True:
+            at = pending.find(self.separator, max(start, self.search_from))
+            if at < 0:
+                break
+            self._end_piece(pending[start:at], self.offset + start)
+            # Separators are kept at the start of the piece they precede
+            start = at
+            self.search_from = at + len(self.separator)
+
+        # No separator can start before this, whatever text comes next
+        settled = max(start, len(pending) - len(self.separator) + 1)
+        if self.child is None and self.rest and settled - start >= self.splitter._chunk_size:
+            self._flush()
+            self.child = _StreamingSplit(self.splitter, self.rest, self.emit, self.offset + start)
+        if self.child is not None:
+            self.child.feed(pending[start:settled])
+            start = settled
+        self.pending = pending[start:]
+        self.offset += start
+        self.search_from = max(0, self.search_from - start)
+
+    def finish(self):
+        """Split what is left once the text has ended"""
+        self._end_piece(self.pending, self.offset)
+        self.pending = ""
+        self._flush()
+
+    def _end_piece(self, piece, offset):
+        if self.child is not None:
+            self.child.feed(piece)
+            self.child.finish()
+            self.child = None
+        elif len(piece) >= self.splitter._chunk_size:
+            self._flush()
+            if self.rest:
+                child = _StreamingSplit(self.splitter, self.rest, self.emit, offset)
+                child.feed(piece)
+                child.finish()
+            else:
+                self.emit(piece, offset)
+        elif piece:
+            self._merge(piece, offset)
+
+    def _merge(self, piece, offset):
+        # TextSplitter._merge_splits, one piece at a time (kept separators join with "")
+        chunk_size, chunk_overlap = self.splitter._chunk_size, self.splitter._chunk_overlap
+        if self.total + len(piece) > chunk_size and self.merging:
+            self._emit_merged()
+            while self.total > chunk_overlap or (self.total + len(piece) > chunk_size and self.total > 0):
+                self.total -= len(self.merging.pop(0)[1])
+        self.merging.append((offset, piece))
+        self.total += len(piece)
+
+    def _flush(self):
+        if self.merging:
+            self._emit_merged()
+        self.merging = []
+        self.total = 0
+
+    def _emit_merged(self):
+        text = "".join(piece for _, piece in self.merging)
+        offset = self.merging[0][0]
+        if self.splitter._strip_whitespace:
+            offset += len(text) - len(text.lstrip())
+            text = text.strip()
+        if text:
+            self.emit(text, offset)
+
+
+def split_pages(pages, splitter=None):
+    """Split a stream of ``(page_number, text)`` into ``(chunk, first_page, last_page)``.
+
+    Chunks are exactly those of ``splitter.split_text("\\n".join(texts))``, but
+    come out as the pages are read: besides the page being split, only about a
+    chunk of text is held (see ``_StreamingSplit``).
+    """
+    splitter = splitter or get_text_splitter()
+    page_starts = []  # offset of each page in the joined text
+    page_numbers = []
+    chunks = []
+    level = _StreamingSplit(splitter, _separators(splitter), lambda chunk, offset: chunks.append((chunk, offset)))
+
+    def page_at(offset):
+        return page_numbers[max(0, bisect.bisect_right(page_starts, offset) - 1)]
+
+    def located():
+        for chunk, offset in chunks:
+            yield chunk, page_at(offset), page_at(offset + len(chunk) - 1)
+        chunks.clear()
+
+    length = 0
+    for page_number, text in pages:
+        if page_numbers:
+            level.feed("\n")
+            length += 1
+        page_starts.append(length)
+        page_numbers.append(page_number)
+        level.feed(text)
+        length += len(text)
+        yield from located()
+    level.finish()
+    yield from located()
+
+
+_started = None
+
+
+def init_worker(started):
+    """Pool initializer: the queue ``extract_in_worker`` reports started files on"""
+    global _started
+    _started = started
+
+
+def report_start(index):
+    """Tell the parent that this worker process has started on file ``index``, and when"""
+    _started.put((index, os.getpid(), time.time()))
+
+
+def extract_in_worker(pdf_file_path, index):
+    """``extract_and_split`` in a pool worker, reporting its start first (see ingest.start_pool)"""
+    report_start(index)
+    return extract_and_split(pdf_file_path)
+
+
+def extract_and_split(pdf_file_path, backend=None):
+    """Extract the text of one PDF page by page and split it into paragraphs.
+
+    Splitting holds about a page of text at a time, but all of the file's
+    paragraphs are returned together, so the result holds the file's text.
+    """
+    started = time.perf_counter()
+    result = {
+        "file_name": os.path.basename(pdf_file_path),
+        "file_path": pdf_file_path,
+        "file_size": 0,
+        "pages": 0,
+        "paragraphs": [],
+        "chunk_hashes": [],
+        "chunk_pages": [],
+        "skipped_pages": [],
+        "extractor": None,
+        "error": None,
+        "text_seconds": 0.0,
+        "split_seconds": 0.0,
+    }
+
+    try:
+        result["file_size"] = os.path.getsize(pdf_file_path)
+        result["extractor"] = backend = backend or get_backend()
+
+        # Time spent in the backend versus the splitter, measured around each page handed over
+        def timed_pages():
+            pages = iter_pages(pdf_file_path, backend, skipped=result["skipped_pages"])
+            while True:
+                page_started = time.perf_counter()
+                try:
+                    page = next(pages)
+                except StopIteration:
+                    result["text_seconds"] += time.perf_counter() - page_started
+                    return
+                result["text_seconds"] += time.perf_counter() - page_started
+                result["pages"] += 1
+                yield page
+
+        paragraphs = []
+        for chunk, first_page, last_page in split_pages(timed_pages()):
+            paragraphs.append(chunk)
+            result["chunk_pages"].append((first_page, last_page))
+        result["pages"] += len(result["skipped_pages"])
+        result["split_seconds"] = time.perf_counter() - started - result["text_seconds"]
+
+        if paragraphs:
+            result["paragraphs"] = paragraphs
+            result["chunk_hashes"] = hash_chunks(paragraphs)
+        elif result["skipped_pages"] and result["skipped_pages"] == list(range(1, result["pages"] + 1)):
+            result["error"] = "No page could be extracted"
+        else:
+            result["error"] = "No extractable text found"
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["extract_seconds"] = time.perf_counter() - started
+    return result
@@ -0,0 +1,347 @@
+"""Parallel PDF ingestion: worker processes extract and split, a single writer stores chunks.
+
+Ingestion is incremental. Files are identified by name and fingerprinted by
+the SHA-256 of their bytes, and chunk IDs are derived from each chunk's
+content hash, so re-uploading a file is skipped outright and a revised file
+only embeds the chunks that actually changed.
+"""
+import hashlib
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import documents
+import metrics
+import store
+from config import INGEST_BATCH_SIZE, INGEST_WORKERS, PDF_FILE_TIMEOUT
+from answer_cache import get_answer_cache
+from extract import extract_in_worker, hash_file, init_worker
+from lexical import get_lexical_index
+from manifest import get_manifest
+from tenants import tenant_of
+
+
+def start_pool(workers, started):
+    """A new extraction pool whose workers put ``(index, pid, start time)`` on ``started`` for each file.
+
+    Each batch gets its own pool, so a worker killed for overrunning its
+    deadline takes down nothing but that batch's pool.
+    """
+    # Spawned workers re-run the launch script, which imports nothing (see app.py), and then
+    # only what the extraction functions need: extract.py, not the store or the UI
+    return ProcessPoolExecutor(
+        max_workers=max(1, workers),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(started,)
+    )
+
+
+def file_key(file_name):
+    """Stable ID prefix for the chunks of one source file"""
+    return hashlib.md5(file_name.encode()).hexdigest()[:8]
+
+
+def _indexed_chunk_ids(collection, file_name):
+    """IDs currently stored for a file, from the manifest or (for older stores) the collection"""
+    entry = get_manifest(tenant_of(collection)).get(file_name)
+    if entry is not None:
+        return entry["chunk_ids"]
+    try:
+        return collection.get(where={"source_file": file_name}, include=[])["ids"]
+    except Exception:
+        return []
+
+
+def store_paragraphs(collection, extracted, batch_size=INGEST_BATCH_SIZE):
+    """Bring the collection in line with one file's paragraphs.
+
+    Only chunks whose content hash is new are embedded; chunks that are
+    already stored just get their metadata refreshed, and chunks the file no
+    longer contains are deleted. A file stays in the shard it was first
+    stored in. Returns ``(added, kept, deleted, seconds)``.
+    """
+    started = time.perf_counter()
+    file_name = extracted["file_name"]
+    paragraphs = extracted["paragraphs"]
+
+    # Chunk IDs are derived from the file name and each chunk's content hash
+    prefix = file_key(file_name)
+    paragraph_ids = [f"{prefix}_{chunk_hash}" for chunk_hash in extracted["chunk_hashes"]]
+
+    # Prepare metadata for each paragraph, including the pages it came from
+    chunk_pages = extracted.get("chunk_pages") or [(None, None)] * len(paragraphs)
+    metadatas = [
+        {
+            "source_file": file_name,
+            "file_size": extracted["file_size"],
+            "paragraph_index": j,
+            "total_paragraphs": len(paragraphs),
+            "file_path": extracted["file_path"],
+            "content_hash": extracted["content_hash"]
+        }
+        for j in range(len(paragraphs))
+    ]
+    for metadata, (first_page, last_page) in zip(metadatas, chunk_pages):
+        if first_page is not None:
+            metadata["page"] = first_page
+            metadata["page_end"] = last_page
+
+    with store.write_lock():
+        manifest = get_manifest(tenant_of(collection))
+        entry = manifest.get(file_name)
+        shard = collection.shard(entry.get("shard")) if entry is not None else \
+            collection.writable_shard(len(paragraphs))
+        existing_ids = set(_indexed_chunk_ids(collection, file_name))
+        new_positions = [j for j, chunk_id in enumerate(paragraph_ids) if chunk_id not in existing_ids]
+        kept_positions = [j for j, chunk_id in enumerate(paragraph_ids) if chunk_id in existing_ids]
+        orphan_ids = list(existing_ids.difference(paragraph_ids))
+
+        with metrics.timed("chroma_delete"):
+            for start in range(0, len(orphan_ids), batch_size):
+                shard.delete(ids=orphan_ids[start:start + batch_size])
+
+        # Unchanged chunks keep their embeddings; only positional metadata moves
+        with metrics.timed("chroma_update"):
+            for start in range(0, len(kept_positions), batch_size):
+                batch = kept_positions[start:start + batch_size]
+                shard.update(
+                    ids=[paragraph_ids[j] for j in batch],
+                    metadatas=[metadatas[j] for j in batch]
+                )
+
+        # Includes embedding the new chunks
+        with metrics.timed("chroma_add"):
+            for start in range(0, len(new_positions), batch_size):
+                batch = new_positions[start:start + batch_size]
+                shard.upsert(
+                    documents=[paragraphs[j] for j in batch],
+                    ids=[paragraph_ids[j] for j in batch],
+                    metadatas=[metadatas[j] for j in batch]
+                )
+
+        # Keep the BM25 index in step with the collection. It is saved once per batch, so after a crash it can
+        # lack chunks the collection already has: index every chunk it is missing, not only the new ones
+        with metrics.timed("bm25_index"):
+            lexical_index = get_lexical_index(collection)
+            lexical_index.remove_many(orphan_ids)
+            unindexed = [j for j, chunk_id in enumerate(paragraph_ids) if chunk_id not in lexical_index]
+            lexical_index.add_many(
+                [paragraph_ids[j] for j in unindexed],
+                [paragraphs[j] for j in unindexed]
+            )
+
+        # Answers built from this file's previous chunks may no longer hold
+        if existing_ids:
+            get_answer_cache().invalidate_chunks(existing_ids)
+
+        manifest.record(
+            file_name,
+            extracted["content_hash"],
+            extracted["file_size"],
+            paragraph_ids,
+            pages=extracted["pages"],
+            shard=shard.name
+        )
+
+        # Document-level centroid for hierarchical retrieval
+        with metrics.timed("document_index"):
+            documents.update_document(collection, file_name, paragraph_ids, extracted["pages"])
+
+    metrics.inc("chunks_ingested", len(new_positions))
+    metrics.inc("chunks_deleted", len(orphan_ids))
+    return len(new_positions), len(kept_positions), len(orphan_ids), time.perf_counter() - started
+
+
+def delete_documents(file_names, collection):
+    """Remove every chunk of the given source files from the collection; returns ``{file_name: chunks_deleted}``
+
+    There is deliberately no default collection: a caller whose tenant has none
+    must not end up deleting from the default tenant's.
+    """
+    deleted = {}
+    manifest = get_manifest(tenant_of(collection))
+    with store.write_lock():
+        lexical_index = get_lexical_index(collection)
+        for file_name in file_names:
+            chunk_ids = _indexed_chunk_ids(collection, file_name)
+            # One filtered delete per file instead of one call per chunk batch
+            collection.delete(where={"source_file": file_name})
+            lexical_index.remove_many(chunk_ids)
+            get_answer_cache().invalidate_chunks(chunk_ids)
+            manifest.remove(file_name)
+            deleted[file_name] = len(chunk_ids)
+            metrics.inc("chunks_deleted", len(chunk_ids))
+        documents.remove_documents(collection, file_names)
+        lexical_index.save()
+        manifest.save()
+    collection.refresh()
+    store.refresh_collection(documents.collection_name(tenant_of(collection)))
+    return deleted
+
+
+def _failed_result(path, error):
+    """Result record for a file that could not be extracted"""
+    return {"file_name": os.path.basename(path), "file_path": path, "file_size": 0, "pages": 0,
+            "paragraphs": [], "chunk_hashes": [], "error": error, "extract_seconds": 0.0}
+
+
+def _skipped_result(path, file_name, content_hash, entry, started):
+    """Result record for a file whose bytes match what is already indexed"""
+    elapsed = time.perf_counter() - started
+    return {
+        "file_name": file_name,
+        "file_path": path,
+        "file_size": entry["file_size"],
+        "pages": entry.get("pages", 0),
+        "paragraphs": [],
+        "chunk_hashes": [],
+        "content_hash": content_hash,
+        "error": None,
+        "status": "unchanged",
+        "chunks_added": 0,
+        "chunks_kept": len(entry["chunk_ids"]),
+        "chunks_deleted": 0,
+        "extract_seconds": elapsed,
+        "store_seconds": 0.0,
+        "elapsed_seconds": elapsed,
+    }
+
+
+def ingest_files(pdf_files, collection=None, progress=None):
+    """Extract changed files in the worker pool and store them as they finish.
+
+    Files whose content hash matches the manifest are reported as
+    ``"unchanged"`` without being extracted. Yields ``(index, result)`` in
+    completion order, where ``index`` is the 1-based position in
+    ``pdf_files`` and ``result`` is the extraction record extended with
+    ``status`` (``"added"``, ``"updated"`` or ``"unchanged"``), chunk counts
+    and ``store_seconds`` / ``elapsed_seconds``.
+
+    ``progress``, if given, is called as ``progress(index, stage)`` when a
+    file enters the ``"hashing"``, ``"extracting"`` or ``"storing"`` stage.
+    """
+    def report(index, stage):
+        if progress is not None:
+            progress(index, stage)
+
+    if collection is None:
+        collection = store.get_tenant_collection(create=True)
+
+    manifest = get_manifest(tenant_of(collection))
+    pending = {}
+    futures = {}
+    pool = None
+    start_reports = None
+    running = {}  # index -> (pid, start time) of the files the current pool's workers have taken
+    try:
+        for i, path in enumerate(pdf_files, 1):
+            started = time.perf_counter()
+            file_name = os.path.basename(path)
+            report(i, "hashing")
+            try:
+                content_hash = hash_file(path)
+            except OSError as e:
+                metrics.inc("files_ingested", status="failed")
+                yield i, {"file_name": file_name, "file_path": path, "file_size": 0, "pages": 0,
+                          "paragraphs": [], "error": str(e), "status": "failed",
+                          "extract_seconds": 0.0, "store_seconds": 0.0, "elapsed_seconds": 0.0}
+                continue
+
+            entry = manifest.get(file_name)
+            if entry is not None and entry["content_hash"] == content_hash:
+                metrics.inc("files_ingested", status="unchanged")
+                yield i, _skipped_result(path, file_name, content_hash, entry, started)
+                continue
+            pending[i] = (content_hash, entry is not None)
+
+        def submit(indexes):
+            nonlocal pool, start_reports
+            start_reports = multiprocessing.get_context("spawn").SimpleQueue()
+            pool = start_pool(min(INGEST_WORKERS, len(indexes)), start_reports)
+            running.clear()
+            for i in indexes:
+                futures[pool.submit(extract_in_worker, pdf_files[i - 1], i)] = i
+
+        if pending:
+            submit(list(pending))
+        for i in pending:
+            report(i, "extracting")
+
+        # A file gets PDF_FILE_TIMEOUT seconds from when a worker takes it. An overrunning worker is killed,
+        # which breaks this batch's pool; the files it still held are extracted again by a new one
+        poll = min(1.0, PDF_FILE_TIMEOUT) if PDF_FILE_TIMEOUT > 0 else None
+        timed_out = set()
+        while futures:
+            done, _ = wait(futures, timeout=poll, return_when=FIRST_COMPLETED)
+            while not start_reports.empty():
+                index, pid, at = start_reports.get()
+                running[index] = (pid, at)
+            overdue = [index for future, index in futures.items() if not future.done() and index in running
+                       and time.time() - running[index][1] > PDF_FILE_TIMEOUT] if poll else []
+            for index in overdue:
+                os.kill(running[index][0], getattr(signal, "SIGKILL", signal.SIGTERM))
+                timed_out.add(index)
+            if overdue:
+                # Every file of the broken pool now ends, most of them with BrokenProcessPool
+                done, _ = wait(futures)
+
+            retry = []
+            for future in done:
+                index = futures.pop(future)
+                content_hash, previously_indexed = pending[index]
+                path = pdf_files[index - 1]
+                if index in timed_out:
+                    result = _failed_result(path, f"Extraction took longer than {PDF_FILE_TIMEOUT:g}s")
+                else:
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        if not overdue:
+                            raise
+                        retry.append(index)
+                        continue
+                    except Exception as e:
+                        result = _failed_result(path, str(e))
+
+                result["content_hash"] = content_hash
+                result["status"] = "failed"
+                result["store_seconds"] = 0.0
+                if result["error"] is None:
+                    report(index, "storing")
+                    try:
+                        added, kept, deleted, store_seconds = store_paragraphs(collection, result)
+                        result.update(
+                            status="updated" if previously_indexed else "added",
+                            chunks_added=added,
+                            chunks_kept=kept,
+                            chunks_deleted=deleted,
+                            store_seconds=store_seconds
+                        )
+                    except Exception as e:
+                        result["error"] = str(e)
+                result["elapsed_seconds"] = result["extract_seconds"] + result["store_seconds"]
+                # Extraction ran in a worker process, so its timings are recorded here
+                metrics.observe("extract_text", result.get("text_seconds", 0.0))
+                metrics.observe("split_text", result.get("split_seconds", 0.0))
+                if result["store_seconds"]:
+                    metrics.observe("store_file", result["store_seconds"])
+                metrics.inc("files_ingested", status=result["status"])
+                yield index, result
+            if overdue:
+                pool.shutdown()
+                if retry:
+                    submit(retry)
+    finally:
+        for future in futures:
+            future.cancel()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        # Readers pick up a fresh handle after the writes
+        collection.refresh()
+        store.refresh_collection(documents.collection_name(tenant_of(collection)))
+        get_lexical_index(collection).save()
+        manifest.save()
@@ -0,0 +1,208 @@
+"""Persistent background queue for PDF ingestion.
+
+Uploads are copied into a spool directory and recorded as a job in SQLite, so
+a worker thread can ingest them outside the Gradio request. The app starts
+the workers at launch (``ui.start_services``), so a restart resumes whatever
+was queued or running. Submitting the same set of files while an earlier
+job for them is still pending returns that job instead of queueing a second
+one. Each job records the tenant whose collection it ingests into.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+import ingest
+import store
+from config import JOB_WORKERS, JOBS_DB_PATH, JOBS_SPOOL_DIR
+from extract import hash_file
+from tenants import DEFAULT_TENANT
+
+# Result fields kept per file in the job record
+_RESULT_FIELDS = ("status", "error", "file_size", "pages", "skipped_pages", "chunks_added", "chunks_kept",
+                  "chunks_deleted", "elapsed_seconds")
+
+
+class JobQueue:
+    """SQLite-backed ingestion jobs processed by a small pool of worker threads"""
+
+    def __init__(self, path=JOBS_DB_PATH, spool_dir=JOBS_SPOOL_DIR, workers=JOB_WORKERS):
+        self.spool_dir = spool_dir
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads = []
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, status TEXT NOT NULL,"
+            " files TEXT NOT NULL, error TEXT, created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created)")
+        # Queues created before tenants existed belong to the default tenant
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if "tenant" not in columns:
+            self._conn.execute(f"ALTER TABLE jobs ADD COLUMN tenant TEXT NOT NULL DEFAULT '{DEFAULT_TENANT}'")
+        self._conn.commit()
+
+    def start(self):
+        """Requeue jobs interrupted by a restart and start the workers"""
+        with self._lock:
+            if self._threads:
+                return
+            self._conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+            self._conn.commit()
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"ingest-job-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, pdf_files, tenant=DEFAULT_TENANT):
+        """Queue files for a tenant's ingestion and return the job ID (an existing one for duplicates)"""
+        files = []
+        for path in pdf_files:
+            name = os.path.basename(path)
+            entry = {"name": name, "stage": "queued"}
+            if not name.lower().endswith(".pdf"):
+                entry.update(stage="failed", status="failed", error="Not a PDF file")
+            else:
+                try:
+                    entry["content_hash"] = hash_file(path)
+                    entry["source"] = path
+                except OSError as e:
+                    entry.update(stage="failed", status="failed", error=str(e))
+            files.append(entry)
+
+        fingerprint = hashlib.sha256(json.dumps([tenant] + sorted(
+            (entry["name"], entry.get("content_hash", "")) for entry in files
+        )).encode()).hexdigest()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE fingerprint = ? AND status IN ('queued', 'running')",
+                (fingerprint,)
+            ).fetchone()
+            if row:
+                return row[0]
+
+            job_id = uuid.uuid4().hex[:12]
+            job_dir = os.path.join(self.spool_dir, job_id)
+            os.makedirs(job_dir, exist_ok=True)
+            for n, entry in enumerate(files):
+                source = entry.pop("source", None)
+                if source is not None:
+                    # Keep a private copy so the job survives temp-file cleanup and restarts
+                    # (one directory per file: the file name is its identity in the index)
+                    file_dir = os.path.join(job_dir, str(n))
+                    os.makedirs(file_dir, exist_ok=True)
+                    entry["path"] = os.path.join(file_dir, entry["name"])
+                    shutil.copyfile(source, entry["path"])
+
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO jobs (id, fingerprint, status, files, created, updated, tenant) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, fingerprint, json.dumps(files), now, now, tenant)
+            )
+            self._conn.commit()
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        """Job record as a dict, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, files, error, created, updated, tenant FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, limit=20):
+        """Most recent jobs first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, status, files, error, created, updated, tenant FROM jobs ORDER BY created DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    @staticmethod
+    def _to_dict(row):
+        job_id, status, files, error, created, updated, tenant = row
+        return {"id": job_id, "status": status, "files": json.loads(files), "error": error,
+                "created": created, "updated": updated, "tenant": tenant}
+
+    def _update(self, job_id, files=None, status=None, error=None):
+        with self._lock:
+            if files is not None:
+                self._conn.execute("UPDATE jobs SET files = ?, updated = ? WHERE id = ?",
+                                   (json.dumps(files), time.time(), job_id))
+            if status is not None:
+                self._conn.execute("UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                                   (status, error, time.time(), job_id))
+            self._conn.commit()
+
+    def _claim(self):
+        """Mark the oldest queued job running and return it, waiting until there is one"""
+        with self._lock:
+            while True:
+                row = self._conn.execute(
+                    "SELECT id, status, files, error, created, updated, tenant FROM jobs "
+                    "WHERE status = 'queued' ORDER BY created LIMIT 1"
+                ).fetchone()
+                if row:
+                    self._conn.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ?",
+                                       (time.time(), row[0]))
+                    self._conn.commit()
+                    return self._to_dict(row)
+                self._wakeup.wait(timeout=5)
+
+    def _work(self):
+        while True:
+            job = self._claim()
+            try:
+                self._run(job)
+                self._update(job["id"], status="done")
+                shutil.rmtree(os.path.join(self.spool_dir, job["id"]), ignore_errors=True)
+            except Exception as e:
+                self._update(job["id"], status="failed", error=str(e))
+
+    def _run(self, job):
+        files = job["files"]
+        # Files finished before an interruption are not processed again
+        todo = [n for n, entry in enumerate(files) if entry["stage"] not in ("done", "failed")]
+        paths = [files[n]["path"] for n in todo]
+
+        def progress(index, stage):
+            files[todo[index - 1]]["stage"] = stage
+            self._update(job["id"], files=files)
+
+        collection = store.get_tenant_collection(job["tenant"], create=True)
+        for index, result in ingest.ingest_files(paths, collection, progress=progress):
+            entry = files[todo[index - 1]]
+            entry.update({field: result.get(field) for field in _RESULT_FIELDS})
+            entry["paragraphs"] = len(result["paragraphs"]) or result.get("chunks_kept", 0)
+            entry["stage"] = "failed" if result["error"] else "done"
+            self._update(job["id"], files=files)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Return the process-wide job queue, starting its workers on first use"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+            _queue.start()
+        return _queue
@@ -0,0 +1,173 @@
+"""BM25 inverted index over the stored chunks, for exact-term matches dense search misses.
+
+The index lives in memory and is persisted as JSON next to the vector store.
+Ingestion adds and removes chunks incrementally and saves once per batch; a
+store that predates the index is indexed from the collection on first use.
+"""
+import heapq
+import json
+import math
+import os
+import re
+import threading
+
+from config import BM25_B, BM25_INDEX_PATH, BM25_K1
+from tenants import state_path, tenant_of
+
+# Keep identifiers such as "BRCA1", "p53", "eq.3" or "il-6" as single terms
+_TOKEN_RE = re.compile(r"\w+(?:[.\-]\w+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were with".split()
+)
+
+
+def tokenize(text):
+    """Lower-cased terms of a text, without stopwords"""
+    return [term for term in _TOKEN_RE.findall(text.lower()) if term not in STOPWORDS]
+
+
+class BM25Index:
+    """Incremental Okapi BM25 index keyed by chunk ID"""
+
+    def __init__(self, path=BM25_INDEX_PATH, k1=BM25_K1, b=BM25_B):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.postings = {}    # term -> {chunk_id: term frequency}
+        self.doc_terms = {}   # chunk_id -> distinct terms, for removal
+        self.doc_lengths = {}
+        self.total_length = 0
+        self.dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self.doc_lengths
+
+    def add(self, chunk_id, text):
+        """Index (or re-index) one chunk"""
+        terms = tokenize(text)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        with self._lock:
+            if chunk_id in self.doc_lengths:
+                self._remove(chunk_id)
+            for term, count in counts.items():
+                self.postings.setdefault(term, {})[chunk_id] = count
+            self.doc_terms[chunk_id] = list(counts)
+            self.doc_lengths[chunk_id] = len(terms)
+            self.total_length += len(terms)
+            self.dirty = True
+
+    def add_many(self, chunk_ids, texts):
+        for chunk_id, text in zip(chunk_ids, texts):
+            self.add(chunk_id, text)
+
+    def _remove(self, chunk_id):
+        for term in self.doc_terms.pop(chunk_id, ()):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(chunk_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(chunk_id, 0)
+
+    def remove_many(self, chunk_ids):
+        """Drop chunks from the index"""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                if chunk_id in self.doc_lengths:
+                    self._remove(chunk_id)
+                    self.dirty = True
+
+    def search(self, query, k=10, allowed=None):
+        """Return up to k ``(chunk_id, score)`` pairs, best first, optionally only IDs where ``allowed(id)``"""
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self.doc_lengths)
+            if not n_docs or not terms:
+                return []
+            average_length = self.total_length / n_docs
+            scores = {}
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for chunk_id, tf in posting.items():
+                    if allowed is not None and not allowed(chunk_id):
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def save(self):
+        """Write the index to disk if it changed"""
+        with self._lock:
+            if not self.dirty:
+                return
+            state = {
+                "postings": self.postings,
+                "doc_lengths": self.doc_lengths,
+            }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def load(self):
+        """Read the index from disk; returns False if there is none"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        with self._lock:
+            self.postings = state["postings"]
+            self.doc_lengths = state["doc_lengths"]
+            self.total_length = sum(self.doc_lengths.values())
+            self.doc_terms = {}
+            for term, posting in self.postings.items():
+                for chunk_id in posting:
+                    self.doc_terms.setdefault(chunk_id, []).append(term)
+            self.dirty = False
+        return True
+
+    def rebuild(self, collection, batch_size=1000):
+        """Index every chunk currently in the collection"""
+        with self._lock:
+            self.postings, self.doc_terms, self.doc_lengths = {}, {}, {}
+            self.total_length = 0
+            offset = 0
+            while True:
+                page = collection.get(include=["documents"], limit=batch_size, offset=offset)
+                if not page["ids"]:
+                    break
+                self.add_many(page["ids"], page["documents"])
+                offset += len(page["ids"])
+            self.dirty = True
+            self.save()
+
+
+_indexes = {}
+_index_lock = threading.Lock()
+
+
+def get_lexical_index(collection=None, tenant=None):
+    """Return a tenant's BM25 index (by default the collection's tenant), loading or building it on first use"""
+    tenant = tenant or tenant_of(collection)
+    with _index_lock:
+        index = _indexes.get(tenant)
+        if index is None:
+            index = BM25Index(state_path(BM25_INDEX_PATH, tenant))
+            if not index.load() and collection is not None and collection.count():
+                index.rebuild(collection)
+            _indexes[tenant] = index
+        return index
@@ -0,0 +1,346 @@
+"""Anura API (OpenAI-compatible) calls used to analyse search results.
+
+Clients are pooled per API key so their HTTP connections are reused across
+requests; each call leases one, and a client evicted from the pool is closed
+by its last user. Async variants let handlers await a call without holding a
+thread. Every call is bounded by a timeout, transient failures are retried
+with jittered exponential backoff, and a process-wide semaphore caps the
+number of calls in flight so a slow upstream cannot tie up every worker.
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+
+import metrics
+from config import (
+    ANURA_BASE_URL,
+    ANURA_MODEL,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+    LLM_CLIENT_POOL_SIZE,
+    LLM_CONNECT_TIMEOUT,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT,
+)
+from context import estimate_tokens
+
+SYSTEM_PROMPT = "You are a helpful AI research assistant. Analyze the search results and provide insights, summaries, or answer questions based on the context provided."
+
+# Appended to a streamed answer that was cut off part way
+INTERRUPTED_MARKER = "[Response interrupted:"
+
+
+def _openai():
+    """The openai package, imported on first use since importing it is slow"""
+    import openai
+    return openai
+
+
+def transient_errors():
+    """Errors worth retrying: the request may succeed if sent again"""
+    openai = _openai()
+    return (
+        openai.APIConnectionError,  # includes APITimeoutError
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+_pool_lock = threading.Lock()
+_clients = OrderedDict()
+_async_clients = OrderedDict()
+_slots = threading.BoundedSemaphore(max(1, LLM_MAX_CONCURRENCY))
+
+
+class LLMBusyError(Exception):
+    """Raised when no concurrency slot frees up within the timeout"""
+
+
+def _timeout():
+    return httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+
+class _Lease:
+    """A pooled client and the number of calls using it"""
+
+    def __init__(self, client):
+        self.client = client
+        self.users = 0
+        self.evicted = False
+
+
+def _checkout(clients, factory, anura_api_key):
+    """Lease the pooled client for a key; also returns evicted clients nobody is using, for the caller to close"""
+    key = hashlib.sha256(anura_api_key.encode()).hexdigest()
+    idle = []
+    with _pool_lock:
+        lease = clients.get(key)
+        if lease is None:
+            lease = clients[key] = _Lease(factory(
+                base_url=ANURA_BASE_URL,
+                api_key=anura_api_key,
+                timeout=_timeout(),
+                max_retries=0  # retries are handled here, with jitter
+            ))
+        else:
+            clients.move_to_end(key)
+        lease.users += 1
+        while len(clients) > LLM_CLIENT_POOL_SIZE:
+            evicted = clients.popitem(last=False)[1]
+            evicted.evicted = True
+            if not evicted.users:
+                idle.append(evicted.client)
+    return lease, idle
+
+
+def _checkin(lease):
+    """End a lease; True when its client was evicted and this was its last user, who must close it"""
+    with _pool_lock:
+        lease.users -= 1
+        return lease.evicted and not lease.users
+
+
+@contextmanager
+def get_client(anura_api_key):
+    """Lease the pooled synchronous client for an API key for one call (use as a context manager).
+
+    An evicted client is closed by its last user, never under a call in flight.
+    """
+    lease, idle = _checkout(_clients, _openai().OpenAI, anura_api_key)
+    for client in idle:
+        client.close()
+    try:
+        yield lease.client
+    finally:
+        if _checkin(lease):
+            lease.client.close()
+
+
+@asynccontextmanager
+async def get_async_client(anura_api_key):
+    """Lease the pooled asynchronous client for an API key, like ``get_client``"""
+    lease, idle = _checkout(_async_clients, _openai().AsyncOpenAI, anura_api_key)
+    for client in idle:
+        await client.close()
+    try:
+        yield lease.client
+    finally:
+        if _checkin(lease):
+            await lease.client.close()
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff delay for a retry attempt (0-based)"""
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _acquire_slot():
+    if not _slots.acquire(timeout=LLM_TIMEOUT):
+        raise LLMBusyError(f"more than {LLM_MAX_CONCURRENCY} LLM requests in flight")
+
+
+async def _acquire_slot_async():
+    # Poll rather than block so waiting never occupies a thread
+    deadline = time.monotonic() + LLM_TIMEOUT
+    delay = 0.005
+    while not _slots.acquire(blocking=False):
+        if time.monotonic() >= deadline:
+            raise LLMBusyError(f"more than {LLM_MAX_CONCURRENCY} LLM requests in flight")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.1)
+
+
+def _messages(prompt):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _record_tokens(prompt, text, usage=None):
+    """Count prompt and completion tokens, estimating them when the server reports no usage"""
+    if usage is not None and getattr(usage, "completion_tokens", None) is not None:
+        metrics.inc("llm_tokens", usage.prompt_tokens or 0, kind="prompt")
+        metrics.inc("llm_tokens", usage.completion_tokens, kind="completion")
+    else:
+        metrics.inc("llm_tokens", estimate_tokens(prompt), kind="prompt")
+        metrics.inc("llm_tokens", estimate_tokens(text or ""), kind="completion")
+
+
+def _record_error(e):
+    metrics.inc("llm_errors", kind=type(e).__name__)
+
+
+def _complete(client, prompt):
+    """Run one completion with retries; raises the last error if every attempt fails"""
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            completion = client.chat.completions.create(
+                model=ANURA_MODEL,
+                messages=_messages(prompt)
+            )
+            content = completion.choices[0].message.content
+            _record_tokens(prompt, content, getattr(completion, "usage", None))
+            return content
+        except transient_errors():
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            metrics.inc("llm_retries")
+            time.sleep(_backoff(attempt))
+
+
+def call_anura_api(prompt, anura_api_key):
+    """Call Anura API to enhance search results with LLM analysis"""
+    if not anura_api_key or not anura_api_key.strip():
+        return None
+
+    try:
+        with metrics.timed("llm_call"):
+            _acquire_slot()
+            try:
+                with get_client(anura_api_key) as client:
+                    return _complete(client, prompt)
+            finally:
+                _slots.release()
+    except Exception as e:
+        _record_error(e)
+        return f"Error calling Anura API: {str(e)}"
+
+
+def stream_anura_api(prompt, anura_api_key):
+    """Call Anura API in streaming mode, yielding text deltas as they arrive.
+
+    Errors follow ``call_anura_api``: a failure before any text yields a single
+    ``"Error calling Anura API: ..."`` chunk, a failure mid-stream yields a
+    trailing note instead. Only failures before the first token are retried.
+    """
+    if not anura_api_key or not anura_api_key.strip():
+        return
+
+    received = False
+    started = time.perf_counter()
+    parts = []
+    try:
+        _acquire_slot()
+        try:
+            with get_client(anura_api_key) as client:
+                for attempt in range(LLM_MAX_RETRIES + 1):
+                    try:
+                        stream = client.chat.completions.create(
+                            model=ANURA_MODEL,
+                            messages=_messages(prompt),
+                            stream=True
+                        )
+                        for chunk in stream:
+                            if not chunk.choices:
+                                continue
+                            delta = chunk.choices[0].delta.content
+                            if delta:
+                                if not received:
+                                    metrics.observe("llm_first_token", time.perf_counter() - started)
+                                received = True
+                                parts.append(delta)
+                                yield delta
+                        metrics.observe("llm_stream", time.perf_counter() - started)
+                        _record_tokens(prompt, "".join(parts))
+                        return
+                    except transient_errors():
+                        if received or attempt == LLM_MAX_RETRIES:
+                            raise
+                        metrics.inc("llm_retries")
+                        time.sleep(_backoff(attempt))
+        finally:
+            _slots.release()
+    except Exception as e:
+        _record_error(e)
+        if received:
+            yield f"\n\n{INTERRUPTED_MARKER} {str(e)}]"
+        else:
+            yield f"Error calling Anura API: {str(e)}"
+
+
+
+async def acall_anura_api(prompt, anura_api_key):
+    """Async variant of ``call_anura_api`` for handlers that await instead of blocking a thread"""
+    if not anura_api_key or not anura_api_key.strip():
+        return None
+
+    started = time.perf_counter()
+    try:
+        await _acquire_slot_async()
+        try:
+            async with get_async_client(anura_api_key) as client:
+                for attempt in range(LLM_MAX_RETRIES + 1):
+                    try:
+                        completion = await client.chat.completions.create(
+                            model=ANURA_MODEL,
+                            messages=_messages(prompt)
+                        )
+                        content = completion.choices[0].message.content
+                        _record_tokens(prompt, content, getattr(completion, "usage", None))
+                        return content
+                    except transient_errors():
+                        if attempt == LLM_MAX_RETRIES:
+                            raise
+                        metrics.inc("llm_retries")
+                        await asyncio.sleep(_backoff(attempt))
+        finally:
+            _slots.release()
+            metrics.observe("llm_call", time.perf_counter() - started)
+    except Exception as e:
+        _record_error(e)
+        return f"Error calling Anura API: {str(e)}"
+
+
+async def astream_anura_api(prompt, anura_api_key):
+    """Async variant of ``stream_anura_api``, with the same retries and error chunks"""
+    if not anura_api_key or not anura_api_key.strip():
+        return
+
+    received = False
+    started = time.perf_counter()
+    parts = []
+    try:
+        await _acquire_slot_async()
+        try:
+            async with get_async_client(anura_api_key) as client:
+                for attempt in range(LLM_MAX_RETRIES + 1):
+                    try:
+                        stream = await client.chat.completions.create(
+                            model=ANURA_MODEL,
+                            messages=_messages(prompt),
+                            stream=True
+                        )
+                        async for chunk in stream:
+                            if not chunk.choices:
+                                continue
+                            delta = chunk.choices[0].delta.content
+                            if delta:
+                                if not received:
+                                    metrics.observe("llm_first_token", time.perf_counter() - started)
+                                received = True
+                                parts.append(delta)
+                                yield delta
+                        metrics.observe("llm_stream", time.perf_counter() - started)
+                        _record_tokens(prompt, "".join(parts))
+                        return
+                    except transient_errors():
+                        if received or attempt == LLM_MAX_RETRIES:
+                            raise
+                        metrics.inc("llm_retries")
+                        await asyncio.sleep(_backoff(attempt))
+        finally:
+            _slots.release()
+    except Exception as e:
+        _record_error(e)
+        if received:
+            yield f"\n\n{INTERRUPTED_MARKER} {str(e)}]"
+        else:
+            yield f"Error calling Anura API: {str(e)}"
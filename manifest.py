@@ -0,0 +1,106 @@
+"""Persistent record of which files are indexed, by content hash and chunk IDs"""
+import json
+import os
+import threading
+import time
+
+from config import MANIFEST_PATH
+from tenants import DEFAULT_TENANT, state_path
+
+
+class Manifest:
+    """JSON-backed map of source file name to its indexed state.
+
+    Each entry holds ``content_hash``, ``file_size``, ``chunk_ids`` and
+    ``ingested_at``. Changes are kept in memory until ``save``, which
+    ingestion calls once per batch; writes go to a temporary file and are
+    renamed into place so a crash never leaves a half-written manifest. Files
+    stored after the last save are found in the collection by name instead.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._entries = None
+        self.dirty = False
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def save(self):
+        """Write the manifest to disk if it changed"""
+        with self._lock:
+            if not self.dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def get(self, file_name):
+        """Return the entry for a file, or None if it has never been indexed"""
+        with self._lock:
+            return self._load().get(file_name)
+
+    def entries(self):
+        """Return a snapshot of every entry"""
+        with self._lock:
+            return dict(self._load())
+
+    def record(self, file_name, content_hash, file_size, chunk_ids, **extra):
+        """Store the indexed state of a file (in memory until ``save``)"""
+        with self._lock:
+            self._load()[file_name] = {
+                "content_hash": content_hash,
+                "file_size": file_size,
+                "chunk_ids": list(chunk_ids),
+                "ingested_at": time.time(),
+                **extra,
+            }
+            self.dirty = True
+
+    def catalog(self):
+        """Indexed documents for display: name, size, pages, chunk count and ingest time, by name"""
+        with self._lock:
+            entries = sorted(self._load().items())
+        return [
+            {
+                "source_file": file_name,
+                "file_size": entry.get("file_size", 0),
+                "pages": entry.get("pages"),
+                "chunks": len(entry.get("chunk_ids", ())),
+                "ingested_at": entry.get("ingested_at"),
+            }
+            for file_name, entry in entries
+        ]
+
+    def remove(self, file_name):
+        """Forget a file; returns its last entry, if any"""
+        with self._lock:
+            entry = self._load().pop(file_name, None)
+            if entry is not None:
+                self.dirty = True
+            return entry
+
+
+_manifests = {}
+_manifest_lock = threading.Lock()
+
+
+def get_manifest(tenant=DEFAULT_TENANT):
+    """Return the process-wide manifest of a tenant"""
+    with _manifest_lock:
+        manifest = _manifests.get(tenant)
+        if manifest is None:
+            manifest = _manifests[tenant] = Manifest(state_path(MANIFEST_PATH, tenant))
+        return manifest
@@ -0,0 +1,185 @@
+"""Bounded conversation memory for the RAG chat.
+
+Instead of pasting the last three full exchanges into every prompt, each chat
+session keeps a compact rolling summary of older turns plus the most recent
+exchange, with "Search Statistics" footers stripped and the whole block held
+under ``MEMORY_TOKEN_CAP`` tokens. The summary is folded forward by the LLM in
+a background thread; until that finishes, older turns are covered by a short
+extractive digest so a request never waits on it.
+"""
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from config import MEMORY_MAX_SESSIONS, MEMORY_SUMMARY_WORDS, MEMORY_TOKEN_CAP, QUERY_REWRITE
+from context import truncate_to_tokens
+from lexical import tokenize
+from llm import call_anura_api
+
+STATS_FOOTER = "\n\n---\n\n📊 **Search Statistics:**"
+
+# Words that usually mean a message leans on earlier turns
+_FOLLOW_UP_RE = re.compile(
+    r"^(and|also|what about|how about|why|so)\b|\b(it|its|they|them|their|this|that|these|those|he|she|his|her)\b",
+    re.IGNORECASE,
+)
+
+# Conversational words that carry no retrieval signal
+_FILLER = frozenset(
+    "what which who whom how does do did can could would should please tell me more about explain describe "
+    "give show us you i we my our there here about between relate related".split()
+)
+
+_summarizer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-memory")
+
+
+def strip_footer(text):
+    """Drop the statistics footer appended to assistant replies"""
+    return (text or "").split(STATS_FOOTER, 1)[0].strip()
+
+
+def _gist(text, max_tokens):
+    """First sentences of a text, up to max_tokens"""
+    text = " ".join(strip_footer(text).split())
+    return truncate_to_tokens(text, max_tokens)
+
+
+def extractive_summary(turns, max_tokens):
+    """Cheap digest of some turns: each question plus the opening of its answer"""
+    per_turn = max(16, max_tokens // max(1, len(turns)))
+    lines = [f"- Q: {_gist(user, per_turn // 3)} A: {_gist(assistant, per_turn)}" for user, assistant in turns]
+    return truncate_to_tokens("\n".join(lines), max_tokens)
+
+
+class ConversationMemory:
+    """Rolling summary of a chat session plus its most recent exchange"""
+
+    def __init__(self, token_cap=MEMORY_TOKEN_CAP):
+        self.token_cap = token_cap
+        self.summary = ""
+        self.covered_turns = 0  # turns folded into self.summary
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def context(self, history):
+        """Conversation context for the prompt, within the token cap"""
+        if not history:
+            return ""
+        older, recent = history[:-1], history[-1]
+        recent_budget = self.token_cap // 2
+
+        with self._lock:
+            summary, covered = self.summary, self.covered_turns
+        if covered > len(older):  # history was edited or cleared
+            summary, covered = "", 0
+
+        summary_budget = self.token_cap - recent_budget
+        if covered < len(older):
+            gap = extractive_summary(older[covered:], summary_budget)
+            summary = f"{summary}\n{gap}".strip() if summary else gap
+        summary = truncate_to_tokens(summary, summary_budget)
+
+        user_msg, assistant_msg = recent
+        recent_text = truncate_to_tokens(
+            f"User: {user_msg}\nAssistant: {strip_footer(assistant_msg)}", recent_budget
+        )
+
+        parts = ["\n\nPrevious conversation:"]
+        if summary:
+            parts.append(f"Summary of earlier discussion:\n{summary}")
+        parts.append(f"Most recent exchange:\n{recent_text}\n")
+        return "\n".join(parts)
+
+    def refresh_async(self, history, anura_api_key):
+        """Fold turns not yet in the summary (all but the latest) into it in the background"""
+        if not anura_api_key or len(history) < 2:
+            return
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return
+            if self.covered_turns > len(history) - 1:
+                self.summary, self.covered_turns = "", 0
+            if self.covered_turns >= len(history) - 1:
+                return
+            start, end = self.covered_turns, len(history) - 1
+            previous = self.summary
+            self._pending = _summarizer.submit(self._refresh, previous, history[start:end], end, anura_api_key)
+
+    def _refresh(self, previous, turns, covered_turns, anura_api_key):
+        exchanges = "\n\n".join(
+            f"User: {user}\nAssistant: {truncate_to_tokens(strip_footer(assistant), 400)}"
+            for user, assistant in turns
+        )
+        prompt = f"""
+Update the running summary of a research conversation with the new exchanges below.
+Keep the topics, documents, entities and conclusions that later questions may refer to.
+Answer with the updated summary only, in at most {MEMORY_SUMMARY_WORDS} words.
+
+Current summary:
+{previous or "(none)"}
+
+New exchanges:
+{exchanges}
+"""
+        summary = call_anura_api(prompt, anura_api_key)
+        if not summary or summary.startswith("Error"):
+            return
+        with self._lock:
+            # Skip if the chat was cleared or another refresh got further meanwhile
+            if self.covered_turns == covered_turns - len(turns):
+                self.summary = truncate_to_tokens(summary.strip(), self.token_cap - self.token_cap // 2)
+                self.covered_turns = covered_turns
+
+    def standalone_query(self, message, history, anura_api_key=None, mode=QUERY_REWRITE):
+        """Rewrite a follow-up message into a self-contained retrieval query"""
+        if mode == "off" or not history:
+            return message
+        previous_user = history[-1][0]
+
+        if mode == "llm" and anura_api_key:
+            prompt = f"""
+Rewrite the follow-up question as a standalone search query for a document index.
+Resolve pronouns and references using the conversation. Answer with the query only.
+
+Previous question: {previous_user}
+Previous answer (excerpt): {_gist(history[-1][1], 120)}
+Follow-up question: {message}
+"""
+            rewritten = call_anura_api(prompt, anura_api_key)
+            if rewritten and not rewritten.startswith("Error"):
+                return rewritten.strip().strip('"')
+            return message
+
+        # Heuristic: carry the previous question's key terms into short or referential follow-ups
+        message_terms = set(tokenize(message))
+        if len(message_terms) >= 3 and not _FOLLOW_UP_RE.search(message):
+            return message
+        carried = [term for term in dict.fromkeys(tokenize(previous_user))
+                   if term not in message_terms and term not in _FILLER and not _FOLLOW_UP_RE.fullmatch(term)]
+        return f"{message} {' '.join(carried[:8])}".strip() if carried else message
+
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def get_memory(session_id):
+    """Memory for a chat session (a throwaway one when there is no session)"""
+    if session_id is None:
+        return ConversationMemory()
+    with _sessions_lock:
+        memory = _sessions.get(session_id)
+        if memory is None:
+            memory = _sessions[session_id] = ConversationMemory()
+            while len(_sessions) > MEMORY_MAX_SESSIONS:
+                _sessions.popitem(last=False)
+        else:
+            _sessions.move_to_end(session_id)
+        return memory
+
+
+def forget(session_id):
+    """Drop a session's memory, e.g. when its chat is cleared"""
+    with _sessions_lock:
+        _sessions.pop(session_id, None)
@@ -0,0 +1,172 @@
+"""In-process latency and counter metrics with a Prometheus text endpoint.
+
+Stages are timed with ``timed(stage)``. Each stage keeps a sliding window of
+recent durations, from which p50/p95/p99 are reported as a Prometheus
+summary together with the all-time count and sum. Counters are keyed by name
+and labels. ``start_metrics_server`` serves everything at ``/metrics`` on its
+own port, next to the Gradio app; other modules can add endpoints there with
+``add_endpoint`` (warmup.py adds ``/ready`` and ``/live``).
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_PORT, METRICS_WINDOW
+
+PREFIX = "rag"
+QUANTILES = (0.5, 0.95, 0.99)
+
+logger = logging.getLogger(__name__)
+
+
+class LatencySummary:
+    """Sliding-window quantiles plus all-time count and sum for one stage"""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self._recent = deque(maxlen=max(1, window))
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self._recent.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self, quantiles=QUANTILES):
+        ordered = sorted(self._recent)
+        if not ordered:
+            return {q: 0.0 for q in quantiles}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in quantiles}
+
+
+_lock = threading.Lock()
+_latencies = {}
+_counters = {}
+_server = None
+_endpoints = {}
+
+
+def observe(stage, seconds):
+    """Record one duration for a stage"""
+    with _lock:
+        summary = _latencies.get(stage)
+        if summary is None:
+            summary = _latencies[stage] = LatencySummary()
+        summary.observe(seconds)
+
+
+@contextmanager
+def timed(stage, timings=None):
+    """Time the enclosed block as ``stage``; also adds it to ``timings`` (a per-request dict) if given"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe(stage, elapsed)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def inc(name, value=1, **labels):
+    """Add to a counter, e.g. ``inc("llm_errors", kind="timeout")``"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def snapshot():
+    """Current metrics as plain data: ``{"latency": {stage: {...}}, "counters": {...}}``"""
+    with _lock:
+        latency = {
+            stage: dict(count=summary.count, sum=summary.total,
+                        **{f"p{int(q * 100)}": value for q, value in summary.quantiles().items()})
+            for stage, summary in _latencies.items()
+        }
+        counters = dict(_counters)
+    return {"latency": latency, "counters": counters}
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        stages = sorted((stage, summary.quantiles(), summary.count, summary.total)
+                        for stage, summary in _latencies.items())
+        counters = sorted(_counters.items())
+
+    name = f"{PREFIX}_stage_latency_seconds"
+    lines = [f"# HELP {name} Latency of pipeline stages (quantiles over the last {METRICS_WINDOW} calls).",
+             f"# TYPE {name} summary"]
+    for stage, quantiles, count, total in stages:
+        for q, value in quantiles.items():
+            lines.append(f"{name}{_labels([('stage', stage), ('quantile', q)])} {value:.6f}")
+        lines.append(f"{name}_sum{_labels([('stage', stage)])} {total:.6f}")
+        lines.append(f"{name}_count{_labels([('stage', stage)])} {count}")
+
+    typed = set()
+    for (counter, labels), value in counters:
+        full_name = f"{PREFIX}_{counter}_total"
+        if full_name not in typed:
+            typed.add(full_name)
+            lines.append(f"# TYPE {full_name} counter")
+        lines.append(f"{full_name}{_labels(list(labels))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Forget all recorded metrics"""
+    with _lock:
+        _latencies.clear()
+        _counters.clear()
+
+
+def add_endpoint(path, handler):
+    """Serve ``handler()``, which returns ``(status, content_type, body)``, at ``path`` on the metrics port"""
+    _endpoints[path] = handler
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path in _endpoints:
+            status, content_type, body = _endpoints[path]()
+        elif path in ("/metrics", "/"):
+            status, content_type, body = 200, "text/plain; version=0.0.4; charset=utf-8", render()
+        else:
+            self.send_error(404)
+            return
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes would otherwise flood the console
+
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0"):
+    """Serve ``/metrics`` from a daemon thread; returns the server, or None if disabled or the port is taken"""
+    global _server
+    with _lock:
+        if _server is not None or not port:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning("Metrics endpoint disabled: cannot bind port %s (%s)", port, e)
+            return None
+        _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
@@ -0,0 +1,62 @@
+"""Prompt templates for the search enhancement and the RAG chat answer"""
+from retrieval import similarity_percent
+
+
+def build_enhancement_prompt(query, search_results_text):
+    """Prompt asking the LLM to analyse Document Search results"""
+    return f"""
+Based on the user's query: "{query}"
+
+And the following search results from documents:
+{search_results_text}
+
+Please provide:
+1. A concise summary of the key findings
+2. Direct answers to the user's question if possible
+3. Any insights or connections between the different search results
+4. Suggestions for further research if needed
+
+Format your response clearly with headers and bullet points where appropriate.
+"""
+
+
+def build_rag_prompt(message, conversation_context, passages, metric="l2"):
+    """Prompt for the RAG chat: packed context passages plus conversation memory (``metric`` scores the distances)"""
+    # Create comprehensive context for LLM
+    context_chunks = []
+    for passage in passages:
+        first, last = passage['first_paragraph'], passage['last_paragraph']
+        para_index = 'N/A' if first is None else (first if first == last else f"{first}-{last}")
+        first_page, last_page = passage.get('pages') or (None, None)
+        pages = "" if first_page is None else (f", Page {first_page}" if first_page == last_page else f", Pages {first_page}-{last_page}")
+        similarity_score = similarity_percent(metric, passage['distance'])
+        
+        context_chunks.append(f"[Source: {passage['source_file']}, Paragraph {para_index}{pages}, Similarity: {similarity_score:.1f}%]\n{passage['text']}")
+    
+    comprehensive_context = "\n\n---\n\n".join(context_chunks)
+    
+    # Enhanced RAG prompt for comprehensive analysis with conversation context
+    return f"""
+You are an expert research assistant analyzing documents to answer user queries in a conversational manner.
+{conversation_context}
+Current User Query: "{message}"
+
+Document Context:
+{comprehensive_context}
+
+Please provide a comprehensive analysis that includes:
+
+1. **Direct Answer**: If the documents contain a direct answer to the user's question, provide it clearly.
+
+2. **Key Findings**: Summarize the most relevant information from the documents related to the query.
+
+3. **Supporting Evidence**: Quote specific passages from the documents that support your findings (include source references).
+
+4. **Analysis & Insights**: Provide deeper analysis, connections between different sources, and implications.
+
+5. **Context Awareness**: If this relates to previous questions in our conversation, acknowledge the connection and build upon earlier discussion.
+
+6. **Follow-up Questions**: Suggest relevant follow-up questions the user might want to explore.
+
+Format your response conversationally but with clear structure. Always cite your sources when making claims.
+"""
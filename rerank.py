@@ -0,0 +1,109 @@
+"""Post-retrieval diversification and reranking.
+
+With ``chunk_overlap=200`` neighbouring chunks repeat each other, so the raw
+nearest neighbours are often near-duplicates. Maximal Marginal Relevance
+picks chunks that are relevant to the query but dissimilar to those already
+picked; an optional reranker then orders the survivors.
+"""
+import threading
+
+import numpy as np
+
+from config import CROSS_ENCODER_MODEL, MMR_LAMBDA, RERANKER
+from lexical import tokenize
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def mmr(query_embedding, embeddings, k, lambda_mult=MMR_LAMBDA):
+    """Indices of k embeddings chosen by Maximal Marginal Relevance, in pick order"""
+    matrix = _normalize(np.asarray(embeddings, dtype=np.float32))
+    if matrix.shape[0] == 0 or k <= 0:
+        return []
+    query_vector = _normalize(np.asarray(query_embedding, dtype=np.float32))
+    relevance = matrix @ query_vector
+    similarity = matrix @ matrix.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of each candidate to anything selected so far
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(matrix.shape[0], dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, matrix.shape[0]):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
+
+
+def lexical_scores(query, documents):
+    """Query-term coverage of each document, weighted towards rarer query terms"""
+    terms = set(tokenize(query))
+    if not terms:
+        return [0.0] * len(documents)
+    doc_terms = [set(tokenize(doc)) for doc in documents]
+    document_frequency = {term: sum(term in terms_of_doc for terms_of_doc in doc_terms) for term in terms}
+    weights = {term: 1.0 / (1 + count) for term, count in document_frequency.items()}
+    total = sum(weights.values())
+    return [sum(weights[term] for term in terms if term in terms_of_doc) / total for terms_of_doc in doc_terms]
+
+
+_cross_encoder = None
+_cross_encoder_lock = threading.Lock()
+
+
+def _get_cross_encoder():
+    """Load the local cross-encoder once; None if sentence-transformers isn't installed"""
+    global _cross_encoder
+    with _cross_encoder_lock:
+        if _cross_encoder is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError:
+                _cross_encoder = False
+            else:
+                _cross_encoder = CrossEncoder(CROSS_ENCODER_MODEL)
+        return _cross_encoder or None
+
+
+def rerank_scores(query, documents, reranker=RERANKER):
+    """Relevance scores from the configured reranker, or None if reranking is off"""
+    if reranker == "lexical":
+        return lexical_scores(query, documents)
+    if reranker == "cross-encoder":
+        model = _get_cross_encoder()
+        if model is None:
+            return lexical_scores(query, documents)
+        return [float(score) for score in model.predict([(query, doc) for doc in documents])]
+    return None
+
+
+def diversify(query, results, k, lambda_mult=MMR_LAMBDA, reranker=RERANKER):
+    """Reduce retrieval results (with ``embeddings`` and ``query_embedding``) to k diverse chunks"""
+    if len(results["ids"]) <= k and reranker == "none":
+        return results
+
+    embeddings = results.get("embeddings")
+    pool_size = k if reranker == "none" else min(len(results["ids"]), 2 * k)
+    if embeddings is not None and len(embeddings):
+        order = mmr(results["query_embedding"], embeddings, pool_size, lambda_mult)
+    else:
+        order = list(range(min(pool_size, len(results["ids"]))))
+
+    scores = rerank_scores(query, [results["documents"][i] for i in order], reranker)
+    if scores is not None:
+        order = [i for _, i in sorted(zip(scores, order), key=lambda pair: -pair[0])]
+    order = order[:k]
+
+    reduced = {key: [results[key][i] for i in order] for key in ("ids", "documents", "metadatas", "distances")}
+    if embeddings is not None:
+        reduced["embeddings"] = [embeddings[i] for i in order]
+    reduced["query_embedding"] = results.get("query_embedding")
+    return reduced
@@ -0,0 +1,206 @@
+"""Chunk retrieval for the search and chat handlers: dense, lexical, and fused.
+
+Results are plain dicts of parallel lists (``ids``, ``documents``,
+``metadatas``, ``distances`` and, on request, ``embeddings``) for a single
+query, i.e. one row of what ``collection.query`` returns, plus the
+``query_embedding`` used. ``collection`` is a tenant's chunk collection
+(``store.get_tenant_collection``), the default tenant's when omitted.
+"""
+import numpy as np
+
+import documents
+import metrics
+import store
+from config import (HIERARCHICAL_MIN_DOCS, HIERARCHICAL_SEARCH, HIERARCHICAL_TOP_DOCS, HYBRID_CANDIDATE_FACTOR,
+                    HYBRID_SEARCH, RRF_K)
+from lexical import get_lexical_index
+from manifest import get_manifest
+from tenants import tenant_of
+
+
+def distance_metric(collection):
+    """The collection's HNSW distance metric: "l2", "cosine" or "ip\""""
+    return store.distance_metric(collection)
+
+
+def compute_distances(metric, query_embedding, embeddings):
+    """Distances from the query to each embedding, as Chroma reports them for the metric"""
+    query_vector = np.asarray(query_embedding, dtype=np.float32)
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(-1, query_vector.shape[0])
+    if metric == "cosine":
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector)
+        return (1.0 - (matrix @ query_vector) / np.where(norms == 0, 1.0, norms)).tolist()
+    if metric == "ip":
+        return (1.0 - matrix @ query_vector).tolist()
+    return np.sum((matrix - query_vector) ** 2, axis=1).tolist()
+
+
+def similarity_percent(metric, distance):
+    """Distance under the metric as a 0-100% similarity (cosine distance 0 = 100%, 2 = 0%).
+
+    Squared L2 and inner-product distances are converted to cosine distance
+    assuming unit-length embeddings, as the default model produces.
+    """
+    cosine_distance = distance / 2 if metric == "l2" else distance
+    return max(0.0, min(100.0, (2 - cosine_distance) / 2 * 100))
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Fuse ranked ID lists: score(id) = sum over lists of 1 / (k + rank)"""
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, 1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def _empty(query_embedding=None, include_embeddings=False):
+    results = {"ids": [], "documents": [], "metadatas": [], "distances": [], "query_embedding": query_embedding}
+    if include_embeddings:
+        results["embeddings"] = []
+    return results
+
+
+def source_filter(sources):
+    """Chroma ``where`` clause limiting a query to chunks of the given source files, or None for all"""
+    sources = sorted(set(sources or ()))
+    if not sources:
+        return None
+    if len(sources) == 1:
+        return {"source_file": sources[0]}
+    return {"source_file": {"$in": sources}}
+
+
+def dense_search_many(collection, query_embeddings, n_results, include_embeddings=False, where=None):
+    """Nearest chunks for several query embeddings in one ``collection.query`` call"""
+    include = ["documents", "metadatas", "distances"]
+    if include_embeddings:
+        include.append("embeddings")
+    results = collection.query(
+        query_embeddings=list(query_embeddings),
+        n_results=n_results,
+        where=where,
+        include=include
+    )
+    rows = []
+    for i, query_embedding in enumerate(query_embeddings):
+        if not results["ids"] or not results["ids"][i]:
+            rows.append(_empty(query_embedding, include_embeddings))
+            continue
+        dense = {
+            "ids": results["ids"][i],
+            "documents": results["documents"][i],
+            "metadatas": results["metadatas"][i] if results["metadatas"] else [None] * len(results["ids"][i]),
+            "distances": results["distances"][i],
+            "query_embedding": query_embedding,
+        }
+        if include_embeddings:
+            dense["embeddings"] = list(results["embeddings"][i])
+        rows.append(dense)
+    return rows
+
+
+def dense_search(collection, query_embedding, n_results, include_embeddings=False, where=None):
+    """Nearest chunks by embedding"""
+    return dense_search_many(collection, [query_embedding], n_results, include_embeddings, where)[0]
+
+
+def retrieve(query, n_results, collection=None, hybrid=HYBRID_SEARCH, include_embeddings=False, timings=None,
+             sources=None, hierarchical=None):
+    """Top ``n_results`` chunks for a query, fusing BM25 and vector rankings when ``hybrid``.
+
+    ``sources`` limits the search to chunks of those source files. Stage
+    durations are added to ``timings`` (a dict) when one is passed. See
+    ``retrieve_many`` for ``hierarchical``.
+    """
+    return retrieve_many([query], n_results, collection, hybrid, include_embeddings, timings, sources,
+                         hierarchical)[0]
+
+
+def retrieve_many(queries, n_results, collection=None, hybrid=HYBRID_SEARCH, include_embeddings=False, timings=None,
+                  sources=None, hierarchical=None, top_docs=HIERARCHICAL_TOP_DOCS):
+    """``retrieve`` for a list of queries, with one embedding call and one vector query for all of them.
+
+    With ``hierarchical`` each query first picks its ``top_docs`` nearest
+    documents (see documents.py) and then searches only their chunks. The
+    default, None, follows HIERARCHICAL_SEARCH once at least
+    HIERARCHICAL_MIN_DOCS documents are indexed. Explicit ``sources`` always
+    search flat within those files.
+    """
+    if collection is None:
+        collection = store.get_tenant_collection()
+    if collection is None or not queries:
+        return [_empty(None, include_embeddings) for _ in queries]
+
+    from embeddings import get_embedding_function
+
+    with metrics.timed("query_embedding", timings):
+        query_embeddings = get_embedding_function()(list(queries))
+
+    if hierarchical is None:
+        hierarchical = HIERARCHICAL_SEARCH and documents.count(collection) >= HIERARCHICAL_MIN_DOCS
+    if hierarchical and not sources:
+        selected = documents.select_documents(query_embeddings, top_docs, collection, timings)
+        if all(selected):
+            return [_search(collection, [query], [query_embedding], n_results, hybrid, include_embeddings,
+                            timings, doc_sources)[0]
+                    for query, query_embedding, doc_sources in zip(queries, query_embeddings, selected)]
+    return _search(collection, queries, query_embeddings, n_results, hybrid, include_embeddings, timings, sources)
+
+
+def _search(collection, queries, query_embeddings, n_results, hybrid, include_embeddings, timings, sources):
+    """Dense (and BM25) search for embedded queries, optionally within some source files"""
+    where = source_filter(sources)
+    if not hybrid:
+        with metrics.timed("chroma_query", timings):
+            return dense_search_many(collection, query_embeddings, n_results, include_embeddings, where)
+
+    candidates = n_results * max(1, HYBRID_CANDIDATE_FACTOR)
+    with metrics.timed("chroma_query", timings):
+        dense_rows = dense_search_many(collection, query_embeddings, candidates, include_embeddings, where)
+    allowed = None
+    if where is not None:
+        # BM25 knows chunk IDs only; the catalog maps the selected files to theirs
+        manifest = get_manifest(tenant_of(collection))
+        allowed_ids = set()
+        for source in set(sources):
+            allowed_ids.update((manifest.get(source) or {}).get("chunk_ids", ()))
+        allowed = allowed_ids.__contains__
+    with metrics.timed("bm25_search", timings):
+        lexical_index = get_lexical_index(collection)
+        lexical_rows = [lexical_index.search(query, candidates, allowed) for query in queries]
+    return [_fuse(collection, dense, lexical, n_results, include_embeddings, timings)
+            for dense, lexical in zip(dense_rows, lexical_rows)]
+
+
+def _fuse(collection, dense, lexical, n_results, include_embeddings, timings):
+    """Merge one query's dense and BM25 results by reciprocal rank fusion"""
+    query_embedding = dense["query_embedding"]
+    fused_ids = reciprocal_rank_fusion([dense["ids"], [chunk_id for chunk_id, _ in lexical]])[:n_results]
+
+    dense_embeddings = dense.get("embeddings") or [None] * len(dense["ids"])
+    rows = {chunk_id: (doc, metadata, distance, embedding) for chunk_id, doc, metadata, distance, embedding
+            in zip(dense["ids"], dense["documents"], dense["metadatas"], dense["distances"], dense_embeddings)}
+
+    # Lexical-only hits: fetch them and score them the way the vector index would
+    missing = [chunk_id for chunk_id in fused_ids if chunk_id not in rows]
+    if missing:
+        with metrics.timed("chroma_get", timings):
+            fetched = collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+        if fetched["ids"]:
+            distances = compute_distances(distance_metric(collection), query_embedding, fetched["embeddings"])
+            for chunk_id, doc, metadata, distance, embedding in zip(
+                    fetched["ids"], fetched["documents"], fetched["metadatas"], distances, fetched["embeddings"]):
+                rows[chunk_id] = (doc, metadata, distance, embedding)
+
+    fused = _empty(query_embedding, include_embeddings)
+    for chunk_id in fused_ids:
+        if chunk_id in rows:
+            doc, metadata, distance, embedding = rows[chunk_id]
+            fused["ids"].append(chunk_id)
+            fused["documents"].append(doc)
+            fused["metadatas"].append(metadata)
+            fused["distances"].append(distance)
+            if include_embeddings:
+                fused["embeddings"].append(embedding)
+    return fused
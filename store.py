@@ -0,0 +1,281 @@
+"""Process-wide ChromaDB access shared by every Gradio event handler.
+
+Opening a ``PersistentClient`` reloads the SQLite/HNSW store, so the client is
+created once per process and collection handles are cached by name. Writers
+hold ``write_lock()`` and call ``refresh_collection`` afterwards so readers
+pick up a clean handle. Every handle embeds through the shared cached
+embedding function (see embeddings.py). New collections get the configured
+distance metric and HNSW parameters (``index_configuration``); of those, only
+search ef can change later, and it is applied when a handle is opened.
+
+A tenant's chunks live in one or more collections ("shards", see
+``ShardedCollection``); reads fan out over all of them in parallel. Handles
+are kept in LRU order and capped at COLLECTION_HANDLE_LIMIT. That bounds the
+Python handle objects only, not memory: dropping a handle does not unload
+its vector index. Chroma keeps loaded indexes in its own LRU cache, sized
+from the open-file limit (five files per index), and evicts idle ones there.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import tenants
+from config import (CHROMA_DB_PATH, COLLECTION_HANDLE_LIMIT, COLLECTION_NAME, HNSW_CONSTRUCTION_EF, HNSW_M,
+                    HNSW_SEARCH_EF, HNSW_SPACE, SHARD_MAX_CHUNKS, SHARD_QUERY_WORKERS)
+
+SPACES = ("l2", "cosine", "ip")
+
+_lock = threading.RLock()
+_write_lock = threading.Lock()
+_client = None
+_collections = OrderedDict()
+_tenant_collections = {}
+_pool = None
+
+
+def get_client():
+    """Return the shared ChromaDB client, opening it on first use"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                # Imported here: chromadb is slow to import and the UI should come up without it
+                import chromadb
+
+                _client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+    return _client
+
+
+def index_configuration(space=HNSW_SPACE, m=HNSW_M, construction_ef=HNSW_CONSTRUCTION_EF, search_ef=HNSW_SEARCH_EF):
+    """Chroma collection configuration for a new collection's vector index"""
+    if space not in SPACES:
+        raise ValueError(f"Unknown HNSW_SPACE {space!r}; expected l2, cosine or ip")
+    return {"hnsw": {"space": space, "max_neighbors": m, "ef_construction": construction_ef, "ef_search": search_ef}}
+
+
+def distance_metric(collection):
+    """The collection's HNSW distance metric: "l2", "cosine" or "ip\""""
+    configuration = getattr(collection, "configuration", None) or {}
+    hnsw = configuration.get("hnsw") or {}
+    metadata = getattr(collection, "metadata", None) or {}
+    return hnsw.get("space") or metadata.get("hnsw:space") or "l2"
+
+
+def _apply_search_ef(collection, search_ef=HNSW_SEARCH_EF):
+    """Bring an existing collection's search ef in line with the configured one"""
+    hnsw = (collection.configuration or {}).get("hnsw") or {}
+    if hnsw and hnsw.get("ef_search") != search_ef:
+        collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+
+
+def get_collection(name=COLLECTION_NAME, create=False, configuration=None):
+    """Return a cached collection handle, or None if it doesn't exist and create is False.
+
+    A collection created here gets ``configuration``, ``index_configuration()`` by default.
+    """
+    with _lock:
+        collection = _collections.get(name)
+        if collection is not None:
+            _collections.move_to_end(name)
+            return collection
+
+        from embeddings import get_embedding_function
+
+        client = get_client()
+        embedding_function = get_embedding_function()
+        if create:
+            collection = client.get_or_create_collection(name, configuration=configuration or index_configuration(),
+                                                         embedding_function=embedding_function)
+        else:
+            try:
+                collection = client.get_collection(name, embedding_function=embedding_function)
+            except Exception:
+                return None
+        _apply_search_ef(collection)
+        _collections[name] = collection
+        # Handles of idle shards go first
+        if COLLECTION_HANDLE_LIMIT > 0:
+            while len(_collections) > COLLECTION_HANDLE_LIMIT:
+                _collections.popitem(last=False)
+    return collection
+
+
+def _fan_out(fn, shards):
+    """``[fn(shard) for shard in shards]``, run in parallel when there is more than one shard"""
+    global _pool
+    if len(shards) < 2:
+        return [fn(shard) for shard in shards]
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, SHARD_QUERY_WORKERS), thread_name_prefix="shard-query")
+    return list(_pool.map(fn, shards))
+
+
+class ShardedCollection:
+    """A tenant's chunks spread over numbered collections, behind the subset of the collection API we use.
+
+    ``query`` fans out to every shard and merges each row by distance;
+    ``get``, ``count`` and ``delete`` cover all shards. Writes go to one
+    shard: a file keeps the shard it was first stored in (``shard``), and new
+    files go to ``writable_shard``, which opens a new shard once the newest
+    holds SHARD_MAX_CHUNKS chunks. New shards copy the first shard's index
+    settings: merged distances are only comparable under one metric.
+    """
+
+    def __init__(self, tenant, shard_count):
+        self.tenant = tenant
+        self.name = tenants.collection_name(COLLECTION_NAME, tenant)
+        self.shard_count = shard_count
+
+    def shard_names(self):
+        return [tenants.collection_name(COLLECTION_NAME, self.tenant, n) for n in range(self.shard_count)]
+
+    def shards(self):
+        return [shard for shard in (get_collection(name) for name in self.shard_names()) if shard is not None]
+
+    def shard(self, name=None):
+        """Handle of a shard by name (the first shard for None)"""
+        return get_collection(name or self.name, create=True)
+
+    def index_configuration(self):
+        """Index settings of the first shard, which every later shard is created with"""
+        hnsw = (self.shard().configuration or {}).get("hnsw") or {}
+        return index_configuration(distance_metric(self.shard()), hnsw.get("max_neighbors", HNSW_M),
+                                   hnsw.get("ef_construction", HNSW_CONSTRUCTION_EF), HNSW_SEARCH_EF)
+
+    def writable_shard(self, incoming=0):
+        """Newest shard if it has room for ``incoming`` more chunks, otherwise a new one"""
+        with _lock:
+            newest = self.shard(self.shard_names()[-1])
+            stored = newest.count() if SHARD_MAX_CHUNKS > 0 else 0
+            if stored and stored + incoming > SHARD_MAX_CHUNKS:
+                newest = get_collection(tenants.collection_name(COLLECTION_NAME, self.tenant, self.shard_count),
+                                        create=True, configuration=self.index_configuration())
+                self.shard_count += 1
+            return newest
+
+    @property
+    def configuration(self):
+        return self.shard().configuration
+
+    @property
+    def metadata(self):
+        return self.shard().metadata
+
+    def count(self):
+        return sum(_fan_out(lambda shard: shard.count(), self.shards()))
+
+    def query(self, query_embeddings, n_results=10, where=None, include=("documents", "metadatas", "distances")):
+        shards = self.shards()
+        if len(shards) == 1:
+            return shards[0].query(query_embeddings=query_embeddings, n_results=n_results, where=where,
+                                   include=list(include))
+        spaces = {distance_metric(shard) for shard in shards}
+        if len(spaces) > 1:
+            raise ValueError(f"Shards of {self.name} use different distance metrics ({', '.join(sorted(spaces))}) "
+                             "whose distances cannot be merged; rebuild them with python -m compact")
+        parts = _fan_out(lambda shard: shard.query(query_embeddings=query_embeddings, n_results=n_results,
+                                                   where=where, include=list(include)), shards)
+        fields = ["ids"] + [field for field in include if field != "uris"]
+        merged = {field: [] for field in fields}
+        for i in range(len(query_embeddings)):
+            rows = []
+            for part in parts:
+                if part["ids"] and part["ids"][i]:
+                    rows.extend(zip(*(part[field][i] for field in fields)))
+            if "distances" in fields:
+                # Shards return sorted rows; the merged top n is the n closest overall
+                position = fields.index("distances")
+                rows = sorted(rows, key=lambda row: row[position])[:n_results]
+            for position, field in enumerate(fields):
+                merged[field].append([row[position] for row in rows])
+        return merged
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None, offset=None):
+        shards = self.shards()
+        if len(shards) == 1:
+            return shards[0].get(ids=ids, where=where, include=list(include), limit=limit, offset=offset)
+        fields = ["ids"] + list(include)
+        if ids is None and where is None and (limit is not None or offset):
+            # Pages walk the shards in order
+            parts = []
+            skip, remaining = offset or 0, limit
+            for shard in shards:
+                size = shard.count()
+                if skip >= size:
+                    skip -= size
+                    continue
+                parts.append(shard.get(include=list(include), limit=remaining, offset=skip))
+                skip = 0
+                if remaining is not None:
+                    remaining -= len(parts[-1]["ids"])
+                    if remaining <= 0:
+                        break
+        else:
+            parts = _fan_out(lambda shard: shard.get(ids=ids, where=where, include=list(include)), shards)
+        merged = {field: [] for field in fields}
+        for part in parts:
+            for field in fields:
+                if part.get(field) is not None:
+                    merged[field].extend(part[field])
+        if (ids is not None or where is not None) and (limit is not None or offset):
+            end = None if limit is None else (offset or 0) + limit
+            merged = {field: values[offset or 0:end] for field, values in merged.items()}
+        return merged
+
+    def delete(self, ids=None, where=None):
+        _fan_out(lambda shard: shard.delete(ids=ids, where=where), self.shards())
+
+    def refresh(self):
+        """Drop every shard's cached handle (see ``refresh_collection``)"""
+        for name in self.shard_names():
+            refresh_collection(name)
+
+
+def get_tenant_collection(tenant=None, create=False):
+    """Return a tenant's chunk collection, or None if it has none and create is False"""
+    tenant = tenants.normalize(tenant)
+    with _lock:
+        sharded = _tenant_collections.get(tenant)
+        if sharded is not None:
+            return sharded
+        shard_count = 0
+        while get_collection(tenants.collection_name(COLLECTION_NAME, tenant, shard_count)) is not None:
+            shard_count += 1
+        if not shard_count:
+            if not create:
+                return None
+            get_collection(tenants.collection_name(COLLECTION_NAME, tenant), create=True)
+            shard_count = 1
+        sharded = _tenant_collections[tenant] = ShardedCollection(tenant, shard_count)
+    return sharded
+
+
+def refresh_collection(name=COLLECTION_NAME):
+    """Drop the cached handle so the next caller gets a freshly loaded one"""
+    with _lock:
+        _collections.pop(name, None)
+
+
+def delete_collection(name=COLLECTION_NAME):
+    """Delete a collection from the store and forget its cached handle"""
+    with _lock:
+        _collections.pop(name, None)
+        try:
+            get_client().delete_collection(name)
+        except Exception:
+            pass
+
+
+def write_lock():
+    """Lock serialising writes to the store (use as a context manager)"""
+    return _write_lock
+
+
+def reset():
+    """Forget the client and every cached handle (used after the store is rewritten on disk)"""
+    global _client
+    with _lock:
+        _collections.clear()
+        _tenant_collections.clear()
+        _client = None
@@ -0,0 +1,55 @@
+"""Tenant namespaces: collection names and state file paths per tenant.
+
+Every tenant has its own chunk collections, document collection, ingest
+manifest and BM25 index. The default tenant keeps the original names and
+paths, so a store from before tenants existed is the default tenant's.
+"""
+import hashlib
+import os
+import re
+
+from config import CHROMA_DB_PATH, TENANT_MODE
+
+DEFAULT_TENANT = "default"
+
+
+def normalize(tenant):
+    """Tenant ID to use for a possibly empty value"""
+    return str(tenant).strip() if tenant and str(tenant).strip() else DEFAULT_TENANT
+
+
+def slug(tenant):
+    """Name- and path-safe form of a tenant ID (suffixed with a hash whenever it had to be changed)"""
+    text = re.sub(r"[^a-z0-9]+", "-", tenant.lower()).strip("-")[:40]
+    if text != tenant:
+        text = f"{text}-{hashlib.md5(tenant.encode()).hexdigest()[:8]}".strip("-")
+    return text
+
+
+def collection_name(base, tenant=DEFAULT_TENANT, shard=0):
+    """Chroma collection name of one of a tenant's collections"""
+    name = base if tenant == DEFAULT_TENANT else f"{base}__{slug(tenant)}"
+    return name if shard == 0 else f"{name}_{shard:03d}"
+
+
+def state_path(path, tenant=DEFAULT_TENANT):
+    """Where a tenant keeps the state file configured at ``path``"""
+    if tenant == DEFAULT_TENANT:
+        return path
+    return os.path.join(CHROMA_DB_PATH, "tenants", slug(tenant), os.path.basename(path))
+
+
+def tenant_of(collection):
+    """Tenant a chunk collection belongs to"""
+    return getattr(collection, "tenant", None) or DEFAULT_TENANT
+
+
+def tenant_for_request(request, mode=TENANT_MODE):
+    """Tenant of a Gradio request: the logged-in user or the browser session, per TENANT_MODE"""
+    if request is None or mode == "shared":
+        return DEFAULT_TENANT
+    if mode == "user":
+        return normalize(getattr(request, "username", None))
+    if mode == "session":
+        return normalize(getattr(request, "session_hash", None))
+    raise ValueError(f"Unknown TENANT_MODE {mode!r}; expected shared, user or session")
@@ -0,0 +1,83 @@
+"""Shared test setup: a scratch store and a deterministic stand-in for the embedding model."""
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+import pytest
+
+# Settings are read when the modules are first imported, so point them at a scratch store before any test does
+_STORE = tempfile.mkdtemp(prefix="research-assistant-tests-")
+os.environ.update(CHROMA_DB_PATH=_STORE, METRICS_PORT="0", WARMUP="0")
+atexit.register(shutil.rmtree, _STORE, ignore_errors=True)
+
+
+class HashEmbedding:
+    """Bag-of-words vectors: texts that share words are close, and no model is downloaded"""
+
+    dimensions = 64
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vector = np.zeros(self.dimensions, dtype=np.float32)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1
+            norm = np.linalg.norm(vector)
+            vectors.append(vector / norm if norm else vector)
+        return vectors
+
+
+@pytest.fixture
+def stub_embeddings(monkeypatch):
+    """Make the process-wide embedding function use ``HashEmbedding``"""
+    import embeddings
+
+    function = embeddings.CachedEmbeddingFunction(inner=HashEmbedding(), cache=embeddings.get_embedding_cache())
+    monkeypatch.setattr(embeddings, "_embedding_function", function)
+    return function
+
+
+@pytest.fixture
+def tenant():
+    """A tenant of its own, so each test gets empty collections, manifest and BM25 index"""
+    return f"test-{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def collection(tenant, stub_embeddings):
+    """The test tenant's (new, empty) chunk collection"""
+    import store
+
+    return store.get_tenant_collection(tenant, create=True)
+
+
+@pytest.fixture
+def make_files(tmp_path):
+    """Create files to ingest with stubbed extraction; only their bytes (for the content hash) matter"""
+    def make(*names):
+        paths = []
+        for name in names:
+            path = tmp_path / name
+            path.write_text(f"contents of {name}", encoding="utf-8")
+            paths.append(str(path))
+        return paths
+    return make
+
+
+@pytest.fixture
+def store_file(collection):
+    """Store a file's paragraphs (in the test tenant's collection by default), as ingestion does after extraction"""
+    import ingest
+    from extract import hash_chunks
+
+    def store(file_name, paragraphs, into=None):
+        extracted = {"file_name": file_name, "file_path": file_name, "file_size": len(file_name), "pages": 1,
+                     "paragraphs": paragraphs, "chunk_hashes": hash_chunks(paragraphs),
+                     "chunk_pages": [(1, 1)] * len(paragraphs),
+                     "content_hash": hashlib.sha256(file_name.encode()).hexdigest()}
+        return ingest.store_paragraphs(into or collection, extracted)
+    return store
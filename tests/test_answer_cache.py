@@ -0,0 +1,97 @@
+"""Answer caching around the LLM calls, with the LLM replaced by canned deltas."""
+from llm import INTERRUPTED_MARKER
+
+
+def deltas(*parts):
+    def stream(prompt, anura_api_key):
+        yield from parts
+    return stream
+
+
+def test_interrupted_stream_is_not_cached(tenant, monkeypatch):
+    import ui
+    from answer_cache import get_answer_cache
+    from prompts import build_enhancement_prompt
+
+    query, results_text, chunk_ids = f"folding rates {tenant}", "1. Proteins fold fast", [f"{tenant}_a"]
+    prompt = build_enhancement_prompt(query, results_text)
+
+    monkeypatch.setattr(ui, "stream_anura_api", deltas("Proteins ", f"\n\n{INTERRUPTED_MARKER} timed out]"))
+    *_, shown = ui.stream_search_with_llm(query, results_text, "key", chunk_ids)
+    assert INTERRUPTED_MARKER in shown
+    assert get_answer_cache().lookup("search_enhancement", query, prompt, chunk_ids) is None
+
+    monkeypatch.setattr(ui, "stream_anura_api", deltas("Proteins ", "fold fast."))
+    list(ui.stream_search_with_llm(query, results_text, "key", chunk_ids))
+    assert get_answer_cache().lookup("search_enhancement", query, prompt, chunk_ids) == "Proteins fold fast."
+
+
+def test_interrupted_chat_answer_is_not_cached(collection, store_file, monkeypatch):
+    import ui
+    from tenants import tenant_of
+
+    store_file("cells.pdf", ["Ribosomes translate messenger RNA into protein chains"])
+    monkeypatch.setattr(ui, "LLM_STREAMING", True)
+    monkeypatch.setattr(ui.memory, "call_anura_api", lambda prompt, key: None)
+
+    def ask():
+        *_, (history, _) = ui.stream_rag_search_chat("What do ribosomes do?", [], 1, "key",
+                                                     tenant=tenant_of(collection))
+        return history[-1][1]
+
+    monkeypatch.setattr(ui, "stream_anura_api", deltas("They make ", f"\n\n{INTERRUPTED_MARKER} reset]"))
+    assert INTERRUPTED_MARKER in ask()
+    monkeypatch.setattr(ui, "stream_anura_api", deltas("They make proteins."))
+    assert "(cached answer)" not in ask()
+    assert ask().startswith("They make proteins.") and "(cached answer)" in ask()
+
+
+def test_exact_mode_hits_only_the_same_prompt_over_the_same_chunks(tmp_path):
+    from answer_cache import AnswerCache
+
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"), mode="exact")
+    cache.store("rag_chat", "what is p53", "prompt about p53", ["c1", "c2"], "A tumour suppressor.")
+    assert cache.lookup("rag_chat", "what is p53", "prompt about p53", ["c2", "c1"]) == "A tumour suppressor."
+    assert cache.lookup("rag_chat", "what is p53", "prompt about p53", ["c1", "c3"]) is None
+    assert cache.lookup("rag_chat", "what is p53?", "prompt about p53?", ["c1", "c2"]) is None
+    assert cache.lookup("search_enhancement", "what is p53", "prompt about p53", ["c1", "c2"]) is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_semantic_mode_hits_a_similar_question_over_the_same_chunks(tmp_path):
+    from answer_cache import AnswerCache
+    from conftest import HashEmbedding
+
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"), mode="semantic", similarity=0.8, embed=HashEmbedding())
+    cache.store("rag_chat", "what does the p53 protein do", "prompt 1", ["c1"], "It stops damaged cells dividing.")
+    assert cache.lookup("rag_chat", "what does the p53 protein do ?", "prompt 2", ["c1"]) == \
+        "It stops damaged cells dividing."
+    assert cache.lookup("rag_chat", "how are ribosomes assembled", "prompt 3", ["c1"]) is None
+    assert cache.lookup("rag_chat", "what does the p53 protein do ?", "prompt 2", ["c2"]) is None
+    assert cache.lookup("rag_chat", "what does the p53 protein do ?", "prompt 2", ["c1"], context="earlier turns") \
+        is None
+
+
+def test_answers_are_invalidated_when_their_chunks_change_or_go(collection, store_file):
+    import ingest
+    from answer_cache import get_answer_cache
+    from extract import hash_chunks
+
+    def chunk_ids(file_name, paragraphs):
+        return [f"{ingest.file_key(file_name)}_{chunk_hash}" for chunk_hash in hash_chunks(paragraphs)]
+
+    cache = get_answer_cache()
+    first = ["Kinases add phosphate groups", "Phosphatases remove them"]
+    second = ["Chaperones help proteins fold"]
+    store_file("enzymes.pdf", first)
+    store_file("folding.pdf", second)
+    cache.store("rag_chat", "kinases", "kinase prompt", chunk_ids("enzymes.pdf", first), "Kinase answer")
+    cache.store("rag_chat", "folding", "folding prompt", chunk_ids("folding.pdf", second), "Folding answer")
+
+    # Re-ingesting a revised file drops answers built from its old chunks, and only those
+    store_file("enzymes.pdf", first[:1] + ["Phosphatases remove phosphate groups"])
+    assert cache.lookup("rag_chat", "kinases", "kinase prompt", chunk_ids("enzymes.pdf", first)) is None
+    assert cache.lookup("rag_chat", "folding", "folding prompt", chunk_ids("folding.pdf", second)) == "Folding answer"
+
+    ingest.delete_documents(["folding.pdf"], collection)
+    assert cache.lookup("rag_chat", "folding", "folding prompt", chunk_ids("folding.pdf", second)) is None
@@ -0,0 +1,41 @@
+"""Merging retrieved chunks into passages and packing them into the token budget."""
+from context import build_passages, estimate_tokens, merge_overlap, pack_context, truncate_to_tokens
+
+
+def test_merge_overlap_drops_the_repeated_text():
+    assert merge_overlap("alpha beta gamma", "beta gamma delta") == ("alpha beta gamma delta", 10)
+    assert merge_overlap("alpha", "delta") == ("alpha\ndelta", 0)
+
+
+def test_consecutive_chunks_of_a_file_become_one_passage():
+    documents = ["Cells divide. Growth", "Growth follows.", "Unrelated chunk", "Other file"]
+    metadatas = [{"source_file": "a.pdf", "paragraph_index": 0, "page": 1},
+                 {"source_file": "a.pdf", "paragraph_index": 1, "page": 2},
+                 {"source_file": "a.pdf", "paragraph_index": 5, "page": 4},
+                 {"source_file": "b.pdf", "paragraph_index": 1, "page": 1}]
+    passages, removed = build_passages(documents, metadatas, [0.3, 0.1, 0.5, 0.2])
+    assert [(p["source_file"], p["text"], p["chunks"], p["distance"], p["pages"]) for p in passages] == [
+        ("a.pdf", "Cells divide. Growth follows.", 2, 0.1, (1, 2)),
+        ("a.pdf", "Unrelated chunk", 1, 0.5, (4, 4)),
+        ("b.pdf", "Other file", 1, 0.2, (1, 1)),
+    ]
+    assert removed == len("Growth")
+
+
+def test_pack_context_fills_the_budget_best_first():
+    documents = ["one two three four", "five six", "seven eight nine ten eleven"]
+    metadatas = [{"source_file": f"{name}.pdf"} for name in "abc"]
+    # Best first: b (2 tokens), then c (5) fits a budget of 7, a (4) does not
+    packed, stats = pack_context(documents, metadatas, [0.2, 0.1, 0.15], token_budget=7)
+    assert [passage["source_file"] for passage in packed] == ["b.pdf", "c.pdf"]
+    assert (stats["packed_tokens"], stats["budget_tokens_dropped"], stats["passages"]) == (7, 4, 2)
+    assert stats["packed_tokens"] <= stats["token_budget"]
+
+
+def test_pack_context_trims_the_best_passage_rather_than_sending_nothing():
+    document = " ".join(f"word{i}" for i in range(100))
+    packed, stats = pack_context([document], [{"source_file": "a.pdf"}], [0.1], token_budget=10)
+    assert len(packed) == 1 and packed[0]["text"].endswith(" …")
+    assert packed[0]["tokens"] == stats["packed_tokens"] <= 10
+    assert truncate_to_tokens("short text", 10) == "short text"
+    assert estimate_tokens("p53, BRCA1!") == 4
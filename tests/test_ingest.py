@@ -0,0 +1,70 @@
+"""Ingestion with extraction stubbed out: the worker functions below stand in for ``extract.extract_in_worker``."""
+import os
+import time
+
+# Seconds each stubbed file takes to extract; "hang.pdf" never finishes
+DELAYS = {"slow.pdf": 1.4, "slower.pdf": 1.6, "hang.pdf": 3600}
+
+
+def paragraphs_of(file_name):
+    return [f"{file_name} paragraph {i} about protein folding and cell biology" for i in range(3)]
+
+
+def fake_extraction(path, index):
+    """Runs in a pool worker: report the start, take the file's delay, return its fixed paragraphs"""
+    import extract
+
+    extract.report_start(index)
+    file_name = os.path.basename(path)
+    time.sleep(DELAYS.get(file_name, 0))
+    paragraphs = paragraphs_of(file_name)
+    return {"file_name": file_name, "file_path": path, "file_size": os.path.getsize(path), "pages": 1,
+            "paragraphs": paragraphs, "chunk_hashes": extract.hash_chunks(paragraphs),
+            "chunk_pages": [(1, 1)] * len(paragraphs), "skipped_pages": [], "error": None,
+            "extract_seconds": DELAYS.get(file_name, 0)}
+
+
+def test_deadline_counts_from_when_a_worker_takes_the_file(collection, make_files, monkeypatch):
+    import ingest
+
+    monkeypatch.setattr(ingest, "extract_in_worker", fake_extraction)
+    monkeypatch.setattr(ingest, "INGEST_WORKERS", 1)
+    monkeypatch.setattr(ingest, "PDF_FILE_TIMEOUT", 2.0)
+    # One worker: "slower.pdf" waits for "slow.pdf", so both finish after the timeout but neither overran it
+    results = dict(ingest.ingest_files(make_files("slow.pdf", "slower.pdf"), collection))
+    assert [(result["status"], result["error"]) for _, result in sorted(results.items())] == \
+        [("added", None), ("added", None)]
+
+
+def test_overrunning_file_fails_and_the_rest_of_the_batch_is_stored(collection, make_files, monkeypatch):
+    import ingest
+
+    monkeypatch.setattr(ingest, "extract_in_worker", fake_extraction)
+    monkeypatch.setattr(ingest, "INGEST_WORKERS", 2)
+    monkeypatch.setattr(ingest, "PDF_FILE_TIMEOUT", 2.0)
+    paths = make_files("hang.pdf", "slow.pdf", "a.pdf", "b.pdf", "c.pdf")
+    results = dict(ingest.ingest_files(paths, collection))
+    assert results[1]["status"] == "failed" and "longer than 2s" in results[1]["error"]
+    assert all(results[i]["status"] == "added" for i in range(2, 6))
+    assert collection.count() == 4 * 3
+
+
+def test_reingest_restores_chunks_missing_from_the_bm25_index(collection, make_files, monkeypatch):
+    import ingest
+    from lexical import get_lexical_index
+    from manifest import get_manifest
+    from tenants import tenant_of
+
+    monkeypatch.setattr(ingest, "extract_in_worker", fake_extraction)
+    paths = make_files("a.pdf")
+    dict(ingest.ingest_files(paths, collection))
+    lexical_index = get_lexical_index(collection)
+    chunk_ids = get_manifest(tenant_of(collection)).get("a.pdf")["chunk_ids"]
+
+    # A crash before the batch's save: the chunks are in the collection, the BM25 index and manifest lost them
+    lexical_index.remove_many(chunk_ids)
+    get_manifest(tenant_of(collection)).remove("a.pdf")
+    (result,) = dict(ingest.ingest_files(paths, collection)).values()
+    assert (result["chunks_added"], result["chunks_kept"]) == (0, 3)
+    assert all(chunk_id in lexical_index for chunk_id in chunk_ids)
+    assert {chunk_id for chunk_id, _ in lexical_index.search("a.pdf", 3)} == set(chunk_ids)
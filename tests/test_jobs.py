@@ -0,0 +1,55 @@
+"""The persistent ingestion queue: duplicate submissions and resuming after a restart."""
+import time
+
+import pytest
+
+from test_ingest import fake_extraction
+
+
+@pytest.fixture
+def queue_paths(tmp_path):
+    return {"path": str(tmp_path / "jobs.sqlite3"), "spool_dir": str(tmp_path / "spool")}
+
+
+def test_resubmitting_pending_files_returns_the_pending_job(queue_paths, make_files, tenant):
+    from jobs import JobQueue
+
+    queue = JobQueue(**queue_paths)
+    paths = make_files("a.pdf", "b.pdf")
+    job_id = queue.submit(paths, tenant)
+    assert queue.submit(list(reversed(paths)), tenant) == job_id
+    assert queue.submit(paths, f"{tenant}-other") != job_id
+    assert queue.submit(paths[:1], tenant) != job_id
+
+    queue._update(job_id, status="done")
+    assert queue.submit(paths, tenant) != job_id
+
+
+def test_a_restart_resumes_the_job_without_redoing_finished_files(queue_paths, make_files, collection, tenant,
+                                                                  monkeypatch):
+    import ingest
+    from jobs import JobQueue
+    from manifest import get_manifest
+
+    monkeypatch.setattr(ingest, "extract_in_worker", fake_extraction)
+    queue = JobQueue(**queue_paths)
+    job_id = queue.submit(make_files("a.pdf", "b.pdf", "c.pdf"), tenant)
+
+    # The process died while the job was running, after "a.pdf" was stored
+    files = queue.get(job_id)["files"]
+    files[0].update(stage="done", status="added")
+    queue._update(job_id, files=files, status="running")
+
+    restarted = JobQueue(**queue_paths)
+    restarted.start()
+    deadline = time.monotonic() + 120
+    while restarted.get(job_id)["status"] not in ("done", "failed") and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+    job = restarted.get(job_id)
+    assert job["status"] == "done"
+    assert [entry["stage"] for entry in job["files"]] == ["done", "done", "done"]
+    manifest = get_manifest(tenant)
+    assert manifest.get("a.pdf") is None
+    assert manifest.get("b.pdf") is not None and manifest.get("c.pdf") is not None
+    assert collection.count() == 2 * 3
@@ -0,0 +1,57 @@
+"""Client pooling and the async chat path, with the OpenAI client replaced by fakes."""
+import asyncio
+import types
+
+
+class FakeClient:
+    def __init__(self, **kwargs):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_evicted_client_is_closed_by_its_last_user(monkeypatch):
+    import llm
+
+    monkeypatch.setattr(llm, "_openai", lambda: types.SimpleNamespace(OpenAI=FakeClient))
+    monkeypatch.setattr(llm, "_clients", llm.OrderedDict())
+    monkeypatch.setattr(llm, "LLM_CLIENT_POOL_SIZE", 1)
+    with llm.get_client("key-a") as first:
+        # Evicts the client for "key-a" while a call still uses it
+        with llm.get_client("key-b") as second:
+            assert not first.closed
+        assert not second.closed
+        assert not first.closed
+    assert first.closed
+    with llm.get_client("key-c"):
+        assert second.closed
+
+
+def test_async_chat_handler_streams_from_the_async_client(collection, store_file, monkeypatch):
+    import ui
+
+    store_file("cells.pdf", ["Ribosomes translate messenger RNA into protein chains",
+                             "Mitochondria produce most of the cell's chemical energy"])
+
+    async def astream(prompt, anura_api_key):
+        assert "Ribosomes" in prompt
+        for delta in ("Ribosomes ", "make ", "proteins."):
+            await asyncio.sleep(0)
+            yield delta
+
+    def blocking(*args):
+        raise AssertionError("the async handler used a blocking LLM call")
+
+    monkeypatch.setattr(ui, "LLM_STREAMING", True)
+    monkeypatch.setattr(ui, "astream_anura_api", astream)
+    monkeypatch.setattr(ui, "stream_anura_api", blocking)
+    monkeypatch.setattr(ui.memory, "call_anura_api", lambda prompt, key: None)
+
+    async def chat():
+        return [answer[-1][1] async for answer, _ in ui.astream_rag_search_chat(
+            "What do ribosomes do?", [], 2, "key", tenant=ui.tenants.tenant_of(collection))]
+
+    answers = asyncio.run(chat())
+    assert answers[:3] == ["Ribosomes ", "Ribosomes make ", "Ribosomes make proteins."]
+    assert answers[-1].startswith("Ribosomes make proteins.\n\n---\n\n📊 **Search Statistics:**")
@@ -0,0 +1,17 @@
+"""The Prometheus endpoint's server."""
+import logging
+import socket
+
+
+def test_a_taken_metrics_port_is_logged_and_skipped(caplog, monkeypatch):
+    import metrics
+
+    monkeypatch.setattr(metrics, "_server", None)
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+        with caplog.at_level(logging.WARNING, logger="metrics"):
+            assert metrics.start_metrics_server(port, host="127.0.0.1") is None
+    assert f"cannot bind port {port}" in caplog.text
+    assert metrics.start_metrics_server(0) is None
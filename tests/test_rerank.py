@@ -0,0 +1,50 @@
+"""MMR selection and reranking of retrieved chunks."""
+import numpy as np
+
+from conftest import HashEmbedding
+
+
+def test_mmr_trades_relevance_for_novelty():
+    from rerank import mmr
+
+    query = [1.0, 1.0, 0.0]
+    # The first two point almost the same way; the third is as relevant as the first but different
+    embeddings = [[1.0, 0.0, 0.0], [1.0, 0.05, 0.0], [0.0, 1.0, 0.0]]
+    assert mmr(query, embeddings, 3, lambda_mult=1.0) == [1, 0, 2]
+    assert mmr(query, embeddings, 3, lambda_mult=0.7) == [1, 2, 0]
+    assert mmr(query, embeddings, 5) == mmr(query, embeddings, 3)
+    assert mmr(query, np.zeros((0, 3)), 2) == []
+
+
+def results_for(query, documents):
+    embed = HashEmbedding()
+    return {"ids": [f"c{i}" for i in range(len(documents))], "documents": documents,
+            "metadatas": [{"paragraph_index": i} for i in range(len(documents))],
+            "distances": [0.1 * i for i in range(len(documents))],
+            "embeddings": embed(documents), "query_embedding": embed([query])[0]}
+
+
+def test_diversify_drops_near_duplicates_and_keeps_rows_aligned():
+    from rerank import diversify
+
+    documents = ["protein folding in the cell membrane", "protein folding in the cell membrane .",
+                 "chaperone proteins assist folding", "unrelated weather report"]
+    reduced = diversify("protein folding", results_for("protein folding", documents), 2, lambda_mult=0.5,
+                        reranker="none")
+    assert "c2" in reduced["ids"] and not {"c0", "c1"} <= set(reduced["ids"])
+    for chunk_id, document, metadata, distance in zip(reduced["ids"], reduced["documents"], reduced["metadatas"],
+                                                      reduced["distances"]):
+        i = int(chunk_id[1:])
+        assert (document, metadata, distance) == (documents[i], {"paragraph_index": i}, 0.1 * i)
+    assert len(reduced["embeddings"]) == 2
+
+
+def test_diversify_reranks_the_mmr_pool_when_a_reranker_is_set():
+    from rerank import diversify
+
+    documents = ["BRCA1 and p53 in DNA repair", "DNA repair overview", "p53 alone", "BRCA1 alone"]
+    results = results_for("BRCA1 p53 repair", documents)
+    assert diversify("BRCA1 p53 repair", results, 4, reranker="none") is results
+    reduced = diversify("BRCA1 p53 repair", results, 2, reranker="lexical")
+    assert reduced["ids"][0] == "c0"
+    assert reduced["query_embedding"] is results["query_embedding"]
@@ -0,0 +1,55 @@
+"""Hybrid retrieval: BM25 and dense rankings fused by reciprocal rank fusion."""
+import pytest
+
+
+def test_reciprocal_rank_fusion_rewards_agreement_between_rankings():
+    from retrieval import reciprocal_rank_fusion
+
+    # a: 1/61 + 1/62, c: 1/63 + 1/61, b: 1/62, d: 1/63
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]], k=60) == ["a", "c", "b", "d"]
+    assert reciprocal_rank_fusion([["a", "b"], []], k=60) == ["a", "b"]
+
+
+def test_bm25_keeps_identifiers_and_ranks_rare_terms_first():
+    from lexical import BM25Index, tokenize
+
+    assert tokenize("The BRCA1 and p53 genes, eq.3 and IL-6") == ["brca1", "p53", "genes", "eq.3", "il-6"]
+    index = BM25Index(path="unused")
+    index.add_many(["common", "rare", "other"], ["cell growth cell growth", "cell growth and BRCA1",
+                                                  "membrane transport"])
+    assert [chunk_id for chunk_id, _ in index.search("BRCA1 cell growth")] == ["rare", "common"]
+    assert index.search("BRCA1", allowed=lambda chunk_id: chunk_id != "rare") == []
+    index.remove_many(["rare"])
+    assert [chunk_id for chunk_id, _ in index.search("BRCA1 cell growth")] == ["common"]
+
+
+@pytest.fixture
+def stored(collection, store_file):
+    # Stopword-only chunks sit close to the query's embedding but hold no BM25 terms; the
+    # BRCA1 chunk is far from it in vector space but is the only lexical match
+    store_file("filler.pdf", ["is the of", "the is of it", "of the is a", "is of the an", "the of is it a"])
+    store_file("brca.pdf", ["BRCA1 repair pathway"])
+    return collection
+
+
+def test_hybrid_search_adds_lexical_only_hits_scored_like_dense_ones(stored):
+    import retrieval
+
+    query = "what is the role of BRCA1"
+    dense = retrieval.retrieve(query, 2, stored, hybrid=False)
+    assert all(metadata["source_file"] == "filler.pdf" for metadata in dense["metadatas"])
+
+    fused = retrieval.retrieve(query, 2, stored, hybrid=True)
+    assert [metadata["source_file"] for metadata in fused["metadatas"]] == ["filler.pdf", "brca.pdf"]
+    assert fused["ids"][0] == dense["ids"][0]
+    everything = retrieval.dense_search(stored, fused["query_embedding"], 10)
+    brca_distance = everything["distances"][everything["ids"].index(fused["ids"][1])]
+    assert fused["distances"][1] == pytest.approx(brca_distance, abs=1e-4)
+
+
+def test_hybrid_search_keeps_lexical_hits_within_the_selected_sources(stored):
+    import retrieval
+
+    fused = retrieval.retrieve("what is the role of BRCA1", 2, stored, hybrid=True, sources=["filler.pdf"])
+    assert len(fused["ids"]) == 2
+    assert {metadata["source_file"] for metadata in fused["metadatas"]} == {"filler.pdf"}
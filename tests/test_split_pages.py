@@ -0,0 +1,79 @@
+import random
+
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from extract import get_text_splitter, split_pages
+
+WORDS = ["alpha", "beta", "gamma", "delta", "protein", "folding", "x", "research", "findings", "a" * 40]
+SEPARATORS = [" ", " ", " ", " ", ". ", "! ", "? ", "\n", "\n\n"]
+
+
+def random_page(rng, max_words):
+    parts = []
+    for _ in range(rng.randint(0, max_words)):
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice(SEPARATORS))
+    return "".join(parts)
+
+
+def random_pages(rng, max_words):
+    return [random_page(rng, max_words) for _ in range(rng.randint(0, 12))]
+
+
+def small_splitter():
+    return RecursiveCharacterTextSplitter(chunk_size=120, chunk_overlap=30,
+                                          separators=["\n\n", "\n", ". ", "! ", "? ", " "])
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_split_pages_matches_whole_document_split(seed):
+    rng = random.Random(seed)
+    pages = random_pages(rng, 600)
+    splitter = get_text_splitter()
+    chunks = [chunk for chunk, _, _ in split_pages(enumerate(pages, 1))]
+    assert chunks == splitter.split_text("\n".join(pages))
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_split_pages_reports_the_pages_each_chunk_spans(seed):
+    rng = random.Random(seed)
+    pages = random_pages(rng, 60)
+    splitter = small_splitter()
+    split = list(split_pages(enumerate(pages, 1), splitter))
+    assert [chunk for chunk, _, _ in split] == splitter.split_text("\n".join(pages))
+    for chunk, first_page, last_page in split:
+        assert 1 <= first_page <= last_page <= len(pages)
+        assert chunk in "\n".join(pages[first_page - 1:last_page])
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_split_pages_matches_whole_document_split_with_tiny_chunks(seed):
+    # Chunks smaller than words and runs without any separator reach every level of the splitter
+    rng = random.Random(seed)
+    alphabet = ["a", "b", " ", "\t", "\n", "\n\n", ".", ". ", "!", "? ", "x" * 30]
+    chunk_size = rng.choice([5, 10, 20, 50])
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=rng.randint(0, chunk_size),
+                                              separators=["\n\n", "\n", ". ", "! ", "? ", " "])
+    pages = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80))) for _ in range(rng.randint(0, 8))]
+    chunks = [chunk for chunk, _, _ in split_pages(enumerate(pages, 1), splitter)]
+    assert chunks == splitter.split_text("\n".join(pages))
+
+
+def test_split_pages_streams_chunks_as_pages_arrive():
+    rng = random.Random(0)
+    read = []
+
+    def pages():
+        for page_number in range(1, 101):
+            read.append(page_number)
+            yield page_number, random_page(rng, 600)
+
+    split = split_pages(pages())
+    _, first_page, _ = next(split)
+    assert first_page == 1 and len(read) <= 2
+    assert list(split)
+
+
+def test_split_pages_skips_blank_documents():
+    assert list(split_pages(enumerate(["", "  ", "\n"], 1))) == []
@@ -0,0 +1,81 @@
+"""Tenant isolation, and queries fanned out over a tenant's shards."""
+import types
+
+import pytest
+
+
+def test_tenants_see_only_their_own_documents(collection, store_file, tenant):
+    import ingest
+    import retrieval
+    import store
+    from lexical import get_lexical_index
+    from manifest import get_manifest
+
+    other = store.get_tenant_collection(f"{tenant}-other", create=True)
+    store_file("mine.pdf", ["Kinases phosphorylate proteins", "Kinase inhibitors in cancer"])
+    store_file("theirs.pdf", ["Kinases phosphorylate proteins too"], into=other)
+    assert other.shard_names()[0] != collection.shard_names()[0]
+
+    for own, file_name in ((collection, "mine.pdf"), (other, "theirs.pdf")):
+        found = retrieval.retrieve("kinases phosphorylate proteins", 5, own, hybrid=True)
+        assert {metadata["source_file"] for metadata in found["metadatas"]} == {file_name}
+    assert get_manifest(tenant).get("theirs.pdf") is None
+    assert len(get_lexical_index(collection)) == 2 and len(get_lexical_index(other)) == 1
+
+    assert ingest.delete_documents(["theirs.pdf"], collection) == {"theirs.pdf": 0}
+    assert other.count() == 1
+
+
+def test_request_tenant_follows_the_tenant_mode():
+    from tenants import DEFAULT_TENANT, tenant_for_request
+
+    request = types.SimpleNamespace(username="alice", session_hash="s3ss10n")
+    assert tenant_for_request(request, mode="shared") == DEFAULT_TENANT
+    assert tenant_for_request(request, mode="user") == "alice"
+    assert tenant_for_request(request, mode="session") == "s3ss10n"
+    assert tenant_for_request(None, mode="user") == DEFAULT_TENANT
+    with pytest.raises(ValueError):
+        tenant_for_request(request, mode="per-user")
+
+
+@pytest.fixture
+def sharded(collection, store_file, monkeypatch):
+    import store
+
+    monkeypatch.setattr(store, "SHARD_MAX_CHUNKS", 3)
+    store_file("a.pdf", ["ribosome structure", "ribosome assembly in the nucleolus"])
+    store_file("b.pdf", ["membrane transport proteins", "ion channels in the membrane"])
+    store_file("c.pdf", ["ribosome profiling of translation", "cell cycle checkpoints"])
+    return collection
+
+
+def test_new_files_open_a_shard_once_the_newest_is_full(sharded, store_file):
+    from manifest import get_manifest
+    from tenants import tenant_of
+
+    assert sharded.shard_count == 3
+    assert [shard.count() for shard in sharded.shards()] == [2, 2, 2]
+    # A revised file stays in its shard even though that shard is full
+    store_file("a.pdf", ["ribosome structure", "ribosome assembly", "ribosome export"])
+    assert [shard.count() for shard in sharded.shards()] == [3, 2, 2]
+    assert get_manifest(tenant_of(sharded)).get("a.pdf")["shard"] == sharded.shard_names()[0]
+
+
+def test_queries_merge_every_shard_by_distance(sharded):
+    import retrieval
+    from conftest import HashEmbedding
+
+    everything = sharded.get(include=["documents", "embeddings"])
+    assert sharded.count() == len(everything["ids"]) == 6
+    query_embedding = HashEmbedding()(["ribosome assembly and translation"])[0]
+    distances = retrieval.compute_distances(retrieval.distance_metric(sharded), query_embedding,
+                                            everything["embeddings"])
+    expected = [chunk_id for _, chunk_id in sorted(zip(distances, everything["ids"]))][:4]
+
+    found = retrieval.dense_search(sharded, query_embedding, 4)
+    assert found["ids"] == expected
+    assert found["distances"] == sorted(found["distances"])
+
+    pages = [sharded.get(include=["documents"], limit=4, offset=offset)["ids"] for offset in (0, 4)]
+    assert len(pages[0]) == 4 and len(pages[1]) == 2
+    assert sorted(pages[0] + pages[1]) == sorted(everything["ids"])
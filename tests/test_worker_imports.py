@@ -0,0 +1,24 @@
+"""Ingestion workers must not load the UI or the store when the app is launched with ``python app.py``."""
+import multiprocessing
+import os
+import sys
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def loaded_modules():
+    """Runs in a worker: which of the heavy modules it has imported"""
+    return sorted(name for name in ("gradio", "ui", "store", "chromadb", "warmup") if name in sys.modules)
+
+
+def test_spawned_worker_imports_neither_gradio_nor_store(monkeypatch):
+    # Imported here: workers import this module to run loaded_modules
+    import ingest
+
+    # Spawned workers re-run the parent's main script; make it app.py, as under `python app.py`
+    main = sys.modules["__main__"]
+    monkeypatch.setattr(main, "__spec__", None, raising=False)
+    monkeypatch.setattr(main, "__file__", APP_PATH, raising=False)
+    started = multiprocessing.get_context("spawn").SimpleQueue()
+    with ingest.start_pool(1, started) as pool:
+        assert pool.submit(loaded_modules).result(timeout=120) == []
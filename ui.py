@@ -0,0 +1,783 @@
+import warmup  # before gradio, so startup time is measured from here
+import gradio as gr
+import asyncio
+import os
+import time
+
+import context
+import ingest
+import jobs
+import memory
+import metrics
+import rerank
+import retrieval
+import store
+import tenants
+from answer_cache import get_answer_cache
+from manifest import get_manifest
+from config import COLLECTION_NAME, LLM_STREAMING, SHOW_TIMINGS
+from llm import INTERRUPTED_MARKER, acall_anura_api, astream_anura_api, call_anura_api, stream_anura_api
+from prompts import build_enhancement_prompt, build_rag_prompt
+
+def greet(name):
+    """Simple greeting function"""
+    if name:
+        return f"Hello, {name}! Welcome to Gradio! 🎉"
+    else:
+        return "Hello! Please enter your name to get a personalized greeting. 👋"
+
+def search_documents(query, num_results=5, anura_api_key="", sources=None, request: gr.Request = None):
+    """Search the tenant's documents (optionally only the selected source files) and enhance with LLM analysis"""
+    if not query.strip():
+        yield "Please enter a search query."
+        return
+    
+    try:
+        # Use the shared collection handle of the caller's tenant
+        collection = store.get_tenant_collection(tenants.tenant_for_request(request))
+        if collection is None:
+            yield "No documents found. Please upload and process some PDF files first."
+            return
+        
+        # Query the collection (vector + BM25 when hybrid search is on)
+        metrics.inc("requests", handler="search")
+        results = retrieval.retrieve(query, min(num_results, 10), collection, sources=sources)  # Limit to max 10 results
+        
+        if not results['documents']:
+            yield f"No relevant documents found for query: '{query}'"
+            return
+        
+        # Format results
+        search_results = []
+        search_results.append(f"🔍 Search Results for: '{query}'\n")
+        if sources:
+            search_results.append(f"📁 Limited to: {', '.join(sources)}\n")
+        
+        documents = results['documents']
+        metadatas = results['metadatas']
+        distances = results['distances']
+        chunk_ids = results['ids']
+        metric = retrieval.distance_metric(collection)
+        
+        for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas, distances), 1):
+            source_file = metadata.get('source_file', 'Unknown') if metadata else 'Unknown'
+            para_index = metadata.get('paragraph_index', 'N/A') if metadata else 'N/A'
+            page = f", page {metadata['page']}" if metadata and metadata.get('page') else ""
+            
+            # Convert the distance (smaller is better) to a similarity percentage under the collection's metric
+            similarity_score = retrieval.similarity_percent(metric, distance)
+            
+            # Clean up the document text by removing excessive whitespace and newlines
+            cleaned_doc = ' '.join(doc.split())
+            
+            search_results.append(f"📄 Result {i} (Similarity: {similarity_score:.1f}%):")
+            search_results.append(f"   Source: {source_file} (Paragraph {para_index}{page})")
+            search_results.append(f"   Content: {cleaned_doc[:500]}{'...' if len(cleaned_doc) > 500 else ''}")
+            search_results.append("")
+        
+        search_results_text = "\n".join(search_results)
+        
+        # Show the vector results right away, then enhance with LLM analysis if API key is provided
+        if LLM_STREAMING:
+            yield from stream_search_with_llm(query, search_results_text, anura_api_key, chunk_ids)
+        else:
+            yield search_results_text
+            yield enhance_search_with_llm(query, search_results_text, anura_api_key, chunk_ids)
+    
+    except Exception as e:
+        metrics.inc("request_errors", handler="search")
+        yield f"Error searching documents: {str(e)}"
+
+def format_file_status(position, total, file_name, result):
+    """One Upload Status line for an ingested file (``result["paragraphs"]`` is a count)"""
+    if result.get("error"):
+        return f"❌ File {position}/{total}: {file_name} - Error: {result['error']}"
+    if result["status"] == "unchanged":
+        return (
+            f"⏭️ File {position}/{total}: {file_name} - unchanged, "
+            f"{result['chunks_kept']} paragraphs already in ChromaDB ({result['elapsed_seconds']:.2f}s)"
+        )
+    elapsed = result["elapsed_seconds"]
+    pages_per_second = result["pages"] / elapsed if elapsed > 0 else 0.0
+    if result["status"] == "updated":
+        changes = (f"updated: {result['chunks_added']} new, {result['chunks_kept']} unchanged, "
+                   f"{result['chunks_deleted']} removed paragraphs")
+    else:
+        changes = f"{result['paragraphs']} paragraphs stored in ChromaDB"
+    skipped = result.get("skipped_pages")
+    if skipped:
+        changes += f", skipped unreadable page(s) {', '.join(map(str, skipped))}"
+    return (
+        f"✅ File {position}/{total}: {file_name} ({result['file_size']:,} bytes) - {changes} "
+        f"({result['pages']} pages in {elapsed:.2f}s, {pages_per_second:.1f} pages/s)"
+    )
+
+def process_pdf(pdf_files, tenant=None):
+    """Process uploaded PDF files into a tenant's collection in parallel, streaming per-file status"""
+    if pdf_files is None or len(pdf_files) == 0:
+        yield "No files uploaded. Please select PDF files."
+        return
+    
+    try:
+        results = []
+        total_size = 0
+        valid_files = 0
+        total_paragraphs = 0
+        total_pages = 0
+        skipped_files = 0
+        started = time.perf_counter()
+        
+        # Basic validation before anything is sent to the worker pool
+        pdf_paths = []
+        for i, pdf_file_path in enumerate(pdf_files, 1):
+            file_name = os.path.basename(pdf_file_path)
+            if not file_name.lower().endswith('.pdf'):
+                results.append(f"❌ File {i}: {file_name} - Error: Not a PDF file")
+            else:
+                pdf_paths.append(pdf_file_path)
+        
+        yield "\n".join(results + [f"⏳ Processing {len(pdf_paths)} PDF file(s)..."])
+        
+        collection = store.get_tenant_collection(tenant, create=True)
+        for done, (_, result) in enumerate(ingest.ingest_files(pdf_paths, collection), 1):
+            paragraph_count = len(result["paragraphs"])
+            results.append(format_file_status(done, len(pdf_paths), result["file_name"],
+                                              dict(result, paragraphs=paragraph_count)))
+            if result["status"] == "unchanged":
+                skipped_files += 1
+            elif not result["error"]:
+                total_size += result["file_size"]
+                valid_files += 1
+                total_paragraphs += paragraph_count
+                total_pages += result["pages"]
+            yield "\n".join(results)
+        
+        total_seconds = time.perf_counter() - started
+        
+        # Summary
+        summary = "\n📊 Summary:\n"
+        summary += f"• Total files uploaded: {len(pdf_files)}\n"
+        summary += f"• Valid PDF files processed: {valid_files}\n"
+        summary += f"• Unchanged files skipped: {skipped_files}\n"
+        summary += f"• Total size: {total_size:,} bytes\n"
+        summary += f"• Total pages: {total_pages} ({total_pages / total_seconds if total_seconds > 0 else 0:.1f} pages/s)\n"
+        summary += f"• Total paragraphs stored in ChromaDB: {total_paragraphs}\n"
+        summary += f"• Processing time: {total_seconds:.2f}s\n"
+        summary += f"• ChromaDB collection: {collection.name}\n"
+        summary += "• Status: Ready for research!\n"
+        
+        yield "\n".join(results) + summary
+    
+    except Exception as e:
+        yield f"Error processing files: {str(e)}"
+
+STAGE_LABELS = {
+    "queued": "⏳ queued",
+    "hashing": "🔎 checking for changes",
+    "extracting": "📖 extracting text",
+    "storing": "💾 storing paragraphs",
+}
+
+def render_job_status(job):
+    """Upload Status text for an ingestion job"""
+    files = job["files"]
+    finished = [entry for entry in files if entry["stage"] in ("done", "failed")]
+    lines = [f"📦 Job {job['id']}: {job['status']} ({len(finished)}/{len(files)} files finished)\n"]
+    for position, entry in enumerate(files, 1):
+        if entry["stage"] in ("done", "failed"):
+            lines.append(format_file_status(position, len(files), entry["name"], entry))
+        else:
+            lines.append(f"{STAGE_LABELS.get(entry['stage'], entry['stage'])} - File {position}/{len(files)}: {entry['name']}")
+    
+    if job["status"] in ("done", "failed"):
+        stored = [entry for entry in files if entry["stage"] == "done" and entry.get("status") != "unchanged"]
+        summary = "\n📊 Summary:\n"
+        summary += f"• Total files uploaded: {len(files)}\n"
+        summary += f"• Valid PDF files processed: {len(stored)}\n"
+        summary += f"• Unchanged files skipped: {sum(1 for entry in files if entry.get('status') == 'unchanged')}\n"
+        summary += f"• Total size: {sum(entry.get('file_size') or 0 for entry in stored):,} bytes\n"
+        summary += f"• Total paragraphs stored in ChromaDB: {sum(entry.get('paragraphs') or 0 for entry in stored)}\n"
+        summary += f"• Processing time: {job['updated'] - job['created']:.2f}s\n"
+        summary += f"• ChromaDB collection: {tenants.collection_name(COLLECTION_NAME, job['tenant'])}\n"
+        if job["error"]:
+            summary += f"• Error: {job['error']}\n"
+        else:
+            summary += "• Status: Ready for research!\n"
+        lines.append(summary)
+    return "\n".join(lines)
+
+def submit_pdf_job(pdf_files, request: gr.Request = None):
+    """Queue uploaded PDF files for background ingestion; returns (job_id, status text, timer update)"""
+    if pdf_files is None or len(pdf_files) == 0:
+        return None, "No files uploaded. Please select PDF files.", gr.Timer(active=False)
+    
+    try:
+        job_id = jobs.get_job_queue().submit(pdf_files, tenants.tenant_for_request(request))
+        return job_id, render_job_status(jobs.get_job_queue().get(job_id)), gr.Timer(active=True)
+    except Exception as e:
+        return None, f"Error processing files: {str(e)}", gr.Timer(active=False)
+
+def poll_job_status(job_id):
+    """Refresh the Upload Status for the session's current job; stops polling once it finishes"""
+    job = jobs.get_job_queue().get(job_id) if job_id else None
+    if job is None:
+        return gr.update(), gr.Timer(active=False)
+    return render_job_status(job), gr.Timer(active=job["status"] in ("queued", "running"))
+
+def job_status(job_id, request: gr.Request = None):
+    """Status of one of the caller's ingestion jobs as JSON-serialisable data (also exposed through the Gradio API)"""
+    job = jobs.get_job_queue().get(job_id.strip()) if job_id and job_id.strip() else None
+    # Other tenants' jobs are reported as unknown rather than revealing they exist
+    if job is None or job["tenant"] != tenants.tenant_for_request(request):
+        return {"error": f"Unknown job: {job_id}"}
+    for entry in job["files"]:
+        entry.pop("path", None)
+    return job
+
+def _enhancement_deltas(query, enhancement_prompt, anura_api_key, chunk_ids=None, stream=False):
+    """The AI analysis as text deltas: an earlier answer for the same question over the same chunks, else a
+    fresh one (streamed when ``stream``) that is cached once it completes without error or interruption"""
+    answer_cache = get_answer_cache()
+    cached = answer_cache.lookup("search_enhancement", query, enhancement_prompt, chunk_ids or [])
+    if cached is not None:
+        yield cached
+        return
+    
+    llm_enhancement = ""
+    if stream:
+        deltas = stream_anura_api(enhancement_prompt, anura_api_key)
+    else:
+        deltas = [call_anura_api(enhancement_prompt, anura_api_key) or ""]
+    for delta in deltas:
+        llm_enhancement += delta
+        yield delta
+    
+    if llm_enhancement and not llm_enhancement.startswith("Error") and INTERRUPTED_MARKER not in llm_enhancement:
+        answer_cache.store("search_enhancement", query, enhancement_prompt, chunk_ids or [], llm_enhancement)
+
+def enhance_search_with_llm(query, search_results_text, anura_api_key, chunk_ids=None):
+    """Enhance search results using Anura API LLM"""
+    if not anura_api_key or not anura_api_key.strip():
+        return search_results_text
+    
+    enhancement_prompt = build_enhancement_prompt(query, search_results_text)
+    llm_enhancement = "".join(_enhancement_deltas(query, enhancement_prompt, anura_api_key, chunk_ids, stream=False))
+    
+    if llm_enhancement and not llm_enhancement.startswith("Error"):
+        return f"{search_results_text}\n\n🤖 **AI Analysis & Summary:**\n{llm_enhancement}"
+    else:
+        return f"{search_results_text}\n\n🤖 **AI Analysis:** {llm_enhancement or 'Unable to generate analysis'}"
+
+def stream_search_with_llm(query, search_results_text, anura_api_key, chunk_ids=None):
+    """Yield the search results immediately, then the AI analysis as it streams in"""
+    yield search_results_text
+    if not anura_api_key or not anura_api_key.strip():
+        return
+    
+    enhancement_prompt = build_enhancement_prompt(query, search_results_text)
+    llm_enhancement = ""
+    for delta in _enhancement_deltas(query, enhancement_prompt, anura_api_key, chunk_ids, stream=True):
+        llm_enhancement += delta
+        if llm_enhancement.startswith("Error"):
+            continue
+        yield f"{search_results_text}\n\n🤖 **AI Analysis & Summary:**\n{llm_enhancement}"
+    
+    if not llm_enhancement or llm_enhancement.startswith("Error"):
+        yield f"{search_results_text}\n\n🤖 **AI Analysis:** {llm_enhancement or 'Unable to generate analysis'}"
+
+def format_timings(timings):
+    """One-line per-stage timings for the Search Statistics footer"""
+    return ", ".join(f"{stage.replace('_', ' ')} {seconds * 1000:.0f} ms" for stage, seconds in timings.items())
+
+def _prepare_rag_chat(message, history, num_results, anura_api_key, session_id, sources, tenant, timings):
+    """Everything a chat turn does before the LLM: a dict the answer is built from, or an error message"""
+    # Use the shared collection handle of the tenant
+    collection = store.get_tenant_collection(tenant)
+    if collection is None:
+        return "No documents found. Please upload and process some PDF files first."
+    
+    # Compact conversation memory, and a standalone version of follow-up questions for retrieval
+    with metrics.timed("chat_memory", timings):
+        chat_memory = memory.get_memory(session_id)
+        conversation_context = chat_memory.context(history)
+        search_query = chat_memory.standalone_query(message, history, anura_api_key)
+    
+    # Query the collection for more candidates, then keep the most relevant non-redundant ones
+    candidates = retrieval.retrieve(search_query, min(num_results * 2, 20), collection,
+                                    include_embeddings=True, timings=timings, sources=sources)
+    with metrics.timed("rerank", timings):
+        results = rerank.diversify(search_query, candidates, num_results)
+    
+    if not results['documents']:
+        return f"No relevant documents found for query: '{message}'"
+    
+    # Merge overlapping neighbours and pack the best passages into the token budget
+    with metrics.timed("prompt_build", timings):
+        passages, context_stats = context.pack_context(results['documents'], results['metadatas'],
+                                                       results['distances'])
+        rag_prompt = build_rag_prompt(message, conversation_context, passages, retrieval.distance_metric(collection))
+    
+    with metrics.timed("answer_cache", timings):
+        cached = get_answer_cache().lookup("rag_chat", search_query, rag_prompt, results['ids'], conversation_context)
+    return {
+        "chat_memory": chat_memory,
+        "conversation_context": conversation_context,
+        "search_query": search_query,
+        "candidates": candidates,
+        "results": results,
+        "context_stats": context_stats,
+        "rag_prompt": rag_prompt,
+        "cached": cached,
+    }
+
+def _finish_rag_chat(turn, llm_analysis, history, started, llm_started, timings):
+    """Cache a complete answer and put the reply, with its Search Statistics footer, in the last history entry"""
+    cached = turn["cached"]
+    results = turn["results"]
+    context_stats = turn["context_stats"]
+    if cached is None:
+        timings["llm_total"] = time.perf_counter() - llm_started
+    
+    if cached is None and llm_analysis and not llm_analysis.startswith("Error") \
+            and INTERRUPTED_MARKER not in llm_analysis:
+        get_answer_cache().store("rag_chat", turn["search_query"], turn["rag_prompt"], results['ids'], llm_analysis,
+                                 turn["conversation_context"])
+    
+    if llm_analysis and not llm_analysis.startswith("Error"):
+        response = f"{llm_analysis}\n\n---\n\n📊 **Search Statistics:**\n• Documents analyzed: {len(results['documents'])} (of {len(turn['candidates']['ids'])} retrieved)\n• Context: {context_stats['passages']} passages, ~{context_stats['packed_tokens']} tokens (saved ~{context_stats['overlap_tokens_saved']} from overlap, ~{context_stats['budget_tokens_dropped']} over budget)\n• Sources: {len(set(m.get('source_file', 'Unknown') for m in results['metadatas']))}\n• Analysis powered by Anura API"
+        if cached is not None:
+            response += " (cached answer)"
+    else:
+        metrics.inc("request_errors", handler="rag_chat")
+        response = f"Error in advanced analysis: {llm_analysis or 'Unable to generate comprehensive analysis'}"
+    
+    timings["total"] = time.perf_counter() - started
+    metrics.observe("rag_chat_request", timings["total"])
+    if SHOW_TIMINGS and llm_analysis and not llm_analysis.startswith("Error"):
+        response += f"\n• Timings: {format_timings(timings)}"
+    
+    history[-1][1] = response
+
+def _fail_rag_chat(message, history, e):
+    """Show an error in place of the turn's answer"""
+    metrics.inc("request_errors", handler="rag_chat")
+    error_response = f"Error in advanced RAG search: {str(e)}"
+    if history and history[-1][0] == message and not history[-1][1].startswith("Error"):
+        history[-1][1] = error_response
+    else:
+        history.append([message, error_response])
+
+def stream_rag_search_chat(message, history, num_results=5, anura_api_key="", session_id=None, sources=None,
+                           tenant=None):
+    """Advanced RAG search (optionally over the selected source files) that yields (history, history) as the answer streams in"""
+    if not message.strip():
+        yield history, history
+        return
+    
+    if not anura_api_key or not anura_api_key.strip():
+        error_response = "Advanced RAG search requires an Anura API key. Please provide your API key."
+        history.append([message, error_response])
+        yield history, history
+        return
+    
+    metrics.inc("requests", handler="rag_chat")
+    started = time.perf_counter()
+    timings = {}
+    try:
+        turn = _prepare_rag_chat(message, history, num_results, anura_api_key, session_id, sources, tenant, timings)
+        if isinstance(turn, str):
+            history.append([message, turn])
+            yield history, history
+            return
+        
+        # Stream the answer into a new history entry
+        history.append([message, ""])
+        llm_analysis = ""
+        cached = turn["cached"]
+        llm_started = time.perf_counter()
+        if cached is not None:
+            deltas = [cached]
+        elif LLM_STREAMING:
+            deltas = stream_anura_api(turn["rag_prompt"], anura_api_key)
+        else:
+            deltas = [call_anura_api(turn["rag_prompt"], anura_api_key) or ""]
+        for delta in deltas:
+            if not llm_analysis and cached is None:
+                timings["llm_first_token"] = time.perf_counter() - llm_started
+            llm_analysis += delta
+            if not llm_analysis.startswith("Error"):
+                history[-1][1] = llm_analysis
+                yield history, history
+        
+        _finish_rag_chat(turn, llm_analysis, history, started, llm_started, timings)
+        yield history, history
+        
+        # Fold the turns before this one into the session summary while the user reads; without a
+        # session the memory is thrown away after this request, so the LLM call would be wasted
+        if session_id is not None:
+            turn["chat_memory"].refresh_async(history, anura_api_key)
+    
+    except Exception as e:
+        _fail_rag_chat(message, history, e)
+        yield history, history
+
+async def _single_delta(text):
+    yield text
+
+async def astream_rag_search_chat(message, history, num_results=5, anura_api_key="", session_id=None, sources=None,
+                                  tenant=None):
+    """Async ``stream_rag_search_chat``: retrieval runs on a worker thread and the answer is awaited from the
+    async client, so no thread is held while the LLM responds"""
+    if not message.strip():
+        yield history, history
+        return
+    
+    if not anura_api_key or not anura_api_key.strip():
+        error_response = "Advanced RAG search requires an Anura API key. Please provide your API key."
+        history.append([message, error_response])
+        yield history, history
+        return
+    
+    metrics.inc("requests", handler="rag_chat")
+    started = time.perf_counter()
+    timings = {}
+    try:
+        turn = await asyncio.to_thread(_prepare_rag_chat, message, history, num_results, anura_api_key, session_id,
+                                       sources, tenant, timings)
+        if isinstance(turn, str):
+            history.append([message, turn])
+            yield history, history
+            return
+        
+        history.append([message, ""])
+        llm_analysis = ""
+        cached = turn["cached"]
+        llm_started = time.perf_counter()
+        if cached is not None:
+            deltas = _single_delta(cached)
+        elif LLM_STREAMING:
+            deltas = astream_anura_api(turn["rag_prompt"], anura_api_key)
+        else:
+            deltas = _single_delta(await acall_anura_api(turn["rag_prompt"], anura_api_key) or "")
+        async for delta in deltas:
+            if not llm_analysis and cached is None:
+                timings["llm_first_token"] = time.perf_counter() - llm_started
+            llm_analysis += delta
+            if not llm_analysis.startswith("Error"):
+                history[-1][1] = llm_analysis
+                yield history, history
+        
+        _finish_rag_chat(turn, llm_analysis, history, started, llm_started, timings)
+        yield history, history
+        
+        if session_id is not None:
+            turn["chat_memory"].refresh_async(history, anura_api_key)
+    
+    except Exception as e:
+        _fail_rag_chat(message, history, e)
+        yield history, history
+
+def advanced_rag_search_chat(message, history, num_results=5, anura_api_key="", session_id=None, sources=None,
+                             tenant=None):
+    """Advanced RAG search with chat interface and history tracking"""
+    # The last (history, history) pair the stream yields is the finished exchange
+    *_, result = stream_rag_search_chat(message, history, num_results, anura_api_key, session_id, sources, tenant)
+    return result
+
+def list_documents(tenant=None):
+    """A tenant's document catalog rows: name, size, pages, chunks and ingest time"""
+    rows = []
+    for entry in get_manifest(tenants.normalize(tenant)).catalog():
+        ingested_at = entry["ingested_at"]
+        rows.append([
+            entry["source_file"],
+            entry["file_size"],
+            entry["pages"] if entry["pages"] is not None else "",
+            entry["chunks"],
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(ingested_at)) if ingested_at else "",
+        ])
+    return rows
+
+def refresh_catalog(request: gr.Request = None):
+    """Catalog table plus updated choices for every document selector"""
+    rows = list_documents(tenants.tenant_for_request(request))
+    names = [row[0] for row in rows]
+    return rows, gr.update(choices=names), gr.update(choices=names), gr.update(choices=names, value=[])
+
+def delete_selected_documents(file_names, request: gr.Request = None):
+    """Delete the selected documents' chunks, then refresh the catalog"""
+    if not file_names:
+        return ("No documents selected.",) + refresh_catalog(request)
+    try:
+        collection = store.get_tenant_collection(tenants.tenant_for_request(request))
+        if collection is None:
+            return ("No documents found.",) + refresh_catalog(request)
+        deleted = ingest.delete_documents(file_names, collection)
+        status = "\n".join(f"🗑️ {name}: {count} paragraphs removed" for name, count in deleted.items())
+    except Exception as e:
+        status = f"Error deleting documents: {str(e)}"
+    return (status,) + refresh_catalog(request)
+
+def clear_chat_history(request: gr.Request = None):
+    """Clear the chat history"""
+    if request is not None:
+        memory.forget(request.session_hash)
+    return [], []
+
+# Create the Gradio interface
+with gr.Blocks(title="AI-Enhanced Research Assistant") as demo:
+    gr.Markdown("# 📚 AI-Enhanced Research Assistant")
+    gr.Markdown("Upload PDF files and search through them with AI-powered analysis using Anura API integration")
+    
+    with gr.Tabs():
+        with gr.TabItem("PDF Upload"):
+            with gr.Row():
+                with gr.Column():
+                    pdf_input = gr.File(
+                        label="Upload PDF Files",
+                        file_types=[".pdf"],
+                        file_count="multiple",
+                        type="filepath"
+                    )
+                    upload_btn = gr.Button("Process PDFs", variant="primary")
+                
+                with gr.Column():
+                    pdf_output = gr.Textbox(
+                        label="Upload Status",
+                        lines=10,
+                        interactive=False
+                    )
+            
+            with gr.Accordion("Ingestion Job Status", open=False):
+                with gr.Row():
+                    job_id_input = gr.Textbox(label="Job ID", lines=1, scale=3)
+                    job_status_btn = gr.Button("Check Status", scale=1)
+                job_status_output = gr.JSON(label="Job")
+            
+            # Uploads are queued as background jobs; the status box polls the session's current job
+            current_job = gr.State(None)
+            job_timer = gr.Timer(1.0, active=False)
+            
+            # The button is the only trigger: a second one (e.g. on upload) would queue the files again once
+            # the first job had finished, since only pending jobs are shared
+            upload_btn.click(fn=submit_pdf_job, inputs=pdf_input, outputs=[current_job, pdf_output, job_timer])
+            
+            job_timer.tick(fn=poll_job_status, inputs=current_job, outputs=[pdf_output, job_timer])
+            job_status_btn.click(fn=job_status, inputs=job_id_input, outputs=job_status_output, api_name="job_status")
+        
+        with gr.TabItem("Document Search"):
+            with gr.Row():
+                with gr.Column():
+                    search_input = gr.Textbox(
+                        label="Search Query",
+                        placeholder="Enter your search query here...",
+                        lines=2
+                    )
+                    num_results = gr.Slider(
+                        minimum=1,
+                        maximum=10,
+                        value=5,
+                        step=1,
+                        label="Number of Results"
+                    )
+                    anura_api_key = gr.Textbox(
+                        label="Anura API Key (Optional)",
+                        placeholder="Enter your Anura API key for AI-enhanced analysis...",
+                        lines=1,
+                        type="password"
+                    )
+                    search_sources = gr.Dropdown(
+                        label="Limit to Documents (Optional)",
+                        choices=[],
+                        multiselect=True
+                    )
+                    search_btn = gr.Button("Search Documents", variant="primary")
+                
+                with gr.Column():
+                    search_output = gr.Textbox(
+                        label="Search Results",
+                        lines=20,
+                        interactive=False
+                    )
+            
+            # Connect the search function
+            search_btn.click(fn=search_documents, inputs=[search_input, num_results, anura_api_key, search_sources], outputs=search_output)
+            
+            # Also trigger on Enter key press
+            search_input.submit(fn=search_documents, inputs=[search_input, num_results, anura_api_key, search_sources], outputs=search_output)
+        
+        with gr.TabItem("RAG Chat"):
+            gr.Markdown("### 🤖 AI Research Chat with Document Analysis")
+            gr.Markdown("Have a conversation with AI about your documents. Chat history is maintained for context.")
+            
+            with gr.Row():
+                with gr.Column(scale=1):
+                    rag_num_results = gr.Slider(
+                        minimum=1,
+                        maximum=10,
+                        value=5,
+                        step=1,
+                        label="Documents per Query"
+                    )
+                    rag_anura_api_key = gr.Textbox(
+                        label="Anura API Key",
+                        placeholder="Enter your Anura API key for chat functionality...",
+                        lines=1,
+                        type="password"
+                    )
+                    rag_sources = gr.Dropdown(
+                        label="Limit to Documents (Optional)",
+                        choices=[],
+                        multiselect=True
+                    )
+                    clear_btn = gr.Button("Clear Chat History", variant="secondary")
+                
+                with gr.Column(scale=3):
+                    chatbot = gr.Chatbot(
+                        label="AI Research Assistant Chat",
+                        height=400,
+                        show_label=True
+                    )
+                    
+                    with gr.Row():
+                        msg = gr.Textbox(
+                            label="",
+                            placeholder="Ask questions about your documents...",
+                            lines=1,
+                            scale=4,
+                            container=False
+                        )
+                        submit_btn = gr.Button("Send", variant="primary", scale=1)
+            
+            # Chat state to maintain history
+            chat_history = gr.State([])
+            
+            # Function to handle user input and update chat
+            def user_input(message, history):
+                if message.strip():
+                    return "", history + [[message, ""]]
+                return message, history
+            
+            async def bot_response(history, num_results, api_key, sources, request: gr.Request):
+                if history and history[-1][1] == "":  # If there's a pending user message
+                    user_message = history[-1][0]
+                    # Remove the pending message and stream the response into the chat
+                    history_without_pending = history[:-1]
+                    session_id = request.session_hash if request else None
+                    tenant = tenants.tenant_for_request(request)
+                    async for updated_history, _ in astream_rag_search_chat(user_message, history_without_pending, num_results, api_key, session_id, sources, tenant):
+                        yield updated_history
+                    return
+                yield history
+            
+            # Connect the chat functionality
+            msg.submit(user_input, [msg, chatbot], [msg, chatbot]).then(
+                bot_response, [chatbot, rag_num_results, rag_anura_api_key, rag_sources], [chatbot]
+            )
+            
+            submit_btn.click(user_input, [msg, chatbot], [msg, chatbot]).then(
+                bot_response, [chatbot, rag_num_results, rag_anura_api_key, rag_sources], [chatbot]
+            )
+            
+            clear_btn.click(clear_chat_history, outputs=[chatbot, chat_history])
+        
+        with gr.TabItem("Documents"):
+            gr.Markdown("### 📁 Document Catalog")
+            catalog_table = gr.Dataframe(
+                headers=["Document", "Size (bytes)", "Pages", "Paragraphs", "Ingested"],
+                interactive=False
+            )
+            with gr.Row():
+                refresh_catalog_btn = gr.Button("Refresh", variant="secondary")
+                delete_select = gr.Dropdown(label="Documents to Delete", choices=[], multiselect=True, scale=3)
+                delete_btn = gr.Button("Delete Selected", variant="stop")
+            delete_output = gr.Textbox(label="Delete Status", lines=3, interactive=False)
+            
+            # The catalog comes from the ingest manifest, so listing never scans the collection
+            catalog_outputs = [catalog_table, search_sources, rag_sources, delete_select]
+            refresh_catalog_btn.click(fn=refresh_catalog, outputs=catalog_outputs, api_name="list_documents")
+            delete_btn.click(fn=delete_selected_documents, inputs=delete_select,
+                             outputs=[delete_output] + catalog_outputs, api_name="delete_documents")
+            demo.load(fn=refresh_catalog, outputs=catalog_outputs)
+        
+        with gr.TabItem("About & Usage"):
+            gr.Markdown("""
+            ## 📋 How to Use This Research Assistant
+            
+            ### 🔧 Features:
+            1. **PDF Upload**: Upload multiple PDF documents for analysis
+            2. **Document Search**: Basic search through your documents with optional AI enhancement
+            3. **Advanced RAG Chat**: Interactive AI-powered research chat with conversation history
+            
+            ### 🤖 Anura API Integration:
+            This application integrates with the **Anura API** to provide enhanced search results using Large Language Models (LLMs).
+            
+            **What you get with Anura API:**
+            - AI-powered document analysis and summarization
+            - Interactive chat interface with conversation memory
+            - Intelligent answers to your research questions
+            - Connections and insights across multiple documents
+            - Comprehensive research recommendations
+            - Context-aware responses that build on previous questions
+            
+            **To use AI features:**
+            1. Get your Anura API key from: https://anura-testnet.lilypad.tech/
+            2. Enter your API key in the search forms or chat interface
+            3. Enjoy enhanced, intelligent search results and conversations!
+            
+            ### 🔍 Search Types:
+            - **Document Search**: Shows relevant document excerpts with optional AI summary
+            - **Advanced RAG Chat**: Interactive conversational AI that remembers your questions and builds context over time
+            
+            ### 💬 Chat Features:
+            - **Conversation Memory**: The AI remembers previous questions and answers in your session
+            - **Context Building**: Each question builds on previous ones for deeper analysis
+            - **Follow-up Questions**: The AI suggests relevant follow-up questions
+            - **Clear History**: Reset the conversation anytime with the "Clear Chat History" button
+            
+            ### 💡 Tips:
+            - Upload multiple related PDFs for better cross-document analysis
+            - Use specific, clear questions for better AI responses
+            - Build on previous questions - the AI remembers your conversation
+            - Ask follow-up questions to dive deeper into topics
+            - The AI can identify gaps in information and suggest further research
+            - All your documents are stored locally and securely
+            """)
+        
+        # with gr.TabItem("Greeting"):
+        #     with gr.Row():
+        #         with gr.Column():
+        #             name_input = gr.Textbox(
+        #                 label="Your Name", 
+        #                 placeholder="Enter your name here...",
+        #                 lines=1
+        #             )
+        #             greet_btn = gr.Button("Greet Me!", variant="primary")
+                
+        #         with gr.Column():
+        #             output = gr.Textbox(
+        #                 label="Greeting",
+        #                 lines=2,
+        #                 interactive=False
+        #             )
+            
+        #     # Connect the button to the function
+        #     greet_btn.click(fn=greet, inputs=name_input, outputs=output)
+            
+            # Also trigger on Enter key press
+       #     name_input.submit(fn=greet, inputs=name_input, outputs=output)
+
+def start_services():
+    """Start what runs next to the UI; only the launch entry point calls this, never an import"""
+    # Prometheus metrics and /ready on their own port next to the app (METRICS_PORT=0 turns this off)
+    metrics.start_metrics_server()
+    # Load the store, embedding model and LLM client in the background while the UI starts
+    warmup.start()
+    # Job workers start now, so jobs queued or running before a restart resume without waiting for a request
+    jobs.get_job_queue()
+
+
+def main():
+    """Start the services, then serve the UI (see app.py)"""
+    start_services()
+    demo.launch(share=True)
\ No newline at end of file
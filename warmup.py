@@ -0,0 +1,140 @@
+"""Background warm-up at launch, and the readiness state served at ``/ready``.
+
+Slow imports (chromadb, the embedding model, openai, the text splitter) are
+deferred until first use so the UI comes up quickly. ``start()``, called only
+by the launch entry point (``ui.start_services``), then loads them in a
+background thread one stage at a time, and the service reports ready only
+once every stage has finished; a failed warm-up is retried. Stage durations
+and the time from app import to ready are exposed at ``/ready`` and recorded
+as ``warmup_*`` stage latencies.
+"""
+import json
+import threading
+import time
+
+import metrics
+from config import WARMUP
+
+# Set when app.py starts importing this module, before gradio and the rest are loaded
+STARTED = time.perf_counter()
+
+_lock = threading.Lock()
+_ready = threading.Event()
+_thread = None
+_state = {"status": "starting", "stages": {}, "error": None, "seconds_to_ready": None}
+
+
+def _load_store():
+    import store
+    store.get_client()
+
+
+def _load_embedding_model():
+    from embeddings import get_embedding_function
+    get_embedding_function().warm_up()
+
+
+def _load_collection():
+    import store
+    from embeddings import get_embedding_function
+    from lexical import get_lexical_index
+
+    collection = store.get_tenant_collection()
+    if collection is None:
+        return
+    get_lexical_index(collection)
+    if collection.count():
+        # The first query loads the vector index into memory
+        collection.query(query_embeddings=get_embedding_function()(["warm up"]), n_results=1, include=[])
+
+
+def _load_llm_client():
+    from llm import transient_errors
+
+    # Imports openai, which llm.py otherwise loads on the first LLM request
+    transient_errors()
+
+
+def _load_text_splitter():
+    from extract import get_text_splitter
+    get_text_splitter()
+
+
+STAGES = (
+    ("store", _load_store),
+    ("embedding_model", _load_embedding_model),
+    ("collection", _load_collection),
+    ("llm_client", _load_llm_client),
+    ("text_splitter", _load_text_splitter),
+)
+
+
+def _mark_ready():
+    _state["status"] = "ready"
+    _state["seconds_to_ready"] = time.perf_counter() - STARTED
+    metrics.observe("startup_ready", _state["seconds_to_ready"])
+    _ready.set()
+
+
+def _run(retry_delay=5.0):
+    while True:
+        _state.update(status="warming", error=None)
+        try:
+            for stage, load in STAGES:
+                started = time.perf_counter()
+                load()
+                _state["stages"][stage] = time.perf_counter() - started
+                metrics.observe(f"warmup_{stage}", _state["stages"][stage])
+        except Exception as e:
+            _state.update(status="failed", error=f"{stage}: {e}")
+            metrics.inc("warmup_failures", stage=stage)
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 60.0)
+            continue
+        _mark_ready()
+        return
+
+
+def start():
+    """Warm up in a background thread (or report ready straight away with WARMUP off)"""
+    global _thread
+    with _lock:
+        if _thread is not None or _ready.is_set():
+            return
+        if not WARMUP:
+            _mark_ready()
+            return
+        _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+        _thread.start()
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def wait(timeout=None):
+    """Block until warm-up finishes; returns whether it did within the timeout"""
+    return _ready.wait(timeout)
+
+
+def status():
+    """Readiness, per-stage seconds and the last error, as JSON-serialisable data"""
+    return {
+        "ready": is_ready(),
+        "status": _state["status"],
+        "stages": dict(_state["stages"]),
+        "error": _state["error"],
+        "seconds_to_ready": _state["seconds_to_ready"],
+    }
+
+
+def _ready_endpoint():
+    return (200 if is_ready() else 503), "application/json", json.dumps(status())
+
+
+def _live_endpoint():
+    return 200, "application/json", json.dumps({"live": True})
+
+
+metrics.add_endpoint("/ready", _ready_endpoint)
+metrics.add_endpoint("/live", _live_endpoint)